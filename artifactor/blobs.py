@@ -0,0 +1,67 @@
+"""Content addressed store of artifact files
+
+The pytest processes write the contents of large artifacts, like screenshots and page sources,
+straight to the store and fire the ``filedump`` hook with the digest of the contents only. The
+filedump plugin then links the blob into the artifact directory of the test, so the contents are
+neither encoded into the hook messages nor decoded by the artifactor server. Equal contents are
+stored once.
+
+The store is shared through the ``blob_dir`` of the artifactor config, by default
+``log/artifact_blobs``::
+
+    artifactor:
+        blob_dir: /home/test/workspace/cfme_tests/log/artifact_blobs
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+from cfme.utils.path import log_path
+
+#: Contents smaller than this are sent within the hook message
+BLOB_THRESHOLD = 16 * 1024
+
+
+class BlobStore:
+    """Stores contents under their sha256 digest in ``directory``"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    @classmethod
+    def from_config(cls, art_config):
+        return cls(art_config.get("blob_dir") or log_path.join("artifact_blobs").strpath)
+
+    def path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def put(self, contents):
+        """Stores the contents unless they already are and returns their digest"""
+        if isinstance(contents, str):
+            contents = contents.encode("utf-8")
+        digest = hashlib.sha256(contents).hexdigest()
+        path = self.path(digest)
+        if not os.path.isfile(path):
+            blob_dir = os.path.dirname(path)
+            os.makedirs(blob_dir, exist_ok=True)
+            # written aside and renamed, so a blob is never seen half written
+            fd, partial_path = tempfile.mkstemp(dir=blob_dir)
+            with os.fdopen(fd, "wb") as f:
+                f.write(contents)
+            os.chmod(partial_path, 0o644)
+            os.replace(partial_path, path)
+        return digest
+
+    def link(self, digest, os_filename):
+        """Makes ``os_filename`` a hard link to the blob, or a copy of it across file systems"""
+        path = self.path(digest)
+        if os.path.lexists(os_filename):
+            os.remove(os_filename)
+        try:
+            os.link(path, os_filename)
+        except OSError:
+            shutil.copyfile(path, os_filename)
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -9,14 +9,19 @@ artifactor:
         filedump:
             enabled: True
             plugin: filedump
+
+Contents stored in the :py:class:`artifactor.blobs.BlobStore` are passed as their ``blob``
+digest instead of ``contents`` and linked into the artifact directory.
 """
 import base64
 import os
 import re
 
 from artifactor import ArtifactorBasePlugin
+from artifactor.blobs import BlobStore
 from cfme.utils import normalize_text
 from cfme.utils import safe_string
+from cfme.utils.conf import env
 
 
 class Filedump(ArtifactorBasePlugin):
@@ -25,8 +30,10 @@ class Filedump(ArtifactorBasePlugin):
         self.register_plugin_hook("sanitize", self.sanitize)
         self.register_plugin_hook("pre_start_test", self.start_test)
         self.register_plugin_hook("finish_test", self.finish_test)
+        self.register_plugin_hook("finish_session", self.finish_session)
 
     def configure(self):
+        self.blobs = BlobStore.from_config(env.get("artifactor", {}))
         self.configured = True
 
     def start_test(self, artifact_path, test_name, test_location, slaveid):
@@ -42,11 +49,16 @@ class Filedump(ArtifactorBasePlugin):
         if not slaveid:
             slaveid = "Master"
 
+    @ArtifactorBasePlugin.check_configured
+    def finish_session(self):
+        # the artifacts are links or copies of the blobs, they stay when the store goes
+        self.blobs.clear()
+
     @ArtifactorBasePlugin.check_configured
     def filedump(
         self,
         description,
-        contents,
+        contents=None,
         slaveid=None,
         mode="w",
         contents_base64=False,
@@ -58,6 +70,7 @@ class Filedump(ArtifactorBasePlugin):
         group_id=None,
         test_name=None,
         test_location=None,
+        blob=None,
     ):
         if not slaveid:
             slaveid = "Master"
@@ -96,7 +109,9 @@ class Filedump(ArtifactorBasePlugin):
                 "group_id": group_id,
             }
         )
-        if not dont_write:
+        if not dont_write and blob is not None:
+            self.blobs.link(blob, os_filename)
+        elif not dont_write:
             if os.path.isfile(os_filename):
                 os.remove(os_filename)
             if contents_base64:
@@ -129,6 +144,8 @@ class Filedump(ArtifactorBasePlugin):
                     if not isinstance(word, str):
                         word = str(word)
                     data = data.replace(word, "*" * len(word))
+                # a new file, not to write through a link to a blob
+                os.remove(filename)
                 with open(filename, "w") as f:
                     f.write(data)
         except KeyError:
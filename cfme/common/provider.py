@@ -3,6 +3,7 @@ from collections import defaultdict
 from collections.abc import Iterable
 
 import attr
+from cached_property import cached_property
 from manageiq_client.api import APIException
 from varmeth import variable
 from widgetastic.widget import Text
@@ -18,6 +19,7 @@ from cfme.base.credential import TokenCredential
 from cfme.common import CustomButtonEventsMixin
 from cfme.common import Taggable
 from cfme.common.datastore_views import ProviderAllDatastoresView
+from cfme.common.provider_refresh import RefreshCoordinator
 from cfme.exceptions import AddProviderError
 from cfme.exceptions import HostStatsNotContains
 from cfme.exceptions import ProviderHasNoKey
@@ -816,6 +818,11 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity, CustomButtonEv
         view.toolbar.configuration.item_select(self.refresh_text, handle_alert=True)
         self.wait_for_relationship_refresh(wait, delay, refresh_delta)
 
+    @cached_property
+    def refresh_coordinator(self):
+        """:py:class:`RefreshCoordinator` merging the refreshes asked for while waiting"""
+        return RefreshCoordinator(self)
+
     def wait_for_relationship_refresh(self, wait=600, delay=1, refresh_delta=10):
         logger.info('Waiting for relationship refresh')
         if wait:
@@ -0,0 +1,118 @@
+"""
+coalesced refreshes of a provider
+
+Waiting for many VMs to appear used to refresh the whole provider for every VM in every poll,
+queueing dozens of redundant full refreshes on the appliance. :py:class:`RefreshCoordinator`
+collects the refresh requests arriving within a window and sends them as one request: a single
+full refresh of the provider, or one targeted refresh of all the VMs the appliance already knows.
+A full refresh is not asked for again while the previous one is in flight, the waiters share it.
+The effect shows in the ``EmsRefresh.refresh`` messages of the ``miq_queue`` table, see
+:py:meth:`RefreshCoordinator.queued_refreshes`.
+"""
+from threading import Lock
+from threading import Timer
+from time import monotonic
+
+from cfme.utils.log import logger
+
+
+class RefreshCoordinator:
+    """
+    refreshes of a provider, see :py:attr:`BaseProvider.refresh_coordinator
+    <cfme.common.provider.BaseProvider.refresh_coordinator>`
+
+    Args:
+        provider: the provider refreshed
+        window: seconds the requests are collected for, ``0`` sends them right away
+        in_flight_timeout: seconds a full refresh is considered in flight at most
+    """
+
+    def __init__(self, provider, window=5, in_flight_timeout=600):
+        self.provider = provider
+        self.window = window
+        self.in_flight_timeout = in_flight_timeout
+        self.requests = 0
+        self.sent = 0
+        self._lock = Lock()
+        self._full = False
+        self._vm_ids = set()
+        self._timer = None
+        self._full_started = None
+        self._full_refresh_date = None
+
+    def refresh(self):
+        """Requests a full refresh of the provider"""
+        with self._lock:
+            self.requests += 1
+            self._full = True
+        self._schedule()
+
+    def refresh_vms(self, vm_ids):
+        """Requests a targeted refresh of the VMs of the appliance database ids"""
+        with self._lock:
+            self.requests += 1
+            self._vm_ids.update(vm_ids)
+        self._schedule()
+
+    def _schedule(self):
+        if not self.window:
+            self.flush()
+            return
+        with self._lock:
+            if self._timer is None:
+                self._timer = Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def full_in_flight(self):
+        """Whether the last full refresh did not finish yet"""
+        if self._full_started is None:
+            return False
+        if monotonic() - self._full_started > self.in_flight_timeout:
+            return False
+        return self.provider.last_refresh_date() == self._full_refresh_date
+
+    def flush(self):
+        """Sends the requests collected"""
+        with self._lock:
+            full, self._full = self._full, False
+            vm_ids, self._vm_ids = self._vm_ids, set()
+            self._timer = None
+        try:
+            if full:
+                # the full refresh covers the VMs too
+                self._send_full()
+            elif vm_ids:
+                self._send_vms(vm_ids)
+        except Exception:
+            logger.exception('Could not refresh provider %s', self.provider.name)
+        logger.info('Provider %s refresh requests: %d, refreshes sent: %d',
+                    self.provider.name, self.requests, self.sent)
+
+    def _send_full(self):
+        if self.full_in_flight():
+            logger.info('Provider %s refresh already in flight', self.provider.name)
+            return
+        self._full_refresh_date = self.provider.last_refresh_date()
+        self._full_started = monotonic()
+        self.provider.refresh_provider_relationships()
+        self.sent += 1
+
+    def _send_vms(self, vm_ids):
+        try:
+            self.provider.appliance.rest_api.collections.vms.action.refresh(
+                *[{'id': vm_id} for vm_id in sorted(vm_ids)])
+        except Exception:
+            logger.exception('Could not refresh the VMs %s via REST, refreshing provider %s',
+                             sorted(vm_ids), self.provider.name)
+            self._send_full()
+        else:
+            self.sent += 1
+
+    def queued_refreshes(self):
+        """Returns the number of refresh messages in the appliance queue"""
+        client = self.provider.appliance.db.client
+        queue = client['miq_queue']
+        return client.session.query(queue)\
+            .filter(queue.class_name == 'EmsRefresh', queue.method_name == 'refresh')\
+            .count()
@@ -34,6 +34,7 @@ from cfme.utils import ParamClassName
 from cfme.utils.appliance.implementations.ui import CFMENavigateStep
 from cfme.utils.appliance.implementations.ui import navigate_to
 from cfme.utils.appliance.implementations.ui import navigator
+from cfme.utils.appliance.vm_state import vm_state
 from cfme.utils.blockers import BZ
 from cfme.utils.conf import cfme_data
 from cfme.utils.log import logger
@@ -508,16 +509,31 @@ class BaseVM(
             task.wait_for_finished()
             return task
 
+    def _provider_rows(self, rows):
+        provider_id = self.provider.id
+        return [row for row in rows if row.ems_id == provider_id]
+
+    def _refresh_rows(self, rows, from_any_provider=False):
+        """Refreshes the VMs of the rows, or the provider while the appliance knows none
+
+        Only the rows of this VM's provider are refreshed, unless ``from_any_provider``.
+        """
+        if not from_any_provider:
+            rows = self._provider_rows(rows)
+        if rows:
+            self.provider.refresh_coordinator.refresh_vms([row.id for row in rows])
+        else:
+            self.provider.refresh_coordinator.refresh()
+
     def wait_to_disappear(self, timeout=600):
         """Wait for a VM to disappear within CFME
 
         Args:
             timeout: time (in seconds) to wait for it to appear
         """
-        wait_for(
-            lambda: self.exists,
-            num_sec=timeout, delay=5, fail_func=self.browser.refresh, fail_condition=True,
-            message="wait for vm to not exist")
+        self.appliance.vm_state_watcher.wait(
+            self.name, lambda rows: not self._provider_rows(rows), timeout=timeout,
+            refresh=self._refresh_rows, message=f'{self.VM_TYPE} {self.name} to not exist')
 
     wait_for_delete = wait_to_disappear  # An alias for more fitting verbosity
 
@@ -528,14 +544,10 @@ class BaseVM(
             timeout: time (in seconds) to wait for it to appear
             load_details: when found, should it load the vm details
         """
-        def _refresh():
-            self.appliance.browser.widgetastic.browser.refresh()  # strange because ViaUI
-            self.provider.refresh_provider_relationships(wait=600)
-
-        wait_for(
-            lambda: self.exists,
-            num_sec=timeout, delay=5, fail_func=_refresh,
-            message="wait for vm to appear")
+        self.appliance.vm_state_watcher.wait(
+            self.name, self._provider_rows, timeout=timeout,
+            refresh=lambda rows: self.provider.refresh_coordinator.refresh(),
+            message=f'{self.VM_TYPE} {self.name} to appear')
         if load_details:
             navigate_to(self, "Details", use_resetter=False)
 
@@ -908,39 +920,35 @@ class VM(BaseVM, RetirementMixin):
 
     def wait_for_vm_state_change(self, desired_state=None, timeout=300, from_details=False,
                                  with_relationship_refresh=True, from_any_provider=False):
-        """Wait for VM to come to desired state in the UI.
+        """Wait for VM to come to desired state in CFME.
 
-        This function waits just the needed amount of time thanks to wait_for.
+        The state is read from the appliance database as soon as it changes, see
+        :py:class:`cfme.utils.appliance.vm_state.VMStateWatcher`, and the VM is refreshed only
+        after a backoff.
 
         Args:
             desired_state: on, off, suspended... for available states, see
                            :py:class:`EC2Instance` and :py:class:`OpenStackInstance`
             timeout: Specify amount of time (in seconds) to wait
+            from_details: kept for compatibility, the state is the same on the details page
+            with_relationship_refresh: whether to refresh the VM while waiting
             from_any_provider: Archived/Orphaned vms need this
         Raises:
             TimedOutError:
                 When instance does not come up to desired state in specified period of time.
-            ItemNotFound:
-                When unable to find the instance passed
         """
-
-        def _looking_for_state_change():
-            if from_details:
-                view = navigate_to(self, "Details", use_resetter=False)
-                view.toolbar.reload.click()
-                current_state = view.entities.summary("Power Management").get_text_of("Power State")
-                return current_state == desired_state
-            else:
-                return self.find_quadicon(
-                    from_any_provider=from_any_provider).data['state'] == desired_state
-
-        return wait_for(
-            _looking_for_state_change,
-            num_sec=timeout,
-            delay=30,
-            fail_func=lambda: self.refresh_relationships(from_details=from_details,
-                                                         from_any_provider=from_any_provider) if
-            with_relationship_refresh else None)
+        def _in_desired_state(rows):
+            if not from_any_provider:
+                rows = self._provider_rows(rows)
+            return any(vm_state(row) == desired_state for row in rows)
+
+        def _refresh(rows):
+            self._refresh_rows(rows, from_any_provider=from_any_provider)
+
+        return self.appliance.vm_state_watcher.wait(
+            self.name, _in_desired_state, timeout=timeout,
+            refresh=_refresh if with_relationship_refresh else None,
+            message=f'{self.VM_TYPE} {self.name} to be {desired_state}')
 
     def is_pwr_option_available_in_cfme(self, option, from_details=False):
         """Checks to see if a power option is available on the VM
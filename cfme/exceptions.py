@@ -265,6 +265,10 @@ class RestLookupError(CFMEException):
     """raised when lookup of a rest entity fails"""
 
 
+class ReportRunError(CFMEException):
+    """raised when the task generating a report ends with an error"""
+
+
 class SSHExpectTimeoutError(CFMEException):
     """ Raised when SSHExpect Timeouts when waiting for some input. """
     pass
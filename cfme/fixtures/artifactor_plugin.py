@@ -9,6 +9,7 @@
         server_address: 127.0.0.1
         server_port: 21212
         server_enabled: True
+        blob_dir: /home/test/workspace/cfme_tests/log/artifact_blobs
         plugins:
 
 ``log_dir`` is the destination for all artifacts
@@ -18,9 +19,13 @@
 ``reuse_dir`` if this is False and Artifactor comes across a dir that has
 already been used, it will die
 
+``blob_dir`` is where large ``filedump`` contents are stored for the server to link them, see
+:py:mod:`artifactor.blobs`
+
 
 """
 import atexit
+import base64
 import os
 import subprocess
 from threading import RLock
@@ -29,6 +34,8 @@ import diaper
 import pytest
 
 from artifactor import ArtifactorClient
+from artifactor.blobs import BLOB_THRESHOLD
+from artifactor.blobs import BlobStore
 from cfme.fixtures.pytest_store import store
 from cfme.fixtures.pytest_store import write_line
 from cfme.markers.polarion import extract_polarion_ids
@@ -123,9 +130,8 @@ def pytest_addoption(parser):
 def pytest_configure(config):
     if config.getoption('--help'):
         return
-    art_client = get_client(
-        art_config=env.get('artifactor', {}),
-        pytest_config=config)
+    art_config = env.get('artifactor', {})
+    art_client = get_client(art_config=art_config, pytest_config=config)
 
     # just in case
     if not store.slave_manager:
@@ -140,8 +146,10 @@ def pytest_configure(config):
             func_kwargs={'force': True},
             num_sec=10, message="wait for artifactor to start")
         art_client.ready = True
+        config._art_blobs = BlobStore.from_config(art_config)
     else:
         config._art_proc = None
+        config._art_blobs = None
     from cfme.utils.log import artifactor_handler
     artifactor_handler.artifactor = art_client
     if store.slave_manager:
@@ -154,9 +162,30 @@ def fire_art_hook(config, hook, **hook_args):
     if client is None:
         assert UNDER_TEST, 'missing artifactor is only valid for inprocess tests'
     else:
+        blobs = getattr(config, '_art_blobs', None)
+        if hook == 'filedump' and blobs is not None:
+            hook_args = filedump_blob_args(blobs, hook_args)
         return client.fire_hook(hook, **hook_args)
 
 
+def filedump_blob_args(blobs, hook_args):
+    """Stores large filedump contents in the blob store and returns the hook args referencing
+    the blob instead of carrying the contents"""
+    contents = hook_args.get('contents')
+    if not contents or hook_args.get('dont_write'):
+        return hook_args
+    if hook_args.get('contents_base64'):
+        contents = base64.b64decode(contents)
+    if len(contents) < BLOB_THRESHOLD:
+        return hook_args
+    try:
+        digest = blobs.put(contents)
+    except OSError:
+        logger.exception('Failed to store the artifact %s', hook_args.get('description'))
+        return hook_args
+    return dict(hook_args, contents=None, contents_base64=False, blob=digest)
+
+
 def fire_art_test_hook(node, hook, **hook_args):
     name, location = get_test_idents(node)
     return fire_art_hook(
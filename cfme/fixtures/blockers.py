@@ -12,8 +12,10 @@ All of them are converted to the :py:class:`utils.blockers.Blocker` instances
 import pytest
 
 from cfme.fixtures.pytest_store import store
+from cfme.utils import conf
 from cfme.utils.blockers import Blocker
 from cfme.utils.blockers import BZ
+from cfme.utils.blockers import bugzilla_ids
 from cfme.utils.blockers import GH
 
 
@@ -62,25 +64,34 @@ def pytest_addoption(parser):
                     default=False,
                     dest='list_blockers',
                     help='Specify to list the blockers (takes some time though).')
+    group.addoption('--no-blocker-prefetch',
+                    action='store_false',
+                    default=True,
+                    dest='blocker_prefetch',
+                    help='Do not fetch the Bugzilla blockers of all tests after collection.')
 
 
 @pytest.hookimpl(trylast=True)
 def pytest_collection_modifyitems(session, config, items):
-    if not config.getvalue("list_blockers"):
+    list_blockers = config.getvalue("list_blockers")
+    item_blockers = [item._metadata.get("blockers", []) for item in items]
+    if list_blockers or (config.getvalue("blocker_prefetch") and "bugzilla" in conf.env):
+        # Fetch all the bugs and their variants in batches, the blockers of the tests are then
+        # resolved without further requests, also in the slaves which share the bug cache
+        BZ.prefetch(bugzilla_ids(blocker for blockers in item_blockers for blocker in blockers))
+    if not list_blockers:
         return
     store.terminalreporter.write("Loading blockers ...\n", bold=True)
-    blocking = set()
-    for item in items:
-        if "blockers" not in item._metadata:
-            continue
-        for blocker in item._metadata["blockers"]:
-            if isinstance(blocker, int):
-                # TODO: DRY
-                blocker_object = Blocker.parse(f"BZ#{blocker}")
-            else:
-                blocker_object = Blocker.parse(blocker)
-            if blocker_object.blocks:
-                blocking.add(blocker_object)
+    # Each distinct blocker specification is parsed and evaluated only once
+    blocker_objects = {}
+    for blockers in item_blockers:
+        for blocker in blockers:
+            if blocker not in blocker_objects:
+                if isinstance(blocker, int):
+                    blocker_objects[blocker] = Blocker.parse(f"BZ#{blocker}")
+                else:
+                    blocker_objects[blocker] = Blocker.parse(blocker)
+    blocking = {blocker for blocker in blocker_objects.values() if blocker.blocks}
     if blocking:
         store.terminalreporter.write("Known blockers:\n", bold=True)
         for blocker in blocking:
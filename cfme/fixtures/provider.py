@@ -54,6 +54,7 @@ from cfme.utils.appliance import ApplianceException
 from cfme.utils.log import logger
 from cfme.utils.providers import list_providers
 from cfme.utils.providers import ProviderFilter
+from cfme.utils.providers import ProviderSnapshots
 
 # List of problematic providers that will be ignored
 _problematic_providers = set()
@@ -76,6 +77,12 @@ def pytest_addoption(parser):
             "Use 1 or 2 when running on a single appliance, depending on HW configuration."
         )
     )
+    parser.addoption("--provider-snapshots", action="store_true", default=False,
+        help=(
+            "Restore database snapshots of already refreshed providers instead of setting them "
+            "up again. Resets the whole database, only used with --provider-limit 1."
+        )
+    )
 
 
 def _artifactor_skip_providers(request, providers, skip_msg):
@@ -109,6 +116,18 @@ def _setup_provider_verbose(request, provider, appliance=None):
         # the `provider` must be first changed to that specific appliance.
         provider.appliance = appliance
     try:
+        snapshots = None
+        if request.config.option.provider_snapshots and request.config.option.provider_limit == 1:
+            snapshots = ProviderSnapshots(appliance)
+        if snapshots and not provider.exists and snapshots.exists(provider):
+            store.terminalreporter.write_line(
+                f"Restoring provider snapshot of {provider.key}\n", green=True)
+            # The restored database has no other providers
+            if snapshots.restore(provider):
+                return True
+            if provider.exists:
+                provider.delete_rest()
+                provider.wait_for_delete()
         if request.config.option.provider_limit > 0:
             existing_providers = [
                 p for p in appliance.managed_known_providers if p.key != provider.key]
@@ -128,7 +147,12 @@ def _setup_provider_verbose(request, provider, appliance=None):
         store.terminalreporter.write_line(
             f"Trying to set up provider {provider.key}\n", green=True)
         enable_provider_regions(provider)
-        provider.setup()
+        if provider.setup() and snapshots and [
+                p.key for p in appliance.managed_known_providers] == [provider.key]:
+            try:
+                snapshots.capture(provider)
+            except Exception:
+                logger.exception('Capturing the provider snapshot of %s failed', provider.key)
         return True
     except Exception as e:
         logger.exception(e)
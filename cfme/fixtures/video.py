@@ -8,21 +8,40 @@ Yaml example:
                enabled: True
                dir: video
                display: ":99"
-               quality: 10
+               segment_seconds: 10
+               keep_minutes: 30
+
+The display is recorded for the whole run by one :py:class:`cfme.utils.video.SegmentRecorder`,
+started by the main pytest process, into the ``segments`` directory of the video ``dir``. When a
+test fails, the segments recorded while it ran are saved as its video, the tests that pass leave
+no video. The CPU time and disk space spent by the recording are reported at the end of the run.
 """
-import os.path
 import re
+import time
 
 import pytest
 
+from cfme.fixtures.pytest_store import store
+from cfme.fixtures.pytest_store import write_line
 from cfme.utils.conf import env
+from cfme.utils.log import logger
 from cfme.utils.path import log_path
-from cfme.utils.video import Recorder
+from cfme.utils.video import save_segments
+from cfme.utils.video import SegmentRecorder
 
 vid_options = env.get('logging', {}).get('video')
 recorder = None
 
 
+def video_enabled():
+    return bool(vid_options and vid_options['enabled'])
+
+
+def segment_dir():
+    display = re.sub(r"[^a-zA-Z0-9]", "_", str(vid_options['display']))
+    return log_path.join(vid_options['dir'], f'segments{display}')
+
+
 def get_path_and_file_name(node):
     """Extract filename and location from the node.
 
@@ -36,36 +55,63 @@ def get_path_and_file_name(node):
     return node.parent.name, vid_name
 
 
+@pytest.hookimpl(trylast=True)
+def pytest_configure(config):
+    global recorder
+    # the slaves save their videos from the segments recorded by the main process
+    if video_enabled() and not store.slave_manager and not config.getoption('--help'):
+        recorder = SegmentRecorder(
+            segment_dir().strpath,
+            display=vid_options['display'],
+            segment_seconds=vid_options.get('segment_seconds', 10),
+            keep_seconds=vid_options.get('keep_minutes', 30) * 60)
+        if not recorder.start():
+            logger.warning("Couldn't start the video recording! Is ffmpeg installed?")
+            recorder = None
+
+
 @pytest.hookimpl(hookwrapper=True)
 def pytest_runtest_setup(item):
-    global recorder
-    if vid_options and vid_options['enabled']:
-        vid_log_path = log_path.join(vid_options['dir'])
-        vid_dir, vid_name = get_path_and_file_name(item)
-        full_vid_path = vid_log_path.join(vid_dir)
-        try:
-            os.makedirs(full_vid_path.strpath)
-        except OSError:
-            pass
-        vid_name = vid_name + ".ogv"
-        recorder = Recorder(full_vid_path.join(vid_name).strpath)
-        recorder.start()
+    if video_enabled():
+        item._video_start = time.time()
+        item._video_failed = False
     yield
 
 
+def save_video(item):
+    vid_dir, vid_name = get_path_and_file_name(item)
+    full_vid_path = log_path.join(vid_options['dir'], vid_dir)
+    full_vid_path.ensure(dir=True)
+    video = full_vid_path.join(f'{vid_name}.ts')
+    if save_segments(segment_dir().strpath, item._video_start, time.time(), video.strpath):
+        logger.info('Saved the video of the failed test as %s', video.strpath)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    if not hasattr(item, '_video_start'):
+        return
+    report = outcome.get_result()
+    if report.failed:
+        item._video_failed = True
+    if report.when == 'teardown' and item._video_failed:
+        save_video(item)
+
+
 def stop_recording():
     global recorder
     if recorder is not None:
         try:
-            recorder.stop()
+            cpu_seconds, segment_bytes = recorder.stop()
         finally:
             recorder = None
-
-
-@pytest.hookimpl(hookwrapper=True)
-def pytest_runtest_teardown(item, nextitem):
-    yield
-    stop_recording()
+        video_bytes = sum(
+            f.size() for f in log_path.join(vid_options['dir']).visit(fil='*.ts'))
+        message = 'video recording used {:.0f}s of CPU, {:.1f}MB of segments, {:.1f}MB of ' \
+            'videos kept'.format(cpu_seconds, segment_bytes / 2**20, video_bytes / 2**20)
+        logger.info(message)
+        write_line(message)
 
 
 @pytest.hookimpl(hookwrapper=True)
@@ -3,6 +3,7 @@ import attr
 from cached_property import cached_property
 from navmazing import NavigateToAttribute
 from navmazing import NavigateToSibling
+from varmeth import variable
 from widgetastic.exceptions import NoSuchElementException
 from widgetastic.utils import attributize_string
 from widgetastic.widget import Checkbox
@@ -20,6 +21,8 @@ from widgetastic_patternfly import SelectorDropdown
 from cfme.exceptions import RestLookupError
 from cfme.intelligence.reports import CloudIntelReportsView
 from cfme.intelligence.reports import ReportsMultiBoxSelect
+from cfme.intelligence.reports.runs import latest_result_id
+from cfme.intelligence.reports.runs import ReportRun
 from cfme.intelligence.reports.schedules import SchedulesFormCommon
 from cfme.intelligence.timelines import CloudIntelTimelinesView
 from cfme.modeling.base import BaseCollection
@@ -32,7 +35,6 @@ from cfme.utils.log import logger
 from cfme.utils.pretty import Pretty
 from cfme.utils.timeutil import parsetime
 from cfme.utils.update import Updateable
-from cfme.utils.wait import wait_for
 from widgetastic_manageiq import InputButton
 from widgetastic_manageiq import PaginationPane
 from widgetastic_manageiq import ReportToolBarViewSelector
@@ -224,7 +226,7 @@ class ReportTimelineView(CloudIntelTimelinesView):
 
 class SavedReportDetailsView(CloudIntelReportsView):
     title = Text("#explorer_title_text")
-    table = VanillaTable(".//div[@id='report_html_div']/table")
+    table = Table(".//div[@id='report_html_div']/table")
     # PaginationPane() is not working on Report Details page
     # TODO: double check and raise GH to devs
     paginator = PaginationPane()
@@ -452,29 +454,19 @@ class Report(BaseEntity, Updateable):
         assert schedule.exists
         return schedule
 
+    @variable(alias='ui')
     def queue(self, wait_for_finish=False):
+        if wait_for_finish:
+            report_id = self.rest_api_entity.id
+            last_result_id = latest_result_id(self.appliance, report_id)
         view = navigate_to(self, "Details")
         view.report_info.queue_button.click()
         view.flash.assert_no_error()
         if wait_for_finish:
-            # Get the queued_at value to always target the correct row
+            # the database tells when the report is generated, the UI is read once afterwards
+            ReportRun.after(self.appliance, report_id, last_result_id).wait()
             if view.saved_reports.paginator.sorted_by['sortDir'] != "DESC":
                 view.saved_reports.paginator.sort(sort_by="Queued At", ascending=False)
-            queued_at = view.saved_reports.table[0]["Queued At"].text
-
-            def _get_state():
-                row = view.saved_reports.table.row(queued_at=queued_at)
-                status = row.status.text.strip().lower()
-                assert status != "error"
-                return status == "complete"
-
-            wait_for(
-                _get_state,
-                delay=1,
-                message="wait for report generation finished",
-                fail_func=view.reload_button.click,
-                num_sec=300,
-            )
             view.reload_button.click()
         first_row = view.saved_reports.table[0]
         saved_report = self.saved_reports.instantiate(
@@ -484,6 +476,21 @@ class Report(BaseEntity, Updateable):
         )
         return saved_report
 
+    @queue.variant('rest')
+    def queue_rest(self, wait_for_finish=True, timeout=300):
+        """Queues the report via REST and waits for it, ``wait_for_finish`` is ignored
+
+        Returns:
+            :py:class:`SavedReport` with its :py:attr:`SavedReport.data` already read, with the
+            times in UTC and the values of the result set, unformatted
+        """
+        entity = self.rest_api_entity
+        run = ReportRun.queue(self.appliance, entity)
+        queued_at, run_at = run.wait(timeout=timeout)
+        saved_report = self.saved_reports.instantiate(run_at, queued_at, self.is_candu)
+        saved_report.data = SavedReportData(*run.read(entity))
+        return saved_report
+
     @property
     def tree_path(self):
         return [
@@ -608,18 +615,7 @@ class SavedReport(Updateable, BaseEntity):
             return SavedReportData([], [])
         view.paginator.set_items_per_page(1000)
         try:
-            headers = tuple([hdr for hdr in view.table.headers])
-            body = []
-            for _ in range(view.paginator.pages_amount):
-                for row in view.table.rows():
-                    if not all([c[1].is_displayed for c in row]):
-                        # This is a temporary workaround for cases we have row span
-                        # greater that 1 column (e.g. in case of "Totals: ddd" column).
-                        # TODO: Support this functionality in widgetastic. Issue:
-                        # https://github.com/RedHatQE/widgetastic.core/issues/26
-                        continue
-                    row_data = tuple([row[header].text for header in headers])
-                    body.append(row_data)
+            headers, body = view.table.read_pages(view.paginator)
         except NoSuchElementException:
             # No data found
             return SavedReportData([], [])
@@ -671,26 +667,16 @@ class SavedReportsCollection(BaseCollection):
 
     def all(self):
         view = navigate_to(self.parent, "Details")
-        results = []
+        saved_reports = view.saved_reports
         try:
-            for _ in view.saved_reports.paginator.pages():
-                for row in view.saved_reports.table.rows():
-                    if not all([c[1].is_displayed for c in row]):
-                        # This is a temporary workaround for cases we have row span
-                        # greater that 1 column (e.g. in case of "Totals: ddd" column).
-                        # TODO: Support this functionality in widgetastic. Issue:
-                        # https://github.com/RedHatQE/widgetastic.core/issues/26
-                        continue
-                    results.append(
-                        self.instantiate(
-                            row.run_at.text,
-                            row.queued_at.text,
-                            self.parent.is_candu
-                        )
-                    )
+            headers, body = saved_reports.table.read_pages(saved_reports.paginator)
         except NoSuchElementException:
-            pass
-        return results
+            return []
+        columns = [attributize_string(header or "") for header in headers]
+        return [
+            self.instantiate(row["run_at"], row["queued_at"], self.parent.is_candu)
+            for row in (dict(zip(columns, values)) for values in body)
+        ]
 
 
 class SavedReportData(Pretty):
@@ -0,0 +1,115 @@
+"""
+runs of a report tracked in the appliance database
+
+Waiting for a queued report used to click the reload button of the saved reports table and read
+the status of the row every second, for up to 5 minutes, keeping the browser busy. A
+:py:class:`ReportRun` reads the state of the task generating the report result in one query of
+the appliance database, backing off up to ``max_delay`` seconds between the queries, and reads
+the rows of the finished result via REST in one request.
+"""
+from time import monotonic
+from time import sleep
+
+from cfme.exceptions import ReportRunError
+from cfme.utils.log import logger
+from cfme.utils.wait import TimedOutError
+
+#: Format of the run and queue times of the saved reports
+TIME_FORMAT = "%m/%d/%y %H:%M:%S UTC"
+
+
+def latest_result_id(appliance, report_id):
+    """Returns the id of the latest result of the report, ``0`` if there is none"""
+    client = appliance.db.client
+    results = client['miq_report_results']
+    latest = client.session.query(results.id)\
+        .filter(results.miq_report_id == report_id)\
+        .order_by(results.id.desc())\
+        .first()
+    return latest[0] if latest else 0
+
+
+class ReportRun:
+    """
+    a result of a report being generated, see :py:meth:`Report.queue
+    <cfme.intelligence.reports.reports.Report.queue>`
+
+    Args:
+        appliance: the appliance generating the report
+        result_id: id of the report result
+        delay: seconds between the first queries while waiting
+        max_delay: longest time between two queries while waiting
+    """
+
+    def __init__(self, appliance, result_id, delay=1, max_delay=10):
+        self.appliance = appliance
+        self.result_id = result_id
+        self.delay = delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def queue(cls, appliance, report_entity, **kwargs):
+        """Queues the report of the REST entity via its ``run`` action and returns its run"""
+        response = report_entity.action.run()
+        return cls(appliance, response.result_id, **kwargs)
+
+    @classmethod
+    def after(cls, appliance, report_id, last_result_id, timeout=60, **kwargs):
+        """Returns the run of the first result of the report newer than ``last_result_id``"""
+        start = monotonic()
+        while True:
+            result_id = latest_result_id(appliance, report_id)
+            if result_id > last_result_id:
+                return cls(appliance, result_id, **kwargs)
+            if monotonic() - start > timeout:
+                raise TimedOutError(f'Report {report_id} was not queued in {timeout} seconds')
+            sleep(1)
+
+    def state(self):
+        """Returns the result times and the task state of the result, in one query"""
+        client = self.appliance.db.client
+        results = client['miq_report_results']
+        tasks = client['miq_tasks']
+        return client.session\
+            .query(results.created_on, results.last_run_on,
+                   tasks.state, tasks.status, tasks.message)\
+            .outerjoin(tasks, tasks.id == results.miq_task_id)\
+            .filter(results.id == self.result_id)\
+            .one()
+
+    def wait(self, timeout=300):
+        """Waits until the report is generated
+
+        Returns:
+            ``(queued_at, run_at)`` strings of the result, as the saved reports show them in UTC
+        Raises:
+            :py:class:`ReportRunError` if the task generating the report failed
+        """
+        start = monotonic()
+        delay = self.delay
+        while True:
+            created_on, last_run_on, state, status, message = self.state()
+            if status is not None and status.lower() == 'error':
+                raise ReportRunError(f'Report result {self.result_id} failed: {message}')
+            # the task may be gone already, the result has its run time then
+            if (state or '').lower() == 'finished' or (state is None and last_run_on):
+                logger.info('Report result %s generated after %.1fs',
+                            self.result_id, monotonic() - start)
+                return created_on.strftime(TIME_FORMAT), last_run_on.strftime(TIME_FORMAT)
+            if monotonic() - start + delay > timeout:
+                raise TimedOutError(
+                    f'Report result {self.result_id} was not generated in {timeout} seconds')
+            sleep(delay)
+            delay = min(2 * delay, self.max_delay)
+
+    def read(self, report_entity):
+        """Returns the ``(headers, body)`` of the generated report, read in one REST request
+
+        The values are those of the result set, not formatted the way the UI shows them.
+        """
+        result = self.appliance.rest_api.collections.results.get(id=self.result_id)
+        columns = report_entity.col_order
+        body = [
+            tuple('' if row.get(column) is None else str(row.get(column)) for column in columns)
+            for row in result.result_set]
+        return list(report_entity.headers), body
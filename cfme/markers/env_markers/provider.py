@@ -1,5 +1,6 @@
 from collections import defaultdict
 from distutils.version import LooseVersion
+from functools import lru_cache
 
 import attr
 import pytest
@@ -9,7 +10,7 @@ from cfme.markers.env import EnvironmentMarker
 from cfme.utils import conf
 from cfme.utils.log import logger
 from cfme.utils.providers import all_types
-from cfme.utils.providers import list_providers
+from cfme.utils.providers import get_provider_catalogue
 from cfme.utils.providers import ProviderFilter
 from cfme.utils.pytest_shortcuts import fixture_filter
 from cfme.utils.version import Version
@@ -191,17 +192,10 @@ class DataProvider:
         return f'{self.type_name}({self.category})[{self.version}]'
 
 
-def all_required(miq_version, filters=None):
-    """Return a list of DataProvider instances representing the providers for which the test should
-    run.
-
-    Args:
-        miq_version: The MIQ/CFME version to query in the supportability yaml
-        filters: :py:class:`list` of provider filters to apply
-    """
+@lru_cache(maxsize=None)
+def stream_data_providers(stream):
+    """Return a tuple of DataProvider instances of all the providers supported in the stream."""
     # Load the supportability YAML and extrace the providers portion
-    filters = filters or []  # default immutable
-    stream = Version(miq_version).series()
     try:
         data_for_stream = conf.supportability[stream]['providers']
     except KeyError:
@@ -231,11 +225,36 @@ def all_required(miq_version, filters=None):
                 for ver in vers
             ])
 
-    nfilters = [DPFilter(classes=pf.classes, inverted=pf.inverted)
-                for pf in filters if isinstance(pf, ProviderFilter)]
-    for prov_filter in nfilters:
+    return tuple(dprovs)
+
+
+@lru_cache(maxsize=None)
+def _filtered_data_providers(stream, dp_filter_signatures):
+    dprovs = list(stream_data_providers(stream))
+    for classes, inverted in dp_filter_signatures:
+        prov_filter = DPFilter(classes=list(classes) if classes is not None else None,
+                               inverted=inverted)
         dprovs = list(filter(prov_filter, dprovs))
-    return dprovs
+    return tuple(dprovs)
+
+
+def all_required(miq_version, filters=None):
+    """Return a list of DataProvider instances representing the providers for which the test should
+    run.
+
+    The supported providers of each stream and the results of each combination of filters are
+    computed only once per session.
+
+    Args:
+        miq_version: The MIQ/CFME version to query in the supportability yaml
+        filters: :py:class:`list` of provider filters to apply
+    """
+    filters = filters or []  # default immutable
+    stream = Version(miq_version).series()
+    dp_filter_signatures = tuple(
+        (tuple(pf.classes) if pf.classes is not None else None, pf.inverted)
+        for pf in filters if isinstance(pf, ProviderFilter))
+    return list(_filtered_data_providers(stream, dp_filter_signatures))
 
 
 def providers(metafunc, filters=None, selector=ONE_PER_VERSION, fixture_name='provider'):
@@ -265,8 +284,9 @@ def providers(metafunc, filters=None, selector=ONE_PER_VERSION, fixture_name='pr
         filters = filters + [flags_filter]
 
     # available_providers are the ones "available" from the yamls after all of the aal and
-    # local filters have been applied. It will be a list of crud objects.
-    available_providers = list_providers(filters)
+    # local filters have been applied. It will be a set of provider keys.
+    catalogue = get_provider_catalogue()
+    available_keys = set(catalogue.keys(filters))
 
     # supported_providers are the ones "supported" in the supportability.yaml file. It will
     # be a list of DataProvider objects and will be filtered based upon what the test has asked for
@@ -278,19 +298,16 @@ def providers(metafunc, filters=None, selector=ONE_PER_VERSION, fixture_name='pr
         """Search through all available providers in yaml for ones that match the criteria in
         data_provider."""
         valid_providers = []
-        for available_provider in available_providers:
-            try:
-                if available_provider.version != data_provider.version:
-                    continue
-            except KeyError:
-                pass
-            if (
-                available_provider.type == data_provider.type_name and
-                available_provider.category == data_provider.category
-            ):
-                data_provider_with_key = DataProvider.get_instance(data_provider.category,
-                    data_provider.type_name, data_provider.version, available_provider.key)
-                valid_providers.append((data_provider_with_key, available_provider))
+        candidates = catalogue.index.get((data_provider.type_name, data_provider.category), [])
+        for key, version in candidates:
+            if key not in available_keys:
+                continue
+            # Providers without a version in the yamls match any version
+            if version is not None and version != data_provider.version:
+                continue
+            data_provider_with_key = DataProvider.get_instance(data_provider.category,
+                data_provider.type_name, data_provider.version, key)
+            valid_providers.append((data_provider_with_key, key))
 
         return valid_providers
 
@@ -365,7 +382,7 @@ def providers(metafunc, filters=None, selector=ONE_PER_VERSION, fixture_name='pr
         allowed_providers = matching_provs
 
     # Iterate through the required providers and try to match them to the available ones
-    for data_prov, real_prov in allowed_providers:
+    for data_prov, prov_key in allowed_providers:
         argvalues.append(pytest.param(data_prov))
 
         # Use the provider key for idlist, helps with readable parametrized test output
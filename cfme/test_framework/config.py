@@ -5,7 +5,8 @@ import os
 import warnings
 
 import attr
-import yaycl
+
+from cfme.test_framework.config_snapshot import create_config
 
 
 class Configuration:
@@ -30,11 +31,11 @@ class Configuration:
 
         assert self.yaycl_config is None
         if crypt_key_file and os.path.exists(crypt_key_file):
-            self.yaycl_config = yaycl.Config(
+            self.yaycl_config = create_config(
                 config_dir=config_dir,
                 crypt_key_file=crypt_key_file)
         else:
-            self.yaycl_config = yaycl.Config(config_dir=config_dir)
+            self.yaycl_config = create_config(config_dir=config_dir)
 
     def get_config(self, name):
         """returns a yaycl config object
@@ -62,7 +63,12 @@ class DeprecatedConfigWrapper:
                 category=DeprecationWarning,
                 stacklevel=2,
             )
-        return self.configuration.get_config(key)
+            return self.configuration.get_config(key)
+        value = self.configuration.get_config(key)
+        # yaycl keeps one dict object per key, even when it is reloaded, so the next access can
+        # skip this lookup
+        self.__dict__[key] = value
+        return value
 
     @property
     def runtime(self):
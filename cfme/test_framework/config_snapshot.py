@@ -0,0 +1,171 @@
+"""
+compiled snapshot of the parsed (and decrypted) yaml configuration files
+
+Every process of a run (the pytest master, each slave, scripts) would otherwise parse and decrypt
+the same large yamls again. :py:class:`SnapshotConfig` keeps what the yaycl loaders returned for
+each file in a pickled snapshot outside of the repository and returns it as long as the
+fingerprints (mtime, size and content hash) of the file, its encrypted variant and the key file
+are the same. Local yamls are snapshotted on their own, so merging them, the runtime overrides
+and inheritance are still applied by yaycl on every load.
+
+The snapshot contains decrypted values, so it is only written to and read from a directory
+private to the user (mode ``0700``, file mode ``0600``).
+
+:envvar:`CFME_CONF_SNAPSHOT_DIR` sets the directory, ``off`` disables the snapshot.
+"""
+import hashlib
+import os
+import pickle
+import stat
+import tempfile
+
+import yaycl
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_DIR_ENV = 'CFME_CONF_SNAPSHOT_DIR'
+
+
+def default_snapshot_dir():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(cache_home, 'cfme', 'conf-snapshots')
+
+
+def file_fingerprint(file_path):
+    """Returns ``(mtime_ns, size, sha256)`` of the file or ``None`` if it does not exist"""
+    try:
+        with open(file_path, 'rb') as f:
+            file_stat = os.fstat(f.fileno())
+            digest = hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+    return file_stat.st_mtime_ns, file_stat.st_size, digest
+
+
+def is_private(path, is_dir=False):
+    """Whether the path is owned by the current user and not accessible by anyone else"""
+    try:
+        path_stat = os.lstat(path)
+    except FileNotFoundError:
+        return False
+    expected_type = stat.S_ISDIR if is_dir else stat.S_ISREG
+    return (
+        expected_type(path_stat.st_mode) and
+        path_stat.st_uid == os.getuid() and
+        not path_stat.st_mode & (stat.S_IRWXG | stat.S_IRWXO))
+
+
+class ConfigSnapshot:
+    """
+    pickled snapshot of the loaded configuration files of one config dir
+
+    :param config_dir: the configuration directory the snapshot belongs to
+    :param snapshot_dir: directory holding the snapshots of all config dirs
+    """
+
+    def __init__(self, config_dir, snapshot_dir):
+        self.snapshot_dir = snapshot_dir
+        dir_hash = hashlib.sha256(os.path.abspath(config_dir).encode('utf-8')).hexdigest()
+        self.path = os.path.join(snapshot_dir, f'{dir_hash[:16]}.pickle')
+        self._entries = None
+
+    @property
+    def entries(self):
+        """``{file_path: (fingerprint, pickled loaded yaml)}``, read once per process"""
+        if self._entries is None:
+            self._entries = self._read()
+        return self._entries
+
+    def _read(self):
+        if not (is_private(self.snapshot_dir, is_dir=True) and is_private(self.path)):
+            return {}
+        try:
+            with open(self.path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except Exception:
+            # Broken or from an incompatible version, it will be rewritten
+            return {}
+        if not isinstance(snapshot, dict) or snapshot.get('format') != SNAPSHOT_FORMAT:
+            return {}
+        return snapshot['entries']
+
+    def get(self, file_path, fingerprint):
+        """Returns a fresh copy of the loaded yaml or ``None`` if it was not snapshotted yet"""
+        try:
+            entry_fingerprint, data = self.entries[file_path]
+        except KeyError:
+            return None
+        if entry_fingerprint != fingerprint:
+            return None
+        return pickle.loads(data)
+
+    def put(self, file_path, fingerprint, loaded_yaml):
+        self.entries[file_path] = (
+            fingerprint, pickle.dumps(loaded_yaml, protocol=pickle.HIGHEST_PROTOCOL))
+        self._write()
+
+    def _write(self):
+        os.makedirs(self.snapshot_dir, mode=0o700, exist_ok=True)
+        if not is_private(self.snapshot_dir, is_dir=True):
+            # Never leave decrypted values in a directory others can read
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.snapshot_dir, suffix='.tmp')  # mode 0600
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(
+                    {'format': SNAPSHOT_FORMAT, 'entries': self._entries}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+            # Atomic, concurrent writers (slaves) at worst drop each other's new entries
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+class SnapshotConfig(yaycl.Config):
+    """
+    :py:class:`yaycl.Config` that loads the yaml files from a :py:class:`ConfigSnapshot`
+
+    :param snapshot: the :py:class:`ConfigSnapshot` to use
+    """
+
+    def __init__(self, config_dir, snapshot, **kwargs):
+        super().__init__(config_dir, **kwargs)
+        self._snapshot = snapshot
+
+    def _fingerprint(self, conf_key):
+        file_path = self.file_path(conf_key)
+        # yaycl_crypt reads e.g. credentials.eyaml in place of credentials.yaml
+        base, extension = os.path.splitext(file_path)
+        encrypted_path = base + (extension.replace('.', '.e', 1) if extension else '.e')
+        key_file = self._yaycl.get('crypt_key_file')
+        return (
+            file_fingerprint(file_path),
+            file_fingerprint(encrypted_path),
+            file_fingerprint(key_file) if key_file else None)
+
+    def _load_yaml(self, conf_key, warn_on_fail=True):
+        fingerprint = self._fingerprint(conf_key)
+        if fingerprint[:2] == (None, None):
+            # Nothing to load, let yaycl warn about it
+            return super()._load_yaml(conf_key, warn_on_fail=warn_on_fail)
+        file_path = self.file_path(conf_key)
+        loaded_yaml = self._snapshot.get(file_path, fingerprint)
+        if loaded_yaml is None:
+            loaded_yaml = super()._load_yaml(conf_key, warn_on_fail=warn_on_fail)
+            try:
+                self._snapshot.put(file_path, fingerprint, loaded_yaml)
+            except Exception:
+                # The snapshot is only an optimization
+                pass
+        return loaded_yaml
+
+
+def create_config(config_dir, **kwargs):
+    """
+    creates the yaycl config, using a snapshot unless disabled by :envvar:`CFME_CONF_SNAPSHOT_DIR`
+    """
+    snapshot_dir = os.environ.get(SNAPSHOT_DIR_ENV) or default_snapshot_dir()
+    if snapshot_dir.lower() == 'off':
+        return yaycl.Config(config_dir=config_dir, **kwargs)
+    return SnapshotConfig(config_dir, ConfigSnapshot(config_dir, snapshot_dir), **kwargs)
@@ -42,7 +42,7 @@ def enable_capacity_and_utilization(appliance):
 
     logger.info("Enabling metrics collection roles")
     appliance.server.settings.enable_server_roles(*args)
-    if appliance.wait_for_server_roles(args, delay=10, timeout=300):
+    if appliance.wait_for_server_roles(args, timeout=300):
         yield
     else:
         pytest.skip(f"Failed to set server roles on appliance {appliance}")
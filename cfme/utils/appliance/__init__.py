@@ -16,7 +16,6 @@ import dateutil.parser
 import fauxfactory
 import pytest
 import pytz
-import requests
 import sentaku
 from cached_property import cached_property
 from debtcollector import removals
@@ -35,12 +34,17 @@ from cfme.utils import conf
 from cfme.utils import ports
 from cfme.utils import ssh
 from cfme.utils.appliance import console
+from cfme.utils.appliance.configure import appliance_context
+from cfme.utils.appliance.configure import ConfigurePlan
 from cfme.utils.appliance.db import ApplianceDB
 from cfme.utils.appliance.implementations.rest import ViaREST
 from cfme.utils.appliance.implementations.ssui import ViaSSUI
 from cfme.utils.appliance.implementations.ui import ViaUI
+from cfme.utils.appliance.readiness import ReadinessProber
+from cfme.utils.appliance.server_roles import ServerRoleTracker
 from cfme.utils.appliance.services import SystemdException
 from cfme.utils.appliance.services import SystemdService
+from cfme.utils.appliance.vm_state import VMStateWatcher
 from cfme.utils.log import create_sublogger
 from cfme.utils.log import logger
 from cfme.utils.log import logger_wrap
@@ -231,6 +235,8 @@ class IPAppliance:
         self.openshift_creds = openshift_creds or {}
         self.is_dev = is_dev
         self._user = None
+        # (change token, listing) of the providers, see _managed_providers
+        self._providers_listing = None
 
         if self.openshift_creds:
             self.is_pod = True
@@ -442,6 +448,12 @@ class IPAppliance:
                                 production.rb. Default productization is ``:notify``
                                 QE default is ``:log``
                                 To hard-fault on rails deprecations, use ``:raise``
+            max_workers: Maximum number of configuration steps running concurrently, ``1`` runs
+                         them in sequence (default ``4``)
+
+        Returns:
+            ``{step name: StepResult}`` with the status and duration of every step, see
+            :py:class:`cfme.utils.appliance.configure.ConfigurePlan`
         """
 
         log_callback(f"Configuring appliance {self.hostname}")
@@ -453,61 +465,120 @@ class IPAppliance:
         on_openstack = kwargs.pop('on_openstack', False)
         rails_deprecations = kwargs.pop('rails_deprecations', ':log')
         ssh_timeout = kwargs.pop('timeout', 600)
-        with self as ipapp:
-            ipapp.wait_for_ssh(timeout=ssh_timeout)
+        max_workers = kwargs.pop('max_workers', 4)
+
+        plan = ConfigurePlan(
+            f'Configure {self.hostname}', max_workers=max_workers,
+            context=appliance_context(self), log_callback=log_callback)
+
+        @plan.step()
+        def ssh():
+            self.wait_for_ssh(timeout=ssh_timeout)
 
+        audit_rule = '-w /etc/sysconfig/network-scripts/ifcfg-eth0 -p wa'
+
+        @plan.step(requires=['ssh'], done=lambda: self.ssh_client.run_command(
+            f"grep -qxF -e '{audit_rule}' /etc/audit/rules.d/audit.rules",
+            ensure_host=True).success)
+        def audit_rules():
             # Debugging - ifcfg-eth0 overwritten by unknown process
             # Rules are permanent and will be reloade after machine reboot
             with self.ssh_client as ssh_client:
                 ssh_client.run_command(
                     "cp -pr /etc/sysconfig/network-scripts/ifcfg-eth0 /var/tmp", ensure_host=True)
                 ssh_client.run_command(
-                    "echo '-w /etc/sysconfig/network-scripts/ifcfg-eth0 -p wa' >> "
-                    "/etc/audit/rules.d/audit.rules", ensure_host=True)
-
-            with self.ssh_client as ssh_client:
+                    f"echo '{audit_rule}' >> /etc/audit/rules.d/audit.rules", ensure_host=True)
                 self.httpd.daemon_reload()
                 # cannot restart through systemctl
                 ssh_client.run_command('service auditd restart', ensure_host=True)
+            self.wait_for_ssh()
 
-            ipapp.wait_for_ssh()
-
+        @plan.step(requires=['ssh'], done=lambda: self.ssh_client.run_command(
+            "grep -qF 'config.active_support.deprecation = {}' "
+            "/var/www/miq/vmdb/config/environments/production.rb"
+            .format(rails_deprecations)).success)
+        def rails_deprecation():
             self.set_rails_deprecation(behavior=rails_deprecations)
 
-            # TODO: Handle external DB setup
-            # This is workaround for appliances to use only one disk for the VMDB
-            # If they have been provisioned with a second disk in the infra,
-            # 'self.unpartitioned_disks' should exist and therefore this won't run.
-            if self.is_downstream and not self.unpartitioned_disks:
-                self.db.create_db_lvm()
-            if on_openstack:
-                self.set_resolvable_hostname(log_callback=log_callback)
+        # TODO: Handle external DB setup
+        # This is workaround for appliances to use only one disk for the VMDB
+        # If they have been provisioned with a second disk in the infra,
+        # 'self.unpartitioned_disks' should exist and therefore this won't run.
+        @plan.step(
+            requires=['ssh'],
+            enabled=lambda: self.is_downstream and not self.unpartitioned_disks,
+            done=lambda: self.ssh_client.run_command('lvs dbvg/dblv').success)
+        def db_lvm():
+            self.db.create_db_lvm()
+
+        @plan.step(requires=['ssh'], enabled=on_openstack)
+        def resolvable_hostname():
+            self.set_resolvable_hostname(log_callback=log_callback)
+
+        # An existing database is only kept if it is internal and in the requested region
+        @plan.step(
+            requires=['rails_deprecation', 'db_lvm', 'resolvable_hostname'],
+            done=lambda: (
+                not (key_address or db_address or self.is_pod) and
+                self.db.is_ready and self.db.region == region))
+        def db():
             if db_address:
                 self.db_host = db_address
-
             self.db.setup(region=region, key_address=key_address,
                           db_address=db_address, is_pod=self.is_pod)
 
+        @plan.step(requires=['db'])
+        def evm_running():
             if on_gce:
                 # evm serverd does not auto start on GCE instance..
                 self.evmserverd.start(log_callback=log_callback)
             self.evmserverd.wait_for_running(timeout=1200)
 
-            # Some conditionally ran items require the evm service be
-            # restarted:
-            restart_evm = False
+        @plan.step(requires=['evm_running'])
+        def miq_ready():
             self.wait_for_miq_ready(log_callback=log_callback)
-            if self.version < '5.11':
-                self.configure_vm_console_cert(log_callback=log_callback)
-                restart_evm = True
 
-            if fix_ntp_clock and not self.is_pod:
-                self.set_ntp_sources(log_callback=log_callback)
-                restart_evm = True
+        # Some conditionally ran items require the evm service be restarted, they are batched
+        # before a single restart
+        @plan.step(
+            requires=['ssh'], enabled=lambda: self.version < '5.11',
+            done=self._vm_console_cert_installed)
+        def vm_console_cert():
+            self.configure_vm_console_cert(log_callback=log_callback)
+
+        @plan.step(
+            requires=['miq_ready'], enabled=fix_ntp_clock and not self.is_pod,
+            done=self._ntp_sources_set)
+        def ntp():
+            self.set_ntp_sources(log_callback=log_callback)
+
+        @plan.step(
+            requires=['miq_ready', 'vm_console_cert', 'ntp'],
+            triggered_by=['vm_console_cert', 'ntp'])
+        def evm_restart():
+            self.evmserverd.restart(log_callback=log_callback)
+            self.wait_for_miq_ready(num_sec=1800, log_callback=log_callback)
+
+        with self:
+            return plan.run()
+
+    def _vm_console_cert_installed(self):
+        """Whether the HTML5 VM console certificate and its key are installed"""
+        cert = conf.cfme_data.get('vm_console', {}).get('cert')
+        if cert is None:
+            return False
+        return self.ssh_client.run_command('test -s {cert} -a -s {cert}.key'.format(
+            cert=os.path.join(cert.install_dir, 'server.cer'))).success
 
-            if restart_evm:
-                self.evmserverd.restart(log_callback=log_callback)
-                self.wait_for_miq_ready(num_sec=1800, log_callback=log_callback)
+    def _ntp_sources_set(self):
+        """Whether chronyd is enabled and uses the clock servers from cfme_data"""
+        time_servers = conf.cfme_data.get('clock_servers')
+        if not time_servers or not self.chronyd.enabled:
+            return False
+        try:
+            return self.advanced_settings['ntp']['server'] == list(time_servers)
+        except (KeyError, TypeError, APIException):
+            return False
 
     def configure_gce(self, log_callback=None):
         # Force use of IPAppliance's configure method
@@ -515,45 +586,33 @@ class IPAppliance:
 
     def seal_for_templatizing(self):
         """Prepares the VM to be "generalized" for saving as a template."""
+        # clear any set hostname from /etc/hosts
+        self.remove_resolvable_hostname()
         with self.ssh_client as ssh_client:
             # Seals the VM in order to work when spawned again.
-            ssh_client.run_command("rm -rf /etc/ssh/ssh_host_*", ensure_host=True)
-            if ssh_client.run_command(
-                    "grep '^HOSTNAME' /etc/sysconfig/network", ensure_host=True).success:
-                # Replace it
-                ssh_client.run_command(
-                    "sed -i -r -e 's/^HOSTNAME=.*$/HOSTNAME=localhost.localdomain/' "
-                    "/etc/sysconfig/network", ensure_host=True)
-            else:
-                # Set it
-                ssh_client.run_command(
-                    "echo HOSTNAME=localhost.localdomain >> /etc/sysconfig/network",
-                    ensure_host=True)
-            # clear any set hostname from /etc/hosts
-            self.remove_resolvable_hostname()
-            ssh_client.run_command(
+            ssh_client.run_script([
+                "rm -rf /etc/ssh/ssh_host_*",
+                # Replace the hostname or set it
+                "if grep -q '^HOSTNAME' /etc/sysconfig/network; then "
+                "sed -i -r -e 's/^HOSTNAME=.*$/HOSTNAME=localhost.localdomain/' "
+                "/etc/sysconfig/network; "
+                "else echo HOSTNAME=localhost.localdomain >> /etc/sysconfig/network; fi",
                 "sed -i -r -e '/^HWADDR/d' /etc/sysconfig/network-scripts/ifcfg-eth0",
-                ensure_host=True)
-            ssh_client.run_command(
                 "sed -i -r -e '/^UUID/d' /etc/sysconfig/network-scripts/ifcfg-eth0",
-                ensure_host=True)
-            ssh_client.run_command("rm -f /etc/udev/rules.d/70-*", ensure_host=True)
-            # Fix SELinux things
-            ssh_client.run_command("restorecon -R /etc/sysconfig/network-scripts", ensure_host=True)
-            ssh_client.run_command("restorecon /etc/sysconfig/network", ensure_host=True)
+                "rm -f /etc/udev/rules.d/70-*",
+                # Fix SELinux things
+                "restorecon -R /etc/sysconfig/network-scripts",
+                "restorecon /etc/sysconfig/network",
+            ], ensure_host=True)
             # Stop the evmserverd and move the logs somewhere
             self.evmserverd.stop()
-            ssh_client.run_command("mkdir -p /var/www/miq/vmdb/log/preconfigure-logs",
-                ensure_host=True)
-            ssh_client.run_command(
+            ssh_client.run_script([
+                "mkdir -p /var/www/miq/vmdb/log/preconfigure-logs",
                 "mv /var/www/miq/vmdb/log/*.log /var/www/miq/vmdb/log/preconfigure-logs/",
-                ensure_host=True)
-            ssh_client.run_command(
                 "mv /var/www/miq/vmdb/log/*.gz /var/www/miq/vmdb/log/preconfigure-logs/",
-                ensure_host=True)
-            # Reduce swapping, because it can do nasty things to our providers
-            ssh_client.run_command('echo "vm.swappiness = 1" >> /etc/sysctl.conf',
-                ensure_host=True)
+                # Reduce swapping, because it can do nasty things to our providers
+                'echo "vm.swappiness = 1" >> /etc/sysctl.conf',
+            ], ensure_host=True)
 
     @cached_property
     def password_gem(self):
@@ -573,6 +632,27 @@ class IPAppliance:
         finally:
             logging.disable(logging.NOTSET)
 
+    def _managed_providers(self):
+        """Returns ``[(name, type)]`` of the providers configured on the appliance
+
+        The listing is only fetched again when the change token (count of the providers and the
+        latest update) differs from the one it was fetched with.
+        """
+        href = self.rest_api.collections.providers._href
+        latest = self.rest_api.get(
+            href, expand='resources', attributes='id,updated_on', sort_by='updated_on',
+            sort_order='desc', limit=1)
+        token = (latest.get('count'), tuple(
+            (ems.get('id'), ems.get('updated_on')) for ems in latest.get('resources', [])))
+        if self._providers_listing is not None and self._providers_listing[0] == token:
+            return self._providers_listing[1]
+        listing = [
+            (ems['name'], ems['type'])
+            for ems in self.rest_api.get(
+                href, expand='resources', attributes='name,type').get('resources', [])]
+        self._providers_listing = (token, listing)
+        return listing
+
     @property
     def managed_provider_names(self):
         """Returns a list of names for all providers configured on the appliance
@@ -582,11 +662,11 @@ class IPAppliance:
             not recognized, but are present.
         """
         known_ems_list = []
-        for ems in self.rest_api.collections.providers:
+        for ems_name, ems_type in self._managed_providers():
             if not any(
-                    p_type in ems['type'] for p_type in RECOGNIZED_BY_IP + RECOGNIZED_BY_CREDS):
+                    p_type in ems_type for p_type in RECOGNIZED_BY_IP + RECOGNIZED_BY_CREDS):
                 continue
-            known_ems_list.append(ems['name'])
+            known_ems_list.append(ems_name)
         return known_ems_list
 
     @property
@@ -596,27 +676,27 @@ class IPAppliance:
         Note:
             Recognized by name only.
         """
-        from cfme.utils.providers import list_providers
-        prov_cruds = list_providers(use_global_filters=False, appliance=self)
+        from cfme.utils.providers import get_crud
+        from cfme.utils.providers import get_provider_catalogue
+        catalogue = get_provider_catalogue()
 
-        found_cruds = set()
+        found_keys = set()
         unrecognized_ems_names = set()
         for ems_name in self.managed_provider_names:
             if ems_name in EMBEDDED_PROVIDERS:
                 # ignore embedded pre-configured providers
                 continue
-            for prov in prov_cruds:
-                # Name check is authoritative and the only proper way to recognize a known provider
-                # Match either by exact name or by child provider name, e.g., 'XXX Network Manager'
-                if ems_name == prov.name or re.match(f'^{prov.name} [A-Za-z]+ Manager$', ems_name):
-                    found_cruds.add(prov)
-                    break
-            else:
+            # Name check is authoritative and the only proper way to recognize a known provider
+            # Match either by exact name or by child provider name, e.g., 'XXX Network Manager'
+            key = catalogue.key_for_ems_name(ems_name)
+            if key is None:
                 unrecognized_ems_names.add(ems_name)
+            else:
+                found_keys.add(key)
         if unrecognized_ems_names:
             self.log.warning(
                 "Unrecognized managed providers: {}".format(', '.join(unrecognized_ems_names)))
-        return list(found_cruds)
+        return [get_crud(key, appliance=self) for key in found_keys]
 
     @classmethod
     def from_url(cls, url, **kwargs):
@@ -1392,30 +1472,6 @@ class IPAppliance:
         else:
             raise Exception(f"Couldn't get datetime: {result.output}")
 
-    def _check_appliance_ui_wait_fn(self):
-        # Get the URL, don't verify ssl cert
-        try:
-            # If we don't request text/html, there is a short window during the
-            # appliance HA DB failover when the evmserverd is not in OK state
-            # but returns HTTP 200 while with requesting the text/html, we get
-            # HTTP 500. Browsers are requesting the text/html, so we should.
-            # probably as well.
-            response = requests.get(self.url, timeout=15, verify=False,
-                                    headers={'Accept': 'text/html'})
-            if response.status_code == 200:
-                self.log.info("Appliance online")
-                return True
-            else:
-                self.log.debug('Appliance online, status code %s', response.status_code)
-        except requests.exceptions.Timeout:
-            self.log.debug('Appliance offline, connection timed out')
-        except ValueError:
-            # requests exposes invalid URLs as ValueErrors, which is excellent
-            raise
-        except Exception as ex:
-            self.log.debug('Appliance online, but connection failed: %s', str(ex))
-        return False
-
     def is_web_ui_running(self, unsure=False):
         """Triple checks if web UI is up and running
 
@@ -1427,9 +1483,10 @@ class IPAppliance:
         num_of_tries = 3
         was_running_count = 0
         for try_num in range(num_of_tries):
-            if self._check_appliance_ui_wait_fn():
+            if try_num:
+                sleep(self.readiness.tight_delay)
+            if self.readiness.shared_probe(['ui']).ready:
                 was_running_count += 1
-            sleep(3)
 
         if was_running_count == 0:
             return False
@@ -1446,8 +1503,8 @@ class IPAppliance:
             self.evmserverd.stop()
             log_callback('Waiting for evm service to stop')
             try:
-                wait_for(
-                    lambda: self.evmserverd.running, num_sec=120, fail_condition=True, delay=5,
+                self.readiness.poll(
+                    lambda: not self.evmserverd.running, timeout=120,
                     message='evm service to stop')
             except TimedOutError:
                 # Don't care if it's still running
@@ -1456,9 +1513,7 @@ class IPAppliance:
             ssh.run_command('killall -9 ruby')
             self.db_service.restart()
             log_callback('Waiting for database to be available')
-            wait_for(
-                lambda: self.db.is_online, num_sec=90, delay=5,
-                message="database to be available")
+            self.readiness.wait(['db'], timeout=90)
             self.evmserverd.start()
 
     @logger_wrap("Rebooting Appliance: {}")
@@ -1469,8 +1524,8 @@ class IPAppliance:
         old_uptime = client.uptime()
         client.run_command('reboot')
 
-        wait_for(lambda: client.uptime() < old_uptime, handle_exception=True,
-            num_sec=600, message='appliance to reboot', delay=10)
+        self.readiness.poll(lambda: client.uptime() < old_uptime, handle_exception=True,
+            timeout=600, message='appliance to reboot')
 
         if wait_for_miq_ready:
             self.wait_for_miq_ready()
@@ -1484,10 +1539,10 @@ class IPAppliance:
             log_callback: Function to use for writing log messages.
         """
         (log_callback or self.log.info)('Waiting for web UI to appear')
-        result, secs_taken = wait_for(self._check_appliance_ui_wait_fn,
-                                      num_sec=num_sec, fail_condition=False, delay=10)
-        self.wait_for_api_available(num_sec - secs_taken)
-        return result
+        # UI and API in one probe cycle
+        self.readiness.wait(['ui', 'api'], timeout=num_sec)
+        self._renew_rest_api()
+        return True
 
     def wait_for_api_available(self, num_sec=600):
         """ Waits for the MIQ API to be available. Invalidates the cached client.
@@ -1495,34 +1550,24 @@ class IPAppliance:
         Args:
             num_sec: Number of seconds to wait until num_sec(default ``600``)
         """
-
-        def _check_appliance_api_ready():
-            try:
-                # There are 2 hard problems in computer science: cache
-                # invalidation, naming things, and off-by-1 errors.
-                # -- Leon Bambrick
-                #
-                # Try invalidating stale cached api object if exists
-                try:
-                    del self.__dict__['rest_api']
-                except KeyError:
-                    pass
-                api = self.rest_api
-
-                # Make sure we really make a new request. Perhaps accessing the
-                # rest_api property just creates a client object but no network
-                # communicatin is done until we access some property of the
-                # client.
-                assert api.server_info['server_href']
-                self.log.info("Appliance REST API ready")
-                return api
-            except APIException as exc:
-                self.log.warning('Appliance RESTAPI not ready: %s', exc)
-                return False
-
-        api, _ = wait_for(func=_check_appliance_api_ready, num_sec=num_sec, delay=10)
+        self.readiness.wait(['api'], timeout=num_sec)
+        return self._renew_rest_api()
+
+    def _renew_rest_api(self):
+        """Replaces the cached REST API client, the old one may belong to a restarted appliance"""
+        # There are 2 hard problems in computer science: cache
+        # invalidation, naming things, and off-by-1 errors.
+        # -- Leon Bambrick
+        clear_property_cache(self, 'rest_api')
+        api = self.rest_api
+        self.log.info("Appliance REST API ready")
         return api
 
+    @cached_property
+    def readiness(self):
+        """:py:class:`ReadinessProber` shared by everything waiting for this appliance"""
+        return ReadinessProber(self)
+
     @logger_wrap("Install VDDK: {}")
     def install_vddk(self, force=False, vddk_url=None, log_callback=None):
         """Install the vddk on a appliance"""
@@ -1679,10 +1724,7 @@ class IPAppliance:
         Args:
             timeout: Number of seconds to wait until timeout (default ``600``)
         """
-        wait_for(func=lambda: self.is_ssh_running,
-                 message='appliance.is_ssh_running',
-                 delay=1,
-                 num_sec=timeout)
+        self.readiness.wait(['ssh'], timeout=timeout)
 
     @property
     def ansible_pod_name(self):
@@ -1891,41 +1933,29 @@ class IPAppliance:
         self.update_advanced_settings(yaml_conf)
         assert self.get_disabled_regions(provider) == list(regions)  # its a tuple if empty
 
+    @cached_property
+    def server_role_tracker(self):
+        """:py:class:`ServerRoleTracker` reading the server roles from the database"""
+        return ServerRoleTracker(self)
+
+    @cached_property
+    def vm_state_watcher(self):
+        """:py:class:`VMStateWatcher` reading the state of the VMs from the database"""
+        return VMStateWatcher(self)
+
     @property
     def server_roles(self):
         """Return a dictionary of server roles from database"""
-        asr = self.db.client['assigned_server_roles']
-        sr = self.db.client['server_roles']
-        all_role_names = {row[0] for row in self.db.client.session.query(sr.name)}
-        # Query all active server roles assigned to this server
-        query = self.db.client.session\
-            .query(sr.name)\
-            .join(asr, asr.server_role_id == sr.id)\
-            .filter(asr.miq_server_id == self.evm_id)\
-            .filter(asr.active == True)  # noqa
-        active_roles = {row[0] for row in query}
-        roles = {role_name: role_name in active_roles for role_name in all_role_names}
-        dead_keys = ['database_owner', 'vdi_inventory']
-        for key in roles:
-            if not self.is_storage_enabled:
-                if key.startswith('storage'):
-                    dead_keys.append(key)
-                if key == 'vmdb_storage_bridge':
-                    dead_keys.append(key)
-        for key in dead_keys:
-            try:
-                del roles[key]
-            except KeyError:
-                pass
-        return roles
+        return self.server_role_tracker.roles()
 
     @server_roles.setter
     def server_roles(self, roles):
         """Sets the server roles. Requires a dictionary full of the role keys with bool values."""
-        if self.server_roles == roles:
+        current_roles = self.server_roles
+        if current_roles == roles:
             self.log.debug(' Roles already match, returning...')
             return
-        ansible_old = self.server_roles.get('embedded_ansible', False)
+        ansible_old = current_roles.get('embedded_ansible', False)
         ansible_new = roles.get('embedded_ansible', False)
         enabling_ansible = ansible_old is False and ansible_new is True
 
@@ -1933,7 +1963,7 @@ class IPAppliance:
         server_data['role'] = ','.join([role for role, boolean in roles.items() if boolean])
         self.update_advanced_settings({'server': server_data})
         timeout = 600 if enabling_ansible else 300
-        wait_for(lambda: self.server_roles == roles, num_sec=timeout, delay=15)
+        self.server_role_tracker.wait_for_roles(roles, timeout=timeout)
         if enabling_ansible:
             self.wait_for_embedded_ansible()
 
@@ -1947,7 +1977,7 @@ class IPAppliance:
         try:
             self.server_roles = roles
         except TimedOutError:
-            wait_for(lambda: self.server_roles == roles, num_sec=600, delay=15)
+            self.server_role_tracker.wait_for_roles(roles, timeout=600)
         self.wait_for_embedded_ansible()
 
     def disable_embedded_ansible_role(self):
@@ -1963,19 +1993,21 @@ class IPAppliance:
         self.server_roles = server_roles
         return server_roles == self.server_roles
 
-    def wait_for_server_roles(self, server_roles, **kwargs):
+    def wait_for_server_roles(self, server_roles, timeout=120):
         """Waits for the server roles to be set
 
         Warning: This may take awhile if it is a long list.
 
          Args:
             server_roles: list of server roles to be checked
+            timeout: Number of seconds to wait until timeout (default ``120``)
          Returns:
             :py:class:`bool`
          """
-
         try:
-            wait_for(lambda: all([self.server_roles[role] for role in server_roles]), **kwargs)
+            self.server_role_tracker.wait(
+                lambda roles: all([roles[role] for role in server_roles]), timeout=timeout,
+                message='server roles enabled')
         except TimedOutError:
             return False
         else:
@@ -2742,42 +2774,56 @@ class Appliance(IPAppliance):
         log_callback(f"Configuring appliance {self.vm_name} on {self.provider_key}")
 
         # Defer to the IPAppliance.
-        super().configure(log_callback=log_callback, on_openstack=on_openstack)
+        return super().configure(log_callback=log_callback, on_openstack=on_openstack, **kwargs)
 
     #  TODO Can we remove this?
     @logger_wrap("Configure fleecing: {}")
     def configure_fleecing(self, log_callback=None):
-        with self(browser_steal=True):
-            if self.is_on_vsphere:
-                self.install_vddk(reboot=True, log_callback=log_callback)
-                self.wait_for_miq_ready(log_callback=log_callback)
+        from cfme.utils.providers import get_crud
+        provider = get_crud(self.provider_key, appliance=self)
+        plan = ConfigurePlan(
+            f'Configure fleecing {self.hostname}', context=appliance_context(self),
+            log_callback=log_callback)
+
+        @plan.step(enabled=lambda: self.is_on_vsphere)
+        def vddk():
+            self.install_vddk(reboot=True, log_callback=log_callback)
+            self.wait_for_miq_ready(log_callback=log_callback)
 
-            if self.is_on_rhev:
-                self.add_rhev_direct_lun_disk()
+        @plan.step(enabled=lambda: self.is_on_rhev)
+        def rhev_direct_lun():
+            self.add_rhev_direct_lun_disk()
 
+        # The UI steps (smart proxy role, hosts, relationship) require each other, so only
+        # the provider setup and its inventory refresh run alongside them
+        @plan.step(
+            requires=['vddk'], done=lambda: self.server.settings.server_roles_db['smartproxy'])
+        def smartproxy_role():
             log_callback('Enabling smart proxy role...')
-            roles = self.server.settings.server_roles_db
-            if not roles["smartproxy"]:
-                self.server.settings.enable_server_roles("smartproxy")
+            self.server.settings.enable_server_roles("smartproxy")
 
-            # add provider
+        @plan.step(requires=['vddk'])
+        def provider_setup():
             log_callback('Setting up provider...')
-            from cfme.utils.providers import get_crud
-            provider = get_crud(self.provider_key, appliance=self)
             provider.setup()
 
-            # credential hosts
+        @plan.step(requires=['provider_setup', 'smartproxy_role'], enabled=not RUNNING_UNDER_SPROUT)
+        def hosts_credentials():
             log_callback('Credentialing hosts...')
-            if not RUNNING_UNDER_SPROUT:
-                provider.setup_hosts_credentials()
+            provider.setup_hosts_credentials()
+
+        @plan.step(
+            requires=['provider_setup', 'rhev_direct_lun', 'hosts_credentials'],
+            enabled=lambda: self.is_on_rhev)
+        def cfme_relationship():
+            from cfme.infrastructure.virtual_machines import InfraVm
+            log_callback('Setting up CFME VM relationship...')
+            vm = self.collections.infra_vms.instantiate(self.vm_name, provider)
+            cfme_rel = InfraVm.CfmeRelationship(vm)
+            cfme_rel.set_relationship(str(self.server.name), self.server.sid)
 
-            # if rhev, set relationship
-            if self.is_on_rhev:
-                from cfme.infrastructure.virtual_machines import InfraVm
-                log_callback('Setting up CFME VM relationship...')
-                vm = self.collections.infra_vms.instantiate(self.vm_name, provider)
-                cfme_rel = InfraVm.CfmeRelationship(vm)
-                cfme_rel.set_relationship(str(self.server.name), self.server.sid)
+        with self(browser_steal=True):
+            return plan.run()
 
     # TODO Remove cached property, could be a lot of references
     @cached_property
@@ -2986,23 +3032,28 @@ def provision_appliance(
 
 class ApplianceStack(LocalStack):
 
-    def push(self, obj):
+    def push(self, obj, steal_browser=True):
+        """Pushes the appliance, restarting the browser if the appliance steals it
+
+        ``steal_browser=False`` leaves the browser alone, e.g. in the threads of configuration
+        steps, which share the browser of the thread that stole it.
+        """
         stack_parent = self.top
         super().push(obj)
 
         logger.info(f"Pushed appliance hostname [{obj.hostname}] on stack \n"
                     f"Previous stack head was {getattr(stack_parent, 'hostname', 'empty')}")
-        if obj.browser_steal:
+        if steal_browser and obj.browser_steal:
             from cfme.utils import browser
             browser.start()
 
-    def pop(self):
+    def pop(self, steal_browser=True):
         stack_parent = super().pop()
         current = self.top
         logger.info(f"Popped appliance {getattr(stack_parent, 'hostname', 'empty')} from stack\n"
                     f"Stack head is {getattr(current, 'hostname', 'empty')}")
 
-        if stack_parent and stack_parent.browser_steal:
+        if steal_browser and stack_parent and stack_parent.browser_steal:
             from cfme.utils import browser
             browser.start()
         return stack_parent
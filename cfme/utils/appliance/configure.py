@@ -0,0 +1,231 @@
+"""
+dependency graph of appliance configuration steps
+
+A :py:class:`ConfigurePlan` holds idempotent :py:class:`ConfigureStep` objects with their declared
+requirements. Running the plan starts every step as soon as all its requirements finished, so
+independent steps (e.g. the audit rules and the database setup) run concurrently. A step whose
+postcondition (``done``) already holds is skipped, and the status and duration of every step is
+recorded in :py:attr:`ConfigurePlan.results`.
+
+Usage:
+
+    plan = ConfigurePlan('configure', context=appliance_context(appliance))
+
+    @plan.step(done=lambda: appliance.db.is_ready)
+    def db():
+        appliance.db.setup()
+
+    @plan.step(requires=['db'])
+    def evm_running():
+        appliance.evmserverd.wait_for_running()
+
+    plan.run()
+"""
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from contextlib import contextmanager
+from contextlib import nullcontext
+from time import time
+
+import attr
+
+from cfme.utils.log import logger
+
+#: Step ran
+RAN = 'ran'
+#: Step did not run because its postcondition already held
+SKIPPED = 'skipped'
+#: Step did not apply to the appliance, or nothing triggered it
+DISABLED = 'disabled'
+FAILED = 'failed'
+#: Step did not run because another step failed
+CANCELLED = 'cancelled'
+
+
+class ConfigurePlanError(Exception):
+    """Raised when the steps of a plan do not form a valid dependency graph"""
+    pass
+
+
+@attr.s
+class ConfigureStep:
+    """
+    single idempotent configuration step
+
+    Args:
+        name: name of the step, used by the ``requires`` of other steps
+        func: callable doing the step
+        requires: names of the steps that have to finish first
+        done: callable returning ``True`` if the postcondition of the step already holds
+        enabled: whether the step applies at all, a bool or a callable evaluated when the step
+                 is due (so it can use e.g. the ssh client prepared by the requirements)
+        triggered_by: names of required steps, if set the step only runs if at least one of them
+                      ran (e.g. a restart needed after a configuration change)
+    """
+    name = attr.ib()
+    func = attr.ib()
+    requires = attr.ib(default=(), converter=tuple)
+    done = attr.ib(default=None)
+    enabled = attr.ib(default=True)
+    triggered_by = attr.ib(default=(), converter=tuple)
+
+    @property
+    def is_enabled(self):
+        return self.enabled() if callable(self.enabled) else bool(self.enabled)
+
+
+@attr.s
+class StepResult:
+    status = attr.ib()
+    duration = attr.ib(default=0.0)
+    error = attr.ib(default=None)
+
+    @property
+    def finished(self):
+        """Whether the requirement is fulfilled for the dependent steps"""
+        return self.status in {RAN, SKIPPED, DISABLED}
+
+
+class ConfigurePlan:
+    """
+    dependency graph of :py:class:`ConfigureStep` objects
+
+    Args:
+        name: name of the plan, used in the logs
+        max_workers: maximum number of steps running concurrently, ``1`` runs them in sequence
+        context: callable returning the context manager each step is run in
+        log_callback: function to use for writing log messages
+    """
+
+    def __init__(self, name, max_workers=4, context=None, log_callback=None):
+        self.name = name
+        self.max_workers = max_workers
+        self._context = context or nullcontext
+        self._log = log_callback or logger.info
+        self.steps = {}
+        self.results = {}
+
+    def add(self, step):
+        if step.name in self.steps:
+            raise ConfigurePlanError(f'Step {step.name!r} is already in plan {self.name!r}')
+        self.steps[step.name] = step
+        return step
+
+    def step(self, name=None, **kwargs):
+        """Decorator adding the function as a step, named after the function by default"""
+        def decorator(func):
+            self.add(ConfigureStep(name or func.__name__, func, **kwargs))
+            return func
+        return decorator
+
+    def validate(self):
+        """Checks that the requirements exist and do not form a cycle"""
+        for step in self.steps.values():
+            unknown = [name for name in step.requires if name not in self.steps]
+            if unknown:
+                raise ConfigurePlanError(
+                    f'Step {step.name!r} requires unknown steps {", ".join(unknown)}')
+            if not set(step.triggered_by).issubset(step.requires):
+                raise ConfigurePlanError(
+                    f'Step {step.name!r} can only be triggered by the steps it requires')
+        resolved = set()
+        remaining = dict(self.steps)
+        while remaining:
+            ready = [
+                name for name, step in remaining.items() if resolved.issuperset(step.requires)]
+            if not ready:
+                raise ConfigurePlanError(
+                    f'Steps {", ".join(sorted(remaining))} of plan {self.name!r} form a cycle')
+            for name in ready:
+                resolved.add(name)
+                del remaining[name]
+
+    def _run_step(self, step):
+        start = time()
+        try:
+            with self._context():
+                if not step.is_enabled:
+                    status = DISABLED
+                elif step.done is not None and step.done():
+                    status = SKIPPED
+                else:
+                    self._log(f'{self.name}: {step.name}')
+                    step.func()
+                    status = RAN
+        except Exception as e:
+            logger.exception('%s: step %s failed', self.name, step.name)
+            return StepResult(FAILED, time() - start, e)
+        return StepResult(status, time() - start)
+
+    def _due_steps(self, pending):
+        """Pops the steps whose requirements finished, resolving the steps nothing triggered"""
+        due = []
+        changed = True
+        while changed:
+            changed = False
+            for name, step in list(pending.items()):
+                if not all(
+                        req in self.results and self.results[req].finished
+                        for req in step.requires):
+                    continue
+                del pending[name]
+                changed = True
+                if step.triggered_by and not any(
+                        self.results[trigger].status == RAN for trigger in step.triggered_by):
+                    self.results[name] = StepResult(DISABLED)
+                else:
+                    due.append(step)
+        return due
+
+    def run(self):
+        """Runs the plan, re-raising the error of the first failed step
+
+        Returns:
+            ``{step name: StepResult}``
+        """
+        self.validate()
+        self.results = {}
+        pending = dict(self.steps)
+        running = {}
+        failure = None
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                if failure is None:
+                    for step in self._due_steps(pending):
+                        running[pool.submit(self._run_step, step)] = step.name
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    result = self.results[running.pop(future)] = future.result()
+                    if result.status == FAILED and failure is None:
+                        failure = result
+        for name in pending:
+            self.results[name] = StepResult(CANCELLED)
+        self.log_timings()
+        if failure is not None:
+            raise failure.error
+        return self.results
+
+    def log_timings(self):
+        logger.info(
+            '%s timings: %s', self.name, ', '.join(
+                f'{name} {result.status} {result.duration:.1f}s'
+                for name, result in self.results.items()))
+
+
+def appliance_context(appliance):
+    """Context factory making the appliance the current one in the step threads
+
+    The steps leave the browser alone, a browser steal is done once around the whole plan.
+    """
+    @contextmanager
+    def context():
+        from cfme.utils.appliance import stack
+        stack.push(appliance, steal_browser=False)
+        try:
+            yield
+        finally:
+            stack.pop(steal_browser=False)
+    return context
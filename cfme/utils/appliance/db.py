@@ -1,3 +1,4 @@
+import os
 import re
 
 import attr
@@ -657,6 +658,66 @@ class ApplianceDB(AppliancePlugin):
         result = self.ssh_client.run_command(db_check_command, ensure_host=ensure_host)
         return result.success
 
+    @property
+    def region(self):
+        """Region number of the database, ``None`` if it is not set up"""
+        db_check_command = ('env PGPASSWORD={pwd} psql -U {user} -t -A -h {ip} -c '
+                            '"SELECT region FROM miq_regions;" vmdb_production')
+        ensure_host = True if self.ssh_client.is_pod else False
+        db_check_command = db_check_command.format(ip=self.address,
+                                                   user=conf.credentials['database']['username'],
+                                                   pwd=conf.credentials['database']['password'])
+        result = self.ssh_client.run_command(db_check_command, ensure_host=ensure_host)
+        try:
+            return int(result.output.split()[0]) if result.success else None
+        except (IndexError, ValueError):
+            return None
+
+    def dump(self, dump_path):
+        """Dumps vmdb_production to a file on the database machine (pg_dump custom format)
+
+        Unlike :py:meth:`backup`, the dump can be restored by :py:meth:`restore_dump` without
+        recreating the database.
+        """
+        result = self.ssh_client.run_command(
+            'mkdir -p {dir} && pg_dump -Fc -f {path}.tmp vmdb_production && '
+            'mv -f {path}.tmp {path}'.format(dir=os.path.dirname(dump_path), path=dump_path),
+            timeout=600)
+        if result.failed:
+            raise ApplianceDBException(f'Failed to dump the database: {result.output}')
+
+    def disconnect_client(self):
+        """Closes the connections of :py:attr:`client`, a new client connects when used next"""
+        client = self.__dict__.get('client')
+        if client is not None:
+            if 'session' in client.__dict__:
+                client.session.close()
+            client.engine.dispose()
+        clear_property_cache(self, 'client')
+
+    def restore_dump(self, dump_path):
+        """Restores a dump made by :py:meth:`dump` on the same appliance
+
+        The evm service is stopped and the connections to the database are closed while the
+        tables are replaced, so the restore is not blocked by their locks. The appliance is ready
+        again and :py:attr:`client` connects anew when this returns.
+        """
+        self.appliance.evmserverd.stop()
+        try:
+            self.disconnect_client()
+            self.ssh_client.run_command(
+                "psql -d vmdb_production -t -c \"SELECT pg_terminate_backend(pid) "
+                "FROM pg_stat_activity WHERE datname = 'vmdb_production' "
+                "AND pid <> pg_backend_pid()\"", timeout=30)
+            result = self.ssh_client.run_command(
+                f'pg_restore --clean --if-exists -j 4 -d vmdb_production {dump_path}',
+                timeout=900)
+            if result.failed:
+                raise ApplianceDBException(f'Failed to restore the dump: {result.output}')
+        finally:
+            self.appliance.evmserverd.start()
+        self.appliance.wait_for_miq_ready(num_sec=900)
+
     def restore_database(self, db_path, is_major=False):
         """Restore a database on the appliance.
 
@@ -1,6 +1,7 @@
 import json
 import os
 import time
+from collections import defaultdict
 from inspect import isclass
 from time import sleep
 
@@ -35,6 +36,9 @@ from cfme.utils.wait import wait_for
 
 VersionPick.VERSION_CLASS = Version
 
+#: Per navigation step name, the number of page health checks and the seconds they took
+PAGE_HEALTH_TIMINGS = defaultdict(lambda: [0, 0.0])
+
 
 class ErrorView(View):
     title = Text("//body/h1")
@@ -120,6 +124,56 @@ class MiqBrowserPlugin(DefaultPlugin):
         }
         ''')
 
+    # Everything pre_badness_check looks at on a page, in one script call instead of a WebDriver
+    # round-trip for each. Turns the sparkle off first, like the checks used to.
+    PAGE_HEALTH = jsmin('''\
+        function isVisible(el) {
+            return !!(el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+        }
+        function anyVisible(xpath) {
+            var nodes = document.evaluate(
+                xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var i = 0; i < nodes.snapshotLength; i++) {
+                if (isVisible(nodes.snapshotItem(i)))
+                    return true;
+            }
+            return false;
+        }
+        function firstText(xpath) {
+            var node = document.evaluate(
+                xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            return node ? node.innerText.trim() : null;
+        }
+
+        var health = {sparkle_off: true, rails_error: null};
+        try {
+            miqSparkleOff();
+        } catch(err) {
+            // miqSparkleOff undefined, so it's definitely off.
+            health.sparkle_off = false;
+        }
+        health.jquery = typeof jQuery !== "undefined";
+        health.blocked = (
+            anyVisible("//div[@id='blocker_div' or @id='notification']") ||
+            Array.prototype.some.call(document.querySelectorAll(".modal-backdrop.fade.in"),
+                                      isVisible));
+        health.modal = anyVisible(
+            "//div[contains(@class, 'modal-dialog') and contains(@class, 'modal-lg')]");
+        if (anyVisible("//body[./h1 and ./p and ./hr and ./address]")) {
+            var title = firstText("//body/h1"), body = firstText("//body/p");
+            if (title !== null && body !== null)
+                health.rails_error = title + ": " + body;
+        } else if (anyVisible("//h1[normalize-space(.)='Unexpected error encountered']")) {
+            health.rails_error = firstText(
+                "//h1[normalize-space(.)='Unexpected error encountered']" +
+                "/following-sibling::h3[not(fieldset)]");
+        }
+        health.page_safe = (function() {
+        ''' + ENSURE_PAGE_SAFE + '''
+        })();
+        return health;
+        ''')
+
     OBSERVED_FIELD_MARKERS = (
         'data-miq_observe',
         'data-miq_observe_date',
@@ -186,6 +240,11 @@ class MiqBrowserPlugin(DefaultPlugin):
             return bool(result)
         wait_for(_check, timeout=timeout, delay=0.2, silent_failure=True, very_quiet=True)
 
+    def page_health(self):
+        """Returns the page health record of :py:attr:`PAGE_HEALTH`, a dictionary with the keys
+        ``sparkle_off``, ``jquery``, ``blocked``, ``modal``, ``rails_error`` and ``page_safe``."""
+        return self.browser.execute_script(self.PAGE_HEALTH, silent=True)
+
     def after_keyboard_input(self, element, keyboard_input):
         observed_field_attr = None
         for attr in self.OBSERVED_FIELD_MARKERS:
@@ -214,6 +273,7 @@ class MiqBrowserPlugin(DefaultPlugin):
         self.make_document_focused()
 
     def before_keyboard_input(self, element, keyboard_input):
+        self.browser.page_changed()
         # there is an issue in different dialogs
         # when cfme doesn't see that some input fields have been updated
         # this is temporary fix until we figure out real reason and fix it
@@ -223,6 +283,8 @@ class MiqBrowserPlugin(DefaultPlugin):
     def before_click(self, element, locator):
         # this is necessary in order to handle unexpected alerts like "Abandon Changes"
         self.browser.page_dirty = self.page_has_changes
+        # the page can change without changing the URL
+        self.browser.page_changed()
 
     def after_click(self, element, locator):
         # page_dirty is set to None because otherwise if it was true, all next ensure_page_safe
@@ -249,11 +311,31 @@ class MiqBrowser(HandleModalsMixin, Browser):
             selenium.capabilities.get('browserName', 'unknown'),
             selenium.capabilities.get('version', 'unknown'))
         self.page_dirty = None
+        # (object, destination, location signature) of the last navigation, see
+        # CFMENavigateStep.go. Dropped on any click or keyboard input.
+        self.nav_location = None
+        # Bumped on any click or keyboard input, see page_token
+        self.page_generation = 0
 
     @property
     def appliance(self):
         return self.extra_objects['appliance']
 
+    @property
+    def location_signature(self):
+        """URL and title of the current page, in one script call"""
+        return tuple(self.execute_script('return [location.href, document.title];', silent=True))
+
+    def page_changed(self):
+        """Drops what is known about the page, it may have changed without changing the URL"""
+        self.nav_location = None
+        self.page_generation += 1
+
+    @property
+    def page_token(self):
+        """Identifies the state of the page, it differs once the page may have changed since"""
+        return (self.page_generation, ) + self.location_signature
+
     def create_view(self, *args, **kwargs):
         timeout = kwargs.pop('wait', None)
         view = self.appliance.browser.create_view(*args, **kwargs)
@@ -274,6 +356,9 @@ def can_skip_badness_test(fn):
 
 class CFMENavigateStep(NavigateStep):
     VIEW = None
+    #: Whether a navigation to this destination may be served from the location cache of the
+    #: browser, see :py:meth:`location_cached`
+    CACHE_LOCATION = True
 
     @cached_property
     def view(self):
@@ -304,47 +389,36 @@ class CFMENavigateStep(NavigateStep):
 
         br = self.appliance.browser
 
-        try:
-            br.widgetastic.execute_script('miqSparkleOff();', silent=True)
-        except:  # noqa
-            # miqSparkleOff undefined, so it's definitely off.
-            # Or maybe it is alerts? Let's only do this when we get an exception.
-            self.appliance.browser.widgetastic.dismiss_any_alerts()
-            # If we went so far, let's put diapers on one more miqSparkleOff just to be sure
-            # It can be spinning in the back
-            try:
-                br.widgetastic.execute_script('miqSparkleOff();', silent=True)
-            except:  # noqa
-                pass
+        start_time = time.time()
+        health = self.read_page_health()
 
         # This alert appears when we try to leave page with some made changes
         if (br.widgetastic.page_dirty and br.widgetastic.alert_present and
                 br.widgetastic.get_alert().text == 'Abandon changes?'):
             br.widgetastic.handle_alert()
 
+        # The page may still be loading, a blocker or an error seen now can be gone once it is
+        # done, so only the state of a settled page is acted upon
+        if health and not health.get('page_safe'):
+            br.widgetastic.plugin.ensure_page_safe()
+            health = self.read_page_health()
+        self.record_page_health_timing(time.time() - start_time)
+
         # Check if the page is blocked with blocker_div. If yes, let's headshot the browser right
         # here
-        if (
-                br.widgetastic.is_displayed("//div[@id='blocker_div' or @id='notification']") or
-                br.widgetastic.is_displayed(".modal-backdrop.fade.in")):
+        if health.get('blocked'):
             logger.warning("Page was blocked with blocker div on start of navigation, recycling.")
             self.appliance.browser.quit_browser()
             self.go(_tries, *args, **go_kwargs)
 
         # Check if modal window is displayed
-        if (br.widgetastic.is_displayed(
-                "//div[contains(@class, 'modal-dialog') and contains(@class, 'modal-lg')]")):
+        if health.get('modal'):
             logger.warning("Modal window was open; closing the window")
             br.widgetastic.click(
                 "//button[contains(@class, 'close') and contains(@data-dismiss, 'modal')]")
 
         # Check if jQuery present
-        try:
-            br.widgetastic.execute_script("jQuery", silent=True)
-        except Exception as e:
-            if "jQuery" not in str(e):
-                logger.error("Checked for jQuery but got something different.")
-                logger.exception(e)
+        if not health.get('jquery', True):
             # Restart some workers
             logger.warning("Restarting UI and VimBroker workers!")
             with self.appliance.ssh_client as ssh:
@@ -358,8 +432,7 @@ class CFMENavigateStep(NavigateStep):
             self.go(_tries, *args, **go_kwargs)
 
         # Same with rails errors
-        view = br.widgetastic.create_view(ErrorView)
-        rails_e = view.get_rails_error()
+        rails_e = health.get('rails_error')
 
         if rails_e is not None:
             logger.warning("Page was blocked by rails error, renavigating.")
@@ -379,6 +452,28 @@ class CFMENavigateStep(NavigateStep):
             self.go(_tries, *args, **go_kwargs)
             # If there is a rails error past this point, something is really awful
 
+    def read_page_health(self):
+        """Returns the page health record, an empty dictionary when it could not be read"""
+        br = self.appliance.browser
+        try:
+            health = br.widgetastic.plugin.page_health()
+        except:  # noqa
+            # An alert blocks the scripts, let's dismiss it and look again
+            br.widgetastic.dismiss_any_alerts()
+            try:
+                health = br.widgetastic.plugin.page_health()
+            except:  # noqa
+                health = None
+        return health or {}
+
+    def record_page_health_timing(self, duration):
+        """Counts the time spent checking the page before the navigation step"""
+        timing = PAGE_HEALTH_TIMINGS[self._name]
+        timing[0] += 1
+        timing[1] += duration
+        self.log_message("Page health checked in {}ms (average {}ms over {} checks)".format(
+            int(duration * 1000), int(timing[1] / timing[0] * 1000), timing[0]))
+
     def check_for_badness(self, fn, _tries, nav_args, *args, **kwargs):
         if getattr(fn, '_can_skip_badness_test', False):
             # self.log_message('Op is a Nop! ({})'.format(fn.__name__))
@@ -526,8 +621,37 @@ class CFMENavigateStep(NavigateStep):
         str_msg = f"[UI-NAV/{class_name}/{self._name}]: {msg}"
         getattr(logger, level)(str_msg)
 
-    def construct_message(self, here, resetter, view, duration, waited, force):
-        str_here = "Already Here" if here else "Needed Navigation"
+    def location_cached(self):
+        """Whether the browser is still where this step navigated to the last time
+
+        That is when nothing was clicked or typed since and the URL and the title of the page
+        did not change, which is confirmed in a single script call. The page can still change
+        without the clicks and keys seen, e.g. by selecting options, scripts or AJAX updates, so a
+        hit is only taken once the view of the step is displayed.
+        """
+        if self.VIEW is None:
+            return False
+        browser = self.appliance.browser.widgetastic
+        location = browser.nav_location
+        if location is None or location[0] is not self.obj or location[1] != self._name:
+            return False
+        try:
+            return browser.location_signature == location[2] and self.view.is_displayed
+        except Exception:
+            return False
+
+    def remember_location(self):
+        browser = self.appliance.browser.widgetastic
+        try:
+            browser.nav_location = (self.obj, self._name, browser.location_signature)
+        except Exception:
+            browser.nav_location = None
+
+    def construct_message(self, here, resetter, view, duration, waited, force, cached=False):
+        if here:
+            str_here = "Location Cached" if cached else "Already Here"
+        else:
+            str_here = "Needed Navigation"
         str_resetter = "Resetter Used" if resetter else "No Resetter"
         str_view = "View Returned" if view else "No View Available"
         str_waited = "Waited on View" if waited else "No Wait on View"
@@ -538,7 +662,8 @@ class CFMENavigateStep(NavigateStep):
         )
 
     def go(self, _tries=0, *args, **kwargs):
-        nav_args = {'use_resetter': True, 'wait_for_view': 10, 'force': False}
+        nav_args = {
+            'use_resetter': True, 'wait_for_view': 10, 'force': False, 'use_cache': True}
         self.log_message("Beginning Navigation...", level="info")
         start_time = time.time()
         if _tries > 2:
@@ -556,15 +681,22 @@ class CFMENavigateStep(NavigateStep):
         resetter_used = False
         waited = False
         force_used = False
-        try:
-            here = self.check_for_badness(self.am_i_here, _tries, nav_args, *args, **kwargs)
-        except NotImplementedError:
-            nav_args['wait_for_view'] = 0
-            self.log_message(
-                "is_displayed not implemented for {} view".format(self.VIEW or ""), level="warning")
-        except Exception as e:
-            self.log_message(
-                f"Exception raised [{e}] whilst checking if already here", level="error")
+        # Destinations with arguments are not cached
+        cacheable = self.CACHE_LOCATION and nav_args['use_cache'] and not args and not kwargs
+        cached = cacheable and not nav_args['force'] and self.location_cached()
+        if cached:
+            here = True
+        else:
+            try:
+                here = self.check_for_badness(self.am_i_here, _tries, nav_args, *args, **kwargs)
+            except NotImplementedError:
+                nav_args['wait_for_view'] = 0
+                self.log_message(
+                    "is_displayed not implemented for {} view".format(self.VIEW or ""),
+                    level="warning")
+            except Exception as e:
+                self.log_message(
+                    f"Exception raised [{e}] whilst checking if already here", level="error")
         if not here or nav_args['force']:
             if nav_args['force']:
                 force_used = True
@@ -585,15 +717,20 @@ class CFMENavigateStep(NavigateStep):
         self.check_for_badness(self.post_navigate, _tries, nav_args, *args, **kwargs)
         view = self.view if self.VIEW is not None else None
         duration = int((time.time() - start_time) * 1000)
-        if view and nav_args['wait_for_view'] and not os.environ.get(
+        if view and nav_args['wait_for_view'] and not cached and not os.environ.get(
                 'DISABLE_NAVIGATE_ASSERT', False):
             waited = True
             wait_for(
                 lambda: view.is_displayed, num_sec=nav_args['wait_for_view'],
                 message=f"Waiting for view [{view.__class__.__name__}] to display"
             )
+        if cacheable:
+            self.remember_location()
+        else:
+            self.appliance.browser.widgetastic.nav_location = None
         self.log_message(
-            self.construct_message(here, resetter_used, view, duration, waited, force_used),
+            self.construct_message(
+                here, resetter_used, view, duration, waited, force_used, cached=cached),
             level="info"
         )
         return view
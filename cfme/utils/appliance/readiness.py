@@ -0,0 +1,219 @@
+"""
+adaptive readiness probing of an appliance
+
+Waiting for an appliance used fixed delays of 5 to 10 seconds between checks, which adds idle
+time to every restart. A :py:class:`ReadinessProber` polls with exponentially growing delays
+while even the cheap TCP check fails (the appliance is far from ready, e.g. rebooting), then
+with a tight delay once the port accepts connections. The UI, API and DB checks of one cycle
+share a single HTTP session, and every appliance has one prober
+(:py:attr:`IPAppliance.readiness <cfme.utils.appliance.IPAppliance.readiness>`), so concurrent
+waiters reuse each other's probes instead of stampeding the appliance.
+
+The measured time to ready is kept in :py:attr:`ReadinessProber.timings` and appended to
+``log/readiness.jsonl`` for perf tracking.
+"""
+import json
+import socket
+import threading
+from time import monotonic
+from time import sleep
+from time import time
+
+import attr
+import requests
+
+from cfme.utils import conf
+from cfme.utils.log import create_sublogger
+from cfme.utils.path import log_path
+from cfme.utils.wait import TimedOutError
+
+logger = create_sublogger('readiness')
+
+#: Checks a prober knows, see :py:meth:`ReadinessProber.probe`
+TARGETS = ('ssh', 'ui', 'api', 'db')
+
+
+def backoff_delays(initial=0.5, factor=2, maximum=8):
+    """Yields exponentially growing delays up to ``maximum``"""
+    delay = initial
+    while True:
+        yield delay
+        delay = min(delay * factor, maximum)
+
+
+@attr.s
+class ProbeResult:
+    """Result of one probe cycle, a check that was not done is ``None``"""
+    tcp = attr.ib()
+    checks = attr.ib(factory=dict)
+    finished = attr.ib(default=None)
+
+    @property
+    def ready(self):
+        return self.tcp and all(self.checks.values())
+
+
+@attr.s
+class ReadinessTiming:
+    """Measured time from the start of waiting until the targets were ready"""
+    hostname = attr.ib()
+    targets = attr.ib()
+    seconds = attr.ib()
+    probes = attr.ib()
+
+
+class ReadinessProber:
+    """
+    readiness checks of one appliance shared by all the waiters
+
+    Args:
+        appliance: the :py:class:`IPAppliance <cfme.utils.appliance.IPAppliance>` to probe
+        tight_delay: delay between probes once the port accepts connections
+        max_delay: maximum delay between probes while it does not
+    """
+
+    def __init__(self, appliance, tight_delay=1, max_delay=8):
+        self.appliance = appliance
+        self.tight_delay = tight_delay
+        self.max_delay = max_delay
+        self.timings = []
+        self._lock = threading.Lock()
+        self._last = {}
+        self._session = None
+
+    @property
+    def session(self):
+        """HTTP session kept between probes, so the connection is reused once it works"""
+        if self._session is None:
+            self._session = requests.Session()
+            self._session.verify = False
+        return self._session
+
+    def _tcp(self, port):
+        try:
+            socket.create_connection((self.appliance.hostname, port), timeout=3).close()
+        except OSError:
+            return False
+        return True
+
+    def _get(self, url, **kwargs):
+        try:
+            return self.session.get(url, timeout=15, **kwargs)
+        except requests.exceptions.RequestException as e:
+            logger.debug('%s not reachable: %s', url, e)
+            # Drop the connections, they may belong to the appliance before a restart
+            self.session.close()
+            return None
+
+    def check_ui(self):
+        # If we don't request text/html, there is a short window during the appliance HA DB
+        # failover when the evmserverd is not in OK state but returns HTTP 200, browsers
+        # request text/html as well
+        response = self._get(self.appliance.url, headers={'Accept': 'text/html'})
+        return response is not None and response.status_code == 200
+
+    def check_api(self):
+        response = self._get(
+            self.appliance.url_path('/api'),
+            auth=(conf.credentials['default']['username'],
+                  conf.credentials['default']['password']))
+        if response is None or response.status_code != 200:
+            return False
+        try:
+            return bool(response.json()['server_info']['server_href'])
+        except (ValueError, KeyError, TypeError):
+            return False
+
+    def check_db(self):
+        try:
+            return self.appliance.db.is_online
+        except Exception as e:
+            logger.debug('Database check failed: %s', e)
+            return False
+
+    def probe(self, targets):
+        """Runs one probe cycle, the checks stop at the first one failing
+
+        ``ssh`` checks the ssh port, ``ui`` and ``api`` the UI port first, ``db`` is checked
+        over ssh.
+        """
+        unknown = set(targets) - set(TARGETS)
+        if unknown:
+            raise ValueError(f'Unknown readiness targets {", ".join(sorted(unknown))}')
+        if 'ssh' in targets:
+            tcp = self.appliance.is_ssh_running
+        elif 'ui' in targets or 'api' in targets:
+            tcp = self._tcp(self.appliance.ui_port)
+        else:
+            tcp = True
+        result = ProbeResult(tcp)
+        for target in targets:
+            if not result.ready:
+                break
+            if target != 'ssh':
+                result.checks[target] = getattr(self, f'check_{target}')()
+        result.finished = monotonic()
+        return result
+
+    def shared_probe(self, targets):
+        """Probes, or returns the result of a probe that finished while waiting for the lock"""
+        targets = tuple(targets)
+        requested = monotonic()
+        with self._lock:
+            last = self._last.get(targets)
+            if last is not None and last.finished >= requested:
+                return last
+            result = self._last[targets] = self.probe(targets)
+            return result
+
+    def poll(self, func, timeout, message, handle_exception=False):
+        """Polls ``func`` with exponentially growing delays until it returns a truthy value"""
+        start = monotonic()
+        for delay in backoff_delays(maximum=self.max_delay):
+            try:
+                result = func()
+            except Exception:
+                if not handle_exception:
+                    raise
+                result = None
+            if result:
+                return result, monotonic() - start
+            if monotonic() - start + delay > timeout:
+                raise TimedOutError(f'Could not do {message} in {timeout} seconds')
+            sleep(delay)
+
+    def wait(self, targets, timeout=900):
+        """Waits until all the targets are ready
+
+        Returns:
+            :py:class:`ReadinessTiming` of the wait
+        """
+        targets = tuple(targets)
+        start = monotonic()
+        delays = backoff_delays(maximum=self.max_delay)
+        probes = 0
+        while True:
+            result = self.shared_probe(targets)
+            probes += 1
+            if result.ready:
+                return self._record(targets, monotonic() - start, probes)
+            # Far from ready while even the port is closed, close to it once it is open
+            delay = self.tight_delay if result.tcp else next(delays)
+            if monotonic() - start + delay > timeout:
+                raise TimedOutError(
+                    'Appliance {} not ready ({}) in {} seconds, last probe {}'.format(
+                        self.appliance.hostname, ', '.join(targets), timeout, result))
+            sleep(delay)
+
+    def _record(self, targets, seconds, probes):
+        timing = ReadinessTiming(self.appliance.hostname, list(targets), seconds, probes)
+        self.timings.append(timing)
+        logger.info(
+            '%s ready (%s) after %.1fs, %d probes',
+            timing.hostname, ', '.join(targets), seconds, probes)
+        try:
+            with log_path.join('readiness.jsonl').open('a') as f:
+                f.write(json.dumps(dict(attr.asdict(timing), time=time())) + '\n')
+        except OSError:
+            logger.exception('Could not store the time to ready')
+        return timing
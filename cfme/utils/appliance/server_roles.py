@@ -0,0 +1,101 @@
+"""
+server role state of an appliance read from its database
+
+Changing the server roles only PATCHes the settings, the server applies them on its own. Waiting
+for that used to poll every 15 seconds, with two queries and a REST call for the server id in
+every poll. :py:class:`ServerRoleTracker` reads the roles of the server in one joined query, keeps
+the server id and the hidden roles for as long as the database client is the same, and polls
+with a short delay, evaluating the condition only when the assigned roles changed.
+"""
+from sqlalchemy import and_
+
+from cfme.utils.wait import wait_for_change
+
+#: Roles never reported in the server roles
+HIDDEN_ROLES = {'database_owner', 'vdi_inventory'}
+#: Roles reported only when storage is enabled
+STORAGE_ROLE_PREFIX = 'storage'
+STORAGE_ROLES = {'vmdb_storage_bridge'}
+
+
+class ServerRoleTracker:
+    """
+    server roles of the appliance's server, see
+    :py:attr:`IPAppliance.server_roles <cfme.utils.appliance.IPAppliance.server_roles>`
+
+    Args:
+        appliance: the :py:class:`IPAppliance <cfme.utils.appliance.IPAppliance>`
+        delay: seconds between polls while waiting
+    """
+
+    def __init__(self, appliance, delay=1):
+        self.appliance = appliance
+        self.delay = delay
+        self._db_client = None
+        self._server_id = None
+        self._storage_enabled = None
+
+    def _client(self):
+        """Returns the database client, the server id is looked up again for another one"""
+        client = self.appliance.db.client
+        if client is not self._db_client:
+            # e.g. the appliance database was configured again
+            self._db_client = client
+            self._server_id = self.appliance.evm_id
+        return client
+
+    @property
+    def storage_enabled(self):
+        if self._storage_enabled is None:
+            self._storage_enabled = self.appliance.is_storage_enabled
+        return self._storage_enabled
+
+    def is_hidden(self, role_name):
+        if role_name in HIDDEN_ROLES:
+            return True
+        return not self.storage_enabled and (
+            role_name.startswith(STORAGE_ROLE_PREFIX) or role_name in STORAGE_ROLES)
+
+    def active_roles(self):
+        """Returns ``(all role names, active role names)`` of the server, in one query"""
+        client = self._client()
+        sr = client['server_roles']
+        asr = client['assigned_server_roles']
+        query = client.session\
+            .query(sr.name, asr.id)\
+            .outerjoin(asr, and_(
+                asr.server_role_id == sr.id,
+                asr.miq_server_id == self._server_id,
+                asr.active == True))  # noqa
+        all_roles = set()
+        active_roles = set()
+        for name, assigned_id in query:
+            all_roles.add(name)
+            if assigned_id is not None:
+                active_roles.add(name)
+        return frozenset(all_roles), frozenset(active_roles)
+
+    def roles_dict(self, all_roles, active_roles):
+        return {
+            name: name in active_roles
+            for name in all_roles if not self.is_hidden(name)}
+
+    def roles(self):
+        """Returns a dictionary of the server roles, see :py:attr:`IPAppliance.server_roles`"""
+        return self.roles_dict(*self.active_roles())
+
+    def wait(self, condition, timeout=300, message='server roles'):
+        """Waits until ``condition(roles)`` holds for the server roles dictionary
+
+        Returns:
+            the server roles dictionary that fulfilled the condition
+        """
+        state = wait_for_change(
+            self.active_roles, lambda state: condition(self.roles_dict(*state)),
+            timeout=timeout, delay=self.delay, message=message)
+        return self.roles_dict(*state)
+
+    def wait_for_roles(self, roles, timeout=300):
+        """Waits until the server roles are exactly ``roles``"""
+        return self.wait(lambda current: current == roles, timeout=timeout,
+                         message='server roles set')
@@ -0,0 +1,78 @@
+"""
+state of the VMs of an appliance read from its database
+
+Waiting for a VM state used to read it in the UI every 30 seconds, refreshing the relationships
+of the VM after every check that failed, and waiting for a VM to appear or disappear refreshed the
+browser and the whole provider every 5 seconds. :py:class:`VMStateWatcher` reads the rows of the
+VM in one query of the ``vms`` table every couple of seconds, so a waiter returns as soon as the
+state changed, evaluates the condition only when the rows changed and asks for a refresh only
+after a backoff, doubled after every refresh.
+"""
+from collections import namedtuple
+
+from cfme.utils.log import logger
+from cfme.utils.wait import wait_for_change
+
+#: A row of the ``vms`` table, templates included
+VMRow = namedtuple('VMRow', ['id', 'name', 'ems_id', 'ems_ref', 'power_state', 'storage_id'])
+
+#: Longest time between two refreshes while waiting
+MAX_BACKOFF = 300
+
+
+def vm_state(row):
+    """Returns the state of the VM the way the UI shows it on the quadicon"""
+    if row.ems_id is None:
+        return 'orphaned' if row.storage_id is not None else 'archived'
+    return row.power_state
+
+
+class VMStateWatcher:
+    """
+    VMs of the appliance, see :py:meth:`BaseVM.wait_for_vm_state_change
+    <cfme.common.vm.BaseVM.wait_for_vm_state_change>`
+
+    Args:
+        appliance: the :py:class:`IPAppliance <cfme.utils.appliance.IPAppliance>`
+        delay: seconds between polls while waiting
+        backoff: seconds the condition has to fail for before the first refresh
+    """
+
+    def __init__(self, appliance, delay=2, backoff=60):
+        self.appliance = appliance
+        self.delay = delay
+        self.backoff = backoff
+
+    def rows(self, name):
+        """Returns the rows of the VMs named ``name``, ordered by id, in one query"""
+        client = self.appliance.db.client
+        vms = client['vms']
+        query = client.session\
+            .query(vms.id, vms.name, vms.ems_id, vms.ems_ref, vms.power_state, vms.storage_id)\
+            .filter(vms.name == name)\
+            .order_by(vms.id)
+        return tuple(VMRow(*row) for row in query)
+
+    def wait(self, name, condition, timeout=300, refresh=None, message=None):
+        """Waits until ``condition(rows)`` holds for the rows of the VMs named ``name``
+
+        Args:
+            refresh: called with the rows when the condition failed for the backoff
+        Returns:
+            the rows that fulfilled the condition
+        """
+        message = message or f'state of VM {name}'
+        backoff = self.backoff
+        next_refresh = backoff
+
+        def idle(rows, elapsed):
+            nonlocal backoff, next_refresh
+            if refresh is not None and elapsed >= next_refresh:
+                logger.info('Refreshing for %s after %.1fs', message, elapsed)
+                refresh(rows)
+                backoff = min(2 * backoff, MAX_BACKOFF)
+                next_refresh = elapsed + backoff
+
+        return wait_for_change(
+            lambda: self.rows(name), condition, timeout=timeout, delay=self.delay,
+            message=message, idle=idle)
@@ -169,6 +169,17 @@ class BZ(Blocker):
         super().__init__(**kwargs)
         self.bug_id = int(bug_id)
 
+    @classmethod
+    def prefetch(cls, bug_ids):
+        """Fetches the bugs and their variants in batches, so resolving them needs no requests."""
+        bugzilla = cls.bugzilla
+        if bugzilla is None or not bug_ids:
+            return
+        try:
+            bugzilla.prefetch(bug_ids)
+        except Exception:
+            logger.exception("Could not prefetch the bugs, they will be fetched when needed")
+
     @property
     def data(self):
         return self.bugzilla.resolve_blocker(
@@ -258,6 +269,24 @@ class BZ(Blocker):
         return f"Bugzilla bug {self.get_bug_url()} (or one of its copies)"
 
 
+def bugzilla_ids(blockers):
+    """Returns the ids of the Bugzilla bugs among blockers in any form :py:meth:`Blocker.parse`
+    and the ``blockers`` meta accept."""
+    ids = set()
+    for blocker in blockers:
+        if isinstance(blocker, BZ):
+            ids.add(blocker.bug_id)
+        elif isinstance(blocker, int):
+            ids.add(blocker)
+        elif isinstance(blocker, str) and blocker.startswith("BZ#"):
+            try:
+                ids.add(int(blocker[3:]))
+            except ValueError:
+                # Blocker.parse reports it when the blocker is used
+                pass
+    return ids
+
+
 class JIRA(Blocker):
     @classproperty
     def jira(cls):  # noqa
@@ -1,9 +1,11 @@
 """Core functionality for starting, restarting, and stopping a selenium browser."""
 import atexit
+import copy
 import json
 import os
 import threading
 import time
+from collections import defaultdict
 from collections import namedtuple
 from shutil import rmtree
 from string import Template
@@ -34,6 +36,7 @@ from cfme.utils.path import data_path
 
 
 FIVE_MINUTES = 5 * 60
+TEN_MINUTES = 10 * 60
 THIRTY_SECONDS = 30
 
 BROWSER_ERRORS = URLError, WebDriverException
@@ -171,6 +174,20 @@ class BrowserFactory:
             browser.quit()
             clear_property_cache(self, '_firefox_profile')
 
+    def clone(self):
+        """Returns a new factory to create and close a browser kept aside of this factory's one
+
+        The clone gets its own copy of the browser arguments and its own firefox profile, so
+        closing a browser of one factory doesn't reset the profile of the other's.
+        """
+        factory = copy.copy(self)
+        factory.browser_kwargs = copy.deepcopy({
+            key: value for key, value in self.browser_kwargs.items()
+            if key not in ('browser_profile', 'firefox_profile')})
+        clear_property_cache(factory, '_firefox_profile')
+        factory._add_missing_options()
+        return factory
+
 
 class WharfFactory(BrowserFactory):
     def __init__(self, webdriver_class, browser_kwargs, wharf):
@@ -226,10 +243,130 @@ class WharfFactory(BrowserFactory):
         finally:
             self.wharf.checkin()
 
+    def clone(self):
+        # every browser needs a container of its own, __init__ is not run again as it would
+        # extend the chrome options a second time
+        factory = super().clone()
+        factory.wharf = Wharf(self.wharf.wharf_url)
+        atexit.register(factory.wharf.checkin)
+        return factory
+
+
+def log_in_default_user(browser):
+    """Logs a fresh browser in to the appliance as the default user"""
+    browser.find_element_by_name('user_name').send_keys(
+        conf.credentials['default']['username'])
+    browser.find_element_by_name('user_password').send_keys(
+        conf.credentials['default']['password'])
+    browser.find_element_by_id('login').click()
+
+
+class BrowserPool:
+    """Keeps browsers started in the background, ready to replace the browser of the manager
+
+    The browsers are started by clones of the factory in threads, per url key asked for, and the
+    pool is refilled every time a browser is taken out of it. Browsers found dead or idle for
+    longer than ``max_idle`` seconds, when the appliance may have ended their session, are
+    closed instead of used.
+
+    Args:
+        factory: the :py:class:`BrowserFactory` of the manager
+        size: number of browsers kept ready per url key
+        warmup: callable getting every new browser, e.g. :py:func:`log_in_default_user`
+        max_idle: seconds a browser stays usable in the pool
+    """
+
+    def __init__(self, factory, size=1, warmup=None, max_idle=TEN_MINUTES):
+        self.factory = factory
+        self.size = size
+        self.warmup = warmup
+        self.max_idle = max_idle
+        self._ready = defaultdict(list)
+        self._starting = defaultdict(int)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def take(self, url_key):
+        """Returns a ``(factory, browser)`` started for the url key, or ``None`` if there is none
+
+        The pool is refilled in the background either way.
+        """
+        try:
+            while True:
+                with self._lock:
+                    if not self._ready[url_key]:
+                        return None
+                    factory, browser, started = self._ready[url_key].pop(0)
+                if time.time() - started < self.max_idle and self._is_alive(browser):
+                    log.info('using a browser started in the background for %r', url_key)
+                    return factory, browser
+                log.info('discarding a stale browser of the pool')
+                self._close(factory, browser)
+        finally:
+            self.fill(url_key)
+
+    def fill(self, url_key):
+        """Starts browsers for the url key in the background up to the size of the pool"""
+        with self._lock:
+            if self._closed:
+                return
+            missing = self.size - len(self._ready[url_key]) - self._starting[url_key]
+            self._starting[url_key] += max(missing, 0)
+        for _ in range(missing):
+            thread = threading.Thread(target=self._start, args=(url_key,))
+            thread.daemon = True
+            thread.start()
+
+    def clear(self):
+        """Closes all the browsers of the pool and stops refilling it"""
+        with self._lock:
+            self._closed = True
+            ready = [entry for entries in self._ready.values() for entry in entries]
+            self._ready.clear()
+        for factory, browser, _ in ready:
+            self._close(factory, browser)
+
+    def _start(self, url_key):
+        factory = self.factory.clone()
+        browser = None
+        try:
+            browser = factory.create(url_key)
+            if self.warmup is not None:
+                self.warmup(browser)
+        except Exception:
+            log.exception('failed to start a browser for the pool')
+            self._close(factory, browser)
+            browser = None
+        with self._lock:
+            self._starting[url_key] -= 1
+            if browser is not None and not self._closed:
+                self._ready[url_key].append((factory, browser, time.time()))
+                return
+        if browser is not None:
+            self._close(factory, browser)
+
+    @staticmethod
+    def _is_alive(browser):
+        try:
+            browser.current_url
+        except UnexpectedAlertPresentException:
+            return True
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _close(factory, browser):
+        try:
+            factory.close(browser)
+        except Exception:
+            log.exception('failed to close a browser of the pool')
+
 
 class BrowserManager:
-    def __init__(self, browser_factory):
+    def __init__(self, browser_factory, pool=None):
         self.factory = browser_factory
+        self.pool = pool
         self.browser = None
         self._browser_renew_thread = None
 
@@ -243,6 +380,16 @@ class BrowserManager:
 
         browser_kwargs = browser_conf.get('webdriver_options', {})
 
+        def pool(factory):
+            # browsers started in advance, ``pool_size: 0`` (the default) starts them on demand
+            pool_size = browser_conf.get('pool_size', 0)
+            if not pool_size:
+                return None
+            warmup = log_in_default_user if browser_conf.get('pool_login', True) else None
+            pool = BrowserPool(factory, size=pool_size, warmup=warmup)
+            atexit.register(pool.clear)
+            return pool
+
         if 'webdriver_wharf' in browser_conf:
             wharf = Wharf(browser_conf['webdriver_wharf'])
             atexit.register(wharf.checkin)
@@ -251,7 +398,8 @@ class BrowserManager:
                     'desired_capabilities']['browserName'].lower() == 'firefox':
                 browser_kwargs['desired_capabilities']['marionette'] = True
                 browser_kwargs['desired_capabilities']['acceptInsecureCerts'] = True
-            return cls(WharfFactory(webdriver_class, browser_kwargs, wharf))
+            factory = WharfFactory(webdriver_class, browser_kwargs, wharf)
+            return cls(factory, pool=pool(factory))
         else:
             if webdriver_name.lower() == "remote":
                 if browser_conf[
@@ -270,7 +418,8 @@ class BrowserManager:
                     browser_kwargs['desired_capabilities']['marionette'] = True
                     browser_kwargs['desired_capabilities']['acceptInsecureCerts'] = True
 
-            return cls(BrowserFactory(webdriver_class, browser_kwargs))
+            factory = BrowserFactory(webdriver_class, browser_kwargs)
+            return cls(factory, pool=pool(factory))
 
     def _is_alive(self):
         log.debug("alive check")
@@ -334,7 +483,12 @@ class BrowserManager:
         log.info('starting browser for %r', url_key)
         assert self.browser is None
 
-        self.browser = self.factory.create(url_key=url_key)
+        warm = self.pool.take(url_key) if self.pool is not None else None
+        if warm is not None:
+            # the browser is closed by the factory which started it
+            self.factory, self.browser = warm
+        else:
+            self.browser = self.factory.create(url_key=url_key)
         return self.browser
 
 
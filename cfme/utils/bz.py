@@ -1,7 +1,13 @@
+import hashlib
+import os
+import pickle
 import re
+import tempfile
+import time
 from collections.abc import Sequence
 
 from bugzilla import Bugzilla as _Bugzilla
+from bugzilla.bug import Bug as _Bug
 from cached_property import cached_property
 from miq_version import LATEST
 from miq_version import Version
@@ -13,6 +19,56 @@ from cfme.utils.log import logger
 from cfme.utils.version import current_version
 
 NONE_FIELDS = {"---", "undefined", "unspecified"}
+# How many bugs are requested in one getbugs call when prefetching
+PREFETCH_CHUNK_SIZE = 200
+DEFAULT_CACHE_TTL = 3600
+
+
+class BugCache:
+    """On-disk cache of raw bug data, shared by the master and the slaves of a run.
+
+    Each bug is stored in its own file, which is written atomically. A bug is fresh for ``ttl``
+    seconds after it was written.
+    """
+    def __init__(self, directory, ttl=DEFAULT_CACHE_TTL):
+        self.directory = directory
+        self.ttl = ttl
+
+    @classmethod
+    def for_url(cls, url, cache_dir=None, ttl=DEFAULT_CACHE_TTL):
+        if cache_dir is None:
+            cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+            cache_dir = os.path.join(cache_home, 'cfme', 'bugzilla')
+        url_hash = hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]
+        return cls(os.path.join(cache_dir, url_hash), ttl=ttl)
+
+    def _path(self, bug_id):
+        return os.path.join(self.directory, f'{int(bug_id)}.pickle')
+
+    def get(self, bug_id):
+        """Returns the raw data of the bug, or ``None`` if it is not cached or expired."""
+        path = self._path(bug_id)
+        try:
+            if time.time() - os.stat(path).st_mtime > self.ttl:
+                return None
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.warning('Could not read the cached bug %s', bug_id)
+            return None
+
+    def put(self, bug_id, data):
+        try:
+            # Bugs may be private, keep them for the current user only
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(bug_id))
+        except Exception:
+            logger.exception('Could not cache the bug %s', bug_id)
 
 
 class Product:
@@ -53,8 +109,10 @@ class Bugzilla:
         # __kwargs passed to _Bugzilla instantiation, pop our args out
         self.__product = kwargs.pop("product", None)
         self.__config_options = kwargs.pop('config_options', {})
+        self.__disk_cache = kwargs.pop('disk_cache', None)
         self.__kwargs = kwargs
         self.__bug_cache = {}
+        self.__missing_bugs = set()
         self.__product_cache = {}
         self.user = kwargs.get('user')
         self.password = kwargs.get('password')
@@ -88,12 +146,15 @@ class Bugzilla:
             url = 'https://bugzilla.redhat.com/xmlrpc.cgi'
             logger.warning("No Bugzilla URL specified in conf, using default: %s", url)
         cred_key = bz_conf.get("credentials")
+        cache_ttl = bz_conf.get('cache_ttl', DEFAULT_CACHE_TTL)
         bz_kwargs = dict(
             url=url,
             cookiefile=None,
             tokenfile=None,
             product=bz_conf.get("bugzilla", {}).get("product"),
-            config_options=bz_conf)
+            config_options=bz_conf,
+            disk_cache=BugCache.for_url(
+                url, cache_dir=bz_conf.get('cache_dir'), ttl=cache_ttl) if cache_ttl else None)
         if cred_key:
             bz_creds = credentials.get(cred_key, {})
             if bz_creds.get('username'):
@@ -131,12 +192,73 @@ class Bugzilla:
         else:
             return Version(self.__config_options.get("upstream_version", Version.latest().vstring))
 
+    def _cache_bug(self, bug):
+        self.__bug_cache[bug.id] = BugWrapper(self, bug)
+        if self.__disk_cache is not None:
+            self.__disk_cache.put(bug.id, bug.__getstate__())
+
+    def _load_cached_bug(self, id):
+        if self.__disk_cache is None:
+            return False
+        data = self.__disk_cache.get(id)
+        if data is None:
+            return False
+        self.__bug_cache[id] = BugWrapper(self, _Bug(self.bugzilla, dict=data))
+        return True
+
     def get_bug(self, id):
         id = int(id)
-        if id not in self.__bug_cache:
-            self.__bug_cache[id] = BugWrapper(self, self.bugzilla.getbug(id))
+        if id not in self.__bug_cache and not self._load_cached_bug(id):
+            self._cache_bug(self.bugzilla.getbug(id))
         return self.__bug_cache[id]
 
+    def _fetch_bugs(self, ids):
+        """Makes sure the bugs are cached, fetching the missing ones with batched getbugs calls.
+
+        Returns:
+            :py:class:`set` of the ids that are now cached
+        """
+        missing = sorted(
+            id for id in map(int, ids)
+            if id not in self.__bug_cache and id not in self.__missing_bugs and
+            not self._load_cached_bug(id))
+        for i in range(0, len(missing), PREFETCH_CHUNK_SIZE):
+            chunk = missing[i:i + PREFETCH_CHUNK_SIZE]
+            for id, bug in zip(chunk, self.bugzilla.getbugs(chunk)):
+                if bug is None:
+                    # Does not exist or is not accessible, get_bug raises the error if requested
+                    self.__missing_bugs.add(id)
+                else:
+                    self._cache_bug(bug)
+        return {int(id) for id in ids if int(id) in self.__bug_cache}
+
+    def prefetch(self, ids):
+        """Fetches the bugs and all their variants (see :py:meth:`get_bug_variants`).
+
+        The variant graph is walked level by level, each level takes one batched getbugs call for
+        the bugs and one for the bugs they block, which are needed to find their copies.
+        """
+        to_expand = set(map(int, ids))
+        expanded = set()
+        while to_expand:
+            blocks = {}
+            next_expand = set()
+            for id in self._fetch_bugs(to_expand):
+                bug = self.__bug_cache[id]
+                expanded.add(id)
+                if bug.status == "CLOSED" and bug.resolution == "DUPLICATE":
+                    next_expand.add(bug.dupe_of)
+                    continue
+                if bug.copy_of:
+                    next_expand.add(bug.copy_of)
+                blocks[id] = bug._bug.blocks
+            blocking = self._fetch_bugs({b for ids in blocks.values() for b in ids})
+            for id, blocked_ids in blocks.items():
+                next_expand.update(
+                    b for b in blocked_ids
+                    if b in blocking and self.__bug_cache[b].copy_of == id)
+            to_expand = next_expand - expanded
+
     def get_bug_variants(self, id):
         if isinstance(id, BugWrapper):
             bug = id
@@ -8,7 +8,11 @@ dict and will provide you with whatever you ask for with no limitations.
 
 The main clue to know what is limited by the filters and what isn't is the 'filters' parameter.
 """
+import hashlib
+import json
 import operator
+import re
+from collections import defaultdict
 from collections import OrderedDict
 from collections.abc import Mapping
 from copy import copy
@@ -26,6 +30,12 @@ global_filters = {}
 # so that we don't re-generate mgmt classes for the same exact provider
 PROVIDER_MGMT_CACHE = {}
 
+# Session wide ProviderCatalogue, see get_provider_catalogue
+PROVIDER_CATALOGUE = None
+
+# Name of a child manager ems, e.g. 'provider name Network Manager'
+CHILD_MANAGER_NAME = re.compile(r'^(?P<parent>.+) [A-Za-z]+ Manager$')
+
 
 def load_setuptools_entrypoints():
     """ Load modules from querying the specified setuptools entrypoint name."""
@@ -230,6 +240,29 @@ class ProviderFilter:
     def copy(self):
         return copy(self)
 
+    @property
+    def signature(self):
+        """Hashable description of the filter, equal for filters that filter the same way."""
+        return (
+            type(self), _freeze(self.keys), _freeze(self.classes), _freeze(self.required_fields),
+            _freeze(self.required_tags), _freeze(self.required_flags), self.restrict_version,
+            self.inverted, self.conjunctive)
+
+
+def _freeze(value):
+    """Turns (nested) lists, sets and dicts into tuples so the value can be hashed.
+
+    The container type is kept, filters treat a tuple in ``required_fields`` differently from a
+    list.
+    """
+    if isinstance(value, Mapping):
+        return dict, tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return type(value), tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset, frozenset(_freeze(item) for item in value)
+    return value
+
 
 # Only providers without the 'disabled' tag
 global_filters['enabled_only'] = ProviderFilter(required_tags=['disabled'], inverted=True)
@@ -262,6 +295,106 @@ def list_providers(filters=None, use_global_filters=True, appliance=None):
     return providers
 
 
+class ProviderCatalogue:
+    """ Provider keys passing filters, memoized per filter signature
+
+    Collection time parametrization filters the same providers with the same filters for every
+    test function, :py:func:`list_providers` would build all the crud objects again and evaluate
+    every filter on them every time. The crud objects the filters are evaluated on are built once
+    and never handed out, as a test changing one would change it for every other test, only the
+    keys are memoized.
+
+    Args:
+        data: Provider yaml data, ``providers_data`` by default
+    """
+    def __init__(self, data=None):
+        self.data = providers_data if data is None else data
+        self._providers = None
+        self._index = None
+        self._keys_by_name = None
+        self._filter_results = {}
+
+    @property
+    def providers(self):
+        """ :py:class:`OrderedDict` of provider key to the crud object the filters are run on """
+        if self._providers is None:
+            self._providers = OrderedDict((key, get_crud(key)) for key in self.data)
+        return self._providers
+
+    @property
+    def index(self):
+        """ Provider keys indexed by ``(type, category)``, with the version of each provider
+
+        The version is ``None`` for providers that have none in the yamls.
+        """
+        if self._index is None:
+            index = defaultdict(list)
+            for key, provider in self.providers.items():
+                index[provider.type, provider.category].append(
+                    (key, provider.data.get('version')))
+            self._index = dict(index)
+        return self._index
+
+    def key_for_ems_name(self, ems_name):
+        """ Returns the key of the provider an ems on an appliance belongs to, ``None`` if unknown
+
+        The name is authoritative, an ems is either the provider itself or one of its child
+        managers, e.g. ``'<provider name> Network Manager'``. Only the yaml data is used, no crud
+        object is built.
+        """
+        if self._keys_by_name is None:
+            keys_by_name = {}
+            for key, prov_data in self.data.items():
+                if prov_data.get('name'):
+                    # The first provider of a name wins, like in a search through the list
+                    keys_by_name.setdefault(prov_data['name'], key)
+            self._keys_by_name = keys_by_name
+        try:
+            return self._keys_by_name[ems_name]
+        except KeyError:
+            match = CHILD_MANAGER_NAME.match(ems_name)
+            return self._keys_by_name.get(match.group('parent')) if match else None
+
+    def passing_keys(self, prov_filter):
+        """ Returns a frozenset of keys of the providers that pass the filter """
+        try:
+            signature = prov_filter.signature
+            return self._filter_results[signature]
+        except KeyError:
+            keys = frozenset(key for key, provider in self.providers.items()
+                             if prov_filter(provider))
+            self._filter_results[signature] = keys
+            return keys
+        except (AttributeError, TypeError):
+            # Not a ProviderFilter or its signature can't be hashed
+            return frozenset(key for key, provider in self.providers.items()
+                             if prov_filter(provider))
+
+    def keys(self, filters=None, use_global_filters=True):
+        """ Returns the list of keys of the providers passing the filters, see
+        :py:func:`list_providers`
+        """
+        filters = filters or []
+        if use_global_filters:
+            filters = filters + list(global_filters.values())
+        keys = set(self.providers)
+        for prov_filter in filters:
+            keys &= self.passing_keys(prov_filter)
+        return [key for key in self.providers if key in keys]
+
+    def list_providers(self, filters=None, use_global_filters=True):
+        """ Same as :py:func:`list_providers`, the crud objects returned are built anew """
+        return [get_crud(key) for key in self.keys(filters, use_global_filters)]
+
+
+def get_provider_catalogue():
+    """ Returns the session wide :py:class:`ProviderCatalogue` """
+    global PROVIDER_CATALOGUE
+    if PROVIDER_CATALOGUE is None:
+        PROVIDER_CATALOGUE = ProviderCatalogue()
+    return PROVIDER_CATALOGUE
+
+
 def list_providers_by_class(prov_class, use_global_filters=True):
     """ Lists provider crud objects of a specific class (or its subclasses), global filter optional
 
@@ -342,7 +475,25 @@ def get_crud_by_name(provider_name):
     raise NameError(f"Could not find provider {provider_name}")
 
 
-def get_mgmt(provider_key, providers=None, credentials=None):
+def get_mgmt_credentials(provider_data):
+    """ Resolves the credentials a mgmt class is created with from the provider data.
+
+    Args:
+        provider_data: The provider's entry in the ``management_systems`` section.
+    Return: The credentials dict, in the same format as the ``credentials`` yamls entries.
+    """
+    if provider_data.get('endpoints'):
+        credentials = provider_data['endpoints']['default']['credentials']
+    else:
+        credentials = provider_data['credentials']
+    # If it is not a mapping, it most likely points to a credentials yaml (as by default)
+    if not isinstance(credentials, Mapping):
+        credentials = conf.credentials[credentials]
+    # Otherwise it is a mapping and therefore we consider it credentials
+    return credentials
+
+
+def get_mgmt(provider_key, providers=None, credentials=None, cached=True):
     """ Provides a ``wrapanapi`` object, based on the request.
 
     Args:
@@ -353,6 +504,7 @@ def get_mgmt(provider_key, providers=None, credentials=None):
             locations. Expects a dict.
         credentials: A set of credentials in the same format as the ``credentials`` yamls files.
             If ``None`` then credentials are loaded from the default locations. Expects a dict.
+        cached: If ``False``, a new instance is always created and it is not stored in the cache.
     Return: A provider instance of the appropriate ``wrapanapi.WrapanapiAPIBase``
         subclass
     """
@@ -368,15 +520,7 @@ def get_mgmt(provider_key, providers=None, credentials=None):
 
     if credentials is None:
         # We need to handle the in-place credentials
-
-        if provider_data.get('endpoints'):
-            credentials = provider_data['endpoints']['default']['credentials']
-        else:
-            credentials = provider_data['credentials']
-        # If it is not a mapping, it most likely points to a credentials yaml (as by default)
-        if not isinstance(credentials, Mapping):
-            credentials = conf.credentials[credentials]
-        # Otherwise it is a mapping and therefore we consider it credentials
+        credentials = get_mgmt_credentials(provider_data)
 
     # Munge together provider dict and creds,
     # Let the provider do whatever they need with them
@@ -391,6 +535,8 @@ def get_mgmt(provider_key, providers=None, credentials=None):
         provider_kwargs['provider_key'] = provider_key
     provider_kwargs['logger'] = logger
 
+    if not cached:
+        return get_class_from_type(provider_data['type']).mgmt_class(**provider_kwargs)
     if provider_key not in PROVIDER_MGMT_CACHE:
         mgmt_instance = get_class_from_type(provider_data['type']).mgmt_class(**provider_kwargs)
         PROVIDER_MGMT_CACHE[provider_key] = mgmt_instance
@@ -399,6 +545,94 @@ def get_mgmt(provider_key, providers=None, credentials=None):
     return PROVIDER_MGMT_CACHE[provider_key]
 
 
+class ProviderSnapshots:
+    """ Database snapshots of an appliance with a single provider set up and refreshed
+
+    Setting a provider up waits for its full inventory refresh. Once a provider was set up alone
+    on an appliance, the vmdb is dumped on the database machine, and a later setup of the same
+    provider (same yaml data, same appliance version) restores the dump instead. Only a targeted
+    refresh of the restored VMs and templates runs afterwards, and the restored inventory has to
+    match the provider's stats (see :py:meth:`BaseProvider._do_stats_match
+    <cfme.common.provider.BaseProvider._do_stats_match>`) or the snapshot is dropped. A provider
+    keeps its latest snapshot only, and at most :py:attr:`MAX_SNAPSHOTS` are kept on the database
+    machine.
+
+    Note:
+        The whole database is restored, so any other state is reset to the time of the capture.
+        That is why it is only used when just one provider is allowed on the appliance.
+
+    Args:
+        appliance: :py:class:`cfme.utils.appliance.IPAppliance` the snapshots belong to
+    """
+    SNAPSHOT_DIR = '/var/tmp/provider_snapshots'
+    MAX_SNAPSHOTS = 10
+
+    def __init__(self, appliance):
+        self.appliance = appliance
+
+    def path(self, provider):
+        """ Path of the snapshot of the provider on the database machine """
+        data_hash = hashlib.sha256(
+            json.dumps(provider.data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        return '{}/{}-{}-{}.dump'.format(
+            self.SNAPSHOT_DIR, provider.key, self.appliance.version, data_hash[:12])
+
+    def exists(self, provider):
+        return self.appliance.db.ssh_client.run_command(f'test -s {self.path(provider)}').success
+
+    def capture(self, provider):
+        """ Dumps the database, the provider has to be the only one set up and refreshed """
+        logger.info('Capturing provider snapshot of %s', provider.key)
+        path = self.path(provider)
+        self.appliance.db.dump(path)
+        self.prune(provider, path)
+
+    def prune(self, provider, path):
+        """ Removes the other snapshots of the provider and the oldest ones beyond the limit """
+        self.appliance.db.ssh_client.run_command(
+            "find {dir} -name '{key}-*.dump' ! -path '{path}' -delete; "
+            "ls -1t {dir}/*.dump | tail -n +{keep} | xargs -r rm -f".format(
+                dir=self.SNAPSHOT_DIR, key=provider.key, path=path,
+                keep=self.MAX_SNAPSHOTS + 1))
+
+    def invalidate(self, provider):
+        self.appliance.db.ssh_client.run_command(f'rm -f {self.path(provider)}')
+
+    def refresh_inventory(self, provider):
+        """ Refreshes the VMs and templates of the provider in the restored database
+
+        The ids are read in one query and refreshed in one REST request, the provider itself is
+        not refreshed.
+        """
+        client = self.appliance.db.client
+        vms = client['vms']
+        vm_ids = [vm_id for vm_id, in client.session.query(vms.id).filter(
+            vms.ems_id == provider.id)]
+        if vm_ids:
+            self.appliance.rest_api.collections.vms.action.refresh(
+                *[{'id': vm_id} for vm_id in vm_ids])
+        return vm_ids
+
+    def restore(self, provider):
+        """ Restores the snapshot, refreshes its VMs and checks the stats of the provider
+
+        Returns: ``True`` if the provider is set up, ``False`` if the snapshot was dropped
+        """
+        logger.info('Restoring provider snapshot of %s', provider.key)
+        try:
+            self.appliance.db.restore_dump(self.path(provider))
+            if not provider.exists:
+                raise ValueError('provider not in the restored database')
+            self.refresh_inventory(provider)
+            if not provider._do_stats_match(provider.mgmt, provider.STATS_TO_MATCH):
+                raise ValueError('stats do not match the provider')
+        except Exception as e:
+            logger.warning('Dropping the provider snapshot of %s: %s', provider.key, e)
+            self.invalidate(provider)
+            return False
+        return True
+
+
 class UnknownProvider(Exception):
     def __init__(self, provider_key, *args, **kwargs):
         super().__init__(provider_key, *args, **kwargs)
@@ -1,9 +1,13 @@
 """Monitor Memory on a CFME/Miq appliance and builds report&graphs displaying usage per process."""
 import json
 import os
+import shutil
+import struct
 import time
 import traceback
+from array import array
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from threading import Thread
 
@@ -133,6 +137,154 @@ test_ts = time.strftime('%Y%m%d%H%M%S')
 # 10s sample interval (occasionally sampling can take almost 4s on an appliance doing a lot of work)
 SAMPLE_INTERVAL = 10
 
+# Graphs are rendered from series downsampled to at most this many min/max/mean buckets
+GRAPH_MAX_POINTS = 600
+# Number of processes rendering graphs, None uses one per CPU
+GRAPH_PROCESSES = None
+
+
+class SmemSampleStore:
+    """Columnar storage of per process memory samples.
+
+    Every sampled pid is one row spread across typed arrays, the process name is interned and a
+    row only carries its index into :py:attr:`names`. Rows are appended to ``samples.bin`` (new
+    names to ``names.txt``) in ``directory`` on every :py:meth:`flush`, so a long workload keeps
+    its samples on disk as it goes and they can be read back with :py:meth:`load`.
+    """
+    METRICS = ('rss', 'pss', 'uss', 'vss', 'swap')
+    SAMPLES_FILE = 'samples.bin'
+    NAMES_FILE = 'names.txt'
+    # timestamp, pid, name index, rss, pss, uss, vss, swap
+    _row = struct.Struct('<dqI5d')
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.names = []
+        self._name_ids = {}
+        self.timestamps = array('d')
+        self.pids = array('q')
+        self.name_ids = array('I')
+        self.metrics = {metric: array('d') for metric in self.METRICS}
+        # name -> pid -> row numbers, keeps the order in which processes were first seen
+        self._rows = OrderedDict()
+        self._flushed_rows = 0
+        self._flushed_names = 0
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __contains__(self, process_name):
+        return process_name in self._rows
+
+    def intern(self, process_name):
+        if process_name not in self._name_ids:
+            self._name_ids[process_name] = len(self.names)
+            self.names.append(process_name)
+            self._rows[process_name] = OrderedDict()
+        return self._name_ids[process_name]
+
+    def add_sample(self, timestamp, pid, process_name, memory):
+        """Adds one row, ``memory`` is a dict with a value for each of :py:attr:`METRICS`"""
+        pid = int(pid)
+        name_id = self.intern(process_name)
+        self._rows[process_name].setdefault(pid, array('L')).append(len(self.timestamps))
+        self.timestamps.append(timestamp)
+        self.pids.append(pid)
+        self.name_ids.append(name_id)
+        for metric in self.METRICS:
+            self.metrics[metric].append(memory[metric])
+
+    def process_names(self):
+        return list(self._rows.keys())
+
+    def process_pids(self, process_name):
+        return list(self._rows.get(process_name, {}).keys())
+
+    def rows(self, process_name, pid):
+        return self._rows[process_name][pid]
+
+    def series_timestamps(self, process_name, pid):
+        return [self.timestamps[row] for row in self.rows(process_name, pid)]
+
+    def series(self, process_name, pid, metric):
+        values = self.metrics[metric]
+        return [values[row] for row in self.rows(process_name, pid)]
+
+    def first(self, process_name, pid, metric=None):
+        """Returns the first timestamp of the pid, or its first ``metric`` value"""
+        return self._value(self.rows(process_name, pid)[0], metric)
+
+    def last(self, process_name, pid, metric=None):
+        """Returns the last timestamp of the pid, or its last ``metric`` value"""
+        return self._value(self.rows(process_name, pid)[-1], metric)
+
+    def _value(self, row, metric):
+        if metric is None:
+            return self.timestamps[row]
+        return self.metrics[metric][row]
+
+    def flush(self):
+        """Appends rows and names added since the last flush to the files in ``directory``"""
+        if self.directory is None:
+            return
+        directory = str(self.directory)
+        os.makedirs(directory, exist_ok=True)
+        # Names go first so every flushed row can always be resolved
+        if len(self.names) > self._flushed_names:
+            with open(os.path.join(directory, self.NAMES_FILE), 'a') as names_file:
+                for process_name in self.names[self._flushed_names:]:
+                    names_file.write(f'{process_name}\n')
+            self._flushed_names = len(self.names)
+        if len(self) > self._flushed_rows:
+            with open(os.path.join(directory, self.SAMPLES_FILE), 'ab') as samples_file:
+                for row in range(self._flushed_rows, len(self)):
+                    samples_file.write(self._row.pack(
+                        self.timestamps[row], self.pids[row], self.name_ids[row],
+                        *(self.metrics[metric][row] for metric in self.METRICS)))
+            self._flushed_rows = len(self)
+
+    @classmethod
+    def load(cls, directory):
+        """Reads back a store previously flushed to ``directory``"""
+        store = cls()
+        with open(os.path.join(str(directory), cls.NAMES_FILE)) as names_file:
+            names = names_file.read().splitlines()
+        with open(os.path.join(str(directory), cls.SAMPLES_FILE), 'rb') as samples_file:
+            data = samples_file.read()
+        for timestamp, pid, name_id, *values in cls._row.iter_unpack(data):
+            store.add_sample(timestamp, pid, names[name_id], dict(zip(cls.METRICS, values)))
+        store.directory = directory
+        store._flushed_rows = len(store)
+        store._flushed_names = len(store.names)
+        return store
+
+
+def downsample(timestamps, values, max_points=GRAPH_MAX_POINTS):
+    """Reduces a series to at most ``max_points`` buckets.
+
+    Returns:
+        tuple of lists: bucket start timestamps, minimums, maximums and means
+    """
+    count = len(values)
+    if count <= max_points:
+        return list(timestamps), list(values), list(values), list(values)
+    bucket_ts, mins, maxs, means = [], [], [], []
+    for bucket in range(max_points):
+        start = bucket * count // max_points
+        end = (bucket + 1) * count // max_points
+        chunk = values[start:end]
+        bucket_ts.append(timestamps[start])
+        mins.append(min(chunk))
+        maxs.append(max(chunk))
+        means.append(sum(chunk) / len(chunk))
+    return bucket_ts, mins, maxs, means
+
+
+def get_samples_path(scenario_data):
+    """Directory the process samples of a scenario are flushed to while it runs"""
+    return results_path.join('{}-{}-samples'.format(test_ts, scenario_data['test_dir'])).join(
+        '{}-{}'.format(time.strftime('%Y%m%d%H%M%S'), scenario_data['scenario']['name']))
+
 
 class SmemMemoryMonitor(Thread):
     def __init__(self, ssh_client, scenario_data):
@@ -144,26 +296,11 @@ class SmemMemoryMonitor(Thread):
         self.use_slab = False
         self.signal = True
 
-    def create_process_result(self, process_results, starttime, process_pid, process_name,
+    def create_process_result(self, process_samples, timestamp, process_pid, process_name,
             memory_by_pid):
-        if process_pid in list(memory_by_pid.keys()):
-            if process_name not in process_results:
-                process_results[process_name] = OrderedDict()
-                process_results[process_name][process_pid] = OrderedDict()
-            if process_pid not in process_results[process_name]:
-                process_results[process_name][process_pid] = OrderedDict()
-            process_results[process_name][process_pid][starttime] = {}
-            rss_mem = memory_by_pid[process_pid]['rss']
-            pss_mem = memory_by_pid[process_pid]['pss']
-            uss_mem = memory_by_pid[process_pid]['uss']
-            vss_mem = memory_by_pid[process_pid]['vss']
-            swap_mem = memory_by_pid[process_pid]['swap']
-            process_results[process_name][process_pid][starttime]['rss'] = rss_mem
-            process_results[process_name][process_pid][starttime]['pss'] = pss_mem
-            process_results[process_name][process_pid][starttime]['uss'] = uss_mem
-            process_results[process_name][process_pid][starttime]['vss'] = vss_mem
-            process_results[process_name][process_pid][starttime]['swap'] = swap_mem
-            del memory_by_pid[process_pid]
+        if process_pid in memory_by_pid:
+            process_samples.add_sample(timestamp, process_pid, process_name,
+                memory_by_pid.pop(process_pid))
         else:
             logger.warning(f'Process {process_name} PID, not found: {process_pid}')
 
@@ -270,7 +407,7 @@ class SmemMemoryMonitor(Thread):
         return memory_by_pid
 
     def _real_run(self):
-        """ Result dictionaries:
+        """ Result containers:
         appliance_results[timestamp][measurement] = value
         appliance_results[timestamp]['total'] = value
         appliance_results[timestamp]['free'] = value
@@ -281,64 +418,63 @@ class SmemMemoryMonitor(Thread):
         appliance_results[timestamp]['swap_total'] = value
         appliance_results[timestamp]['swap_free'] = value
         appliance measurements: total/free/used/buffers/cached/slab/swap_total/swap_free
-        process_results[name][pid][timestamp][measurement] = value
-        process_results[name][pid][timestamp]['rss'] = value
-        process_results[name][pid][timestamp]['pss'] = value
-        process_results[name][pid][timestamp]['uss'] = value
-        process_results[name][pid][timestamp]['vss'] = value
-        process_results[name][pid][timestamp]['swap'] = value
+        process_samples is a SmemSampleStore holding one row per sampled pid with the
+        rss/pss/uss/vss/swap measurements, flushed to disk after every sample interval.
         """
         appliance_results = OrderedDict()
-        process_results = OrderedDict()
+        process_samples = SmemSampleStore(get_samples_path(self.scenario_data))
+        logger.info(f'Saving process memory samples to: {process_samples.directory}')
         install_smem(self.ssh_client)
         self.get_miq_server_id()
         logger.info('Starting Monitoring Thread.')
         while self.signal:
             starttime = time.time()
             plottime = datetime.now()
+            timestamp = plottime.timestamp()
 
             self.get_appliance_memory(appliance_results, plottime)
             workers = self.get_evm_workers()
             memory_by_pid = self.get_pids_memory()
 
             for worker_pid in workers:
-                self.create_process_result(process_results, plottime, worker_pid,
+                self.create_process_result(process_samples, timestamp, worker_pid,
                     workers[worker_pid], memory_by_pid)
 
             for pid in sorted(memory_by_pid.keys()):
                 if memory_by_pid[pid]['name'] == 'httpd':
-                    self.create_process_result(process_results, plottime, pid, 'httpd',
+                    self.create_process_result(process_samples, timestamp, pid, 'httpd',
                         memory_by_pid)
                 elif memory_by_pid[pid]['name'] == 'postgres':
-                    self.create_process_result(process_results, plottime, pid, 'postgres',
+                    self.create_process_result(process_samples, timestamp, pid, 'postgres',
                         memory_by_pid)
                 elif memory_by_pid[pid]['name'] == 'postmaster':
-                    self.create_process_result(process_results, plottime, pid, 'postgres',
+                    self.create_process_result(process_samples, timestamp, pid, 'postgres',
                         memory_by_pid)
                 elif memory_by_pid[pid]['name'] == 'memcached':
-                    self.create_process_result(process_results, plottime, pid, 'memcached',
+                    self.create_process_result(process_samples, timestamp, pid, 'memcached',
                         memory_by_pid)
                 elif memory_by_pid[pid]['name'] == 'collectd':
-                    self.create_process_result(process_results, plottime, pid, 'collectd',
+                    self.create_process_result(process_samples, timestamp, pid, 'collectd',
                         memory_by_pid)
                 elif memory_by_pid[pid]['name'] == 'ruby':
                     if 'evm_server.rb' in memory_by_pid[pid]['cmd']:
-                        self.create_process_result(process_results, plottime, pid,
+                        self.create_process_result(process_samples, timestamp, pid,
                             'MIQ Server (evm_server.rb)', memory_by_pid)
                     elif 'MIQ Server' in memory_by_pid[pid]['cmd']:
-                        self.create_process_result(process_results, plottime, pid,
+                        self.create_process_result(process_samples, timestamp, pid,
                             'MIQ Server (evm_server.rb)', memory_by_pid)
                     elif 'evm_watchdog.rb' in memory_by_pid[pid]['cmd']:
-                        self.create_process_result(process_results, plottime, pid,
+                        self.create_process_result(process_samples, timestamp, pid,
                             'evm_watchdog.rb', memory_by_pid)
                     elif 'appliance_console.rb' in memory_by_pid[pid]['cmd']:
-                        self.create_process_result(process_results, plottime, pid,
+                        self.create_process_result(process_samples, timestamp, pid,
                             'appliance_console.rb', memory_by_pid)
                     elif 'evm:dbsync:replicate' in memory_by_pid[pid]['cmd']:
-                        self.create_process_result(process_results, plottime, pid,
+                        self.create_process_result(process_samples, timestamp, pid,
                             'evm:dbsync:replicate', memory_by_pid)
                     else:
                         logger.debug(f'Unaccounted for ruby pid: {pid}')
+            process_samples.flush()
 
             timediff = time.time() - starttime
             logger.debug('Monitoring sampled in {}s'.format(round(timediff, 4)))
@@ -349,7 +485,8 @@ class SmemMemoryMonitor(Thread):
             time.sleep(time_to_sleep)
         logger.info('Monitoring CFME Memory Terminating')
 
-        create_report(self.scenario_data, appliance_results, process_results, self.use_slab,
+        process_samples.flush()
+        create_report(self.scenario_data, appliance_results, process_samples, self.use_slab,
             self.grafana_urls)
 
     def run(self):
@@ -372,7 +509,7 @@ def install_smem(ssh_client):
     ssh_client.run_command(r'sed -i s/\.27s/\.200s/g /usr/bin/smem')
 
 
-def create_report(scenario_data, appliance_results, process_results, use_slab, grafana_urls):
+def create_report(scenario_data, appliance_results, process_samples, use_slab, grafana_urls):
     logger.info('Creating Memory Monitoring Report.')
     ver = current_version()
 
@@ -401,49 +538,48 @@ def create_report(scenario_data, appliance_results, process_results, use_slab, g
         os.mkdir(str(mem_rawdata_path))
 
     graph_appliance_measurements(mem_graphs_path, ver, appliance_results, use_slab, provider_names)
-    graph_individual_process_measurements(mem_graphs_path, process_results, provider_names)
-    graph_same_miq_workers(mem_graphs_path, process_results, provider_names)
-    graph_all_miq_workers(mem_graphs_path, process_results, provider_names)
+    render_graphs(
+        graph_individual_process_measurements(mem_graphs_path, process_samples, provider_names) +
+        graph_same_miq_workers(mem_graphs_path, process_samples, provider_names) +
+        graph_all_miq_workers(mem_graphs_path, process_samples, provider_names))
 
     # Dump scenario Yaml:
     with open(str(scenario_path.join('scenario.yml')), 'w') as scenario_file:
         yaml.safe_dump(dict(scenario_data['scenario']), scenario_file, default_flow_style=False)
 
     generate_summary_csv(scenario_path.join(f'{ver}-summary.csv'), appliance_results,
-        process_results, provider_names, ver)
-    generate_raw_data_csv(mem_rawdata_path, appliance_results, process_results)
-    generate_summary_html(scenario_path, ver, appliance_results, process_results, scenario_data,
+        process_samples, provider_names, ver)
+    generate_raw_data_csv(mem_rawdata_path, appliance_results, process_samples)
+    if process_samples.directory is not None:
+        for samples_file in (SmemSampleStore.SAMPLES_FILE, SmemSampleStore.NAMES_FILE):
+            samples_file_path = os.path.join(str(process_samples.directory), samples_file)
+            if os.path.exists(samples_file_path):
+                shutil.copy(samples_file_path, str(mem_rawdata_path))
+    generate_summary_html(scenario_path, ver, appliance_results, process_samples, scenario_data,
         provider_names, grafana_urls)
     generate_workload_html(scenario_path, ver, scenario_data, provider_names, grafana_urls)
 
     logger.info('Finished Creating Report')
 
 
-def compile_per_process_results(procs_to_compile, process_results, ts_end):
+def compile_per_process_results(procs_to_compile, process_samples, ts_end):
     alive_pids = 0
     recycled_pids = 0
-    total_running_rss = 0
-    total_running_pss = 0
-    total_running_uss = 0
-    total_running_vss = 0
-    total_running_swap = 0
+    totals = dict.fromkeys(SmemSampleStore.METRICS, 0)
+    ts_end = ts_end.timestamp()
     for process in procs_to_compile:
-        if process in process_results:
-            for pid in process_results[process]:
-                if ts_end in process_results[process][pid]:
-                    alive_pids += 1
-                    total_running_rss += process_results[process][pid][ts_end]['rss']
-                    total_running_pss += process_results[process][pid][ts_end]['pss']
-                    total_running_uss += process_results[process][pid][ts_end]['uss']
-                    total_running_vss += process_results[process][pid][ts_end]['vss']
-                    total_running_swap += process_results[process][pid][ts_end]['swap']
-                else:
-                    recycled_pids += 1
-    return alive_pids, recycled_pids, total_running_rss, total_running_pss, total_running_uss, \
-        total_running_vss, total_running_swap
+        for pid in process_samples.process_pids(process):
+            if process_samples.last(process, pid) == ts_end:
+                alive_pids += 1
+                for metric in SmemSampleStore.METRICS:
+                    totals[metric] += process_samples.last(process, pid, metric)
+            else:
+                recycled_pids += 1
+    return alive_pids, recycled_pids, totals['rss'], totals['pss'], totals['uss'], \
+        totals['vss'], totals['swap']
 
 
-def generate_raw_data_csv(directory, appliance_results, process_results):
+def generate_raw_data_csv(directory, appliance_results, process_samples):
     starttime = time.time()
     file_name = str(directory.join('appliance.csv'))
     with open(file_name, 'w') as csv_file:
@@ -454,23 +590,21 @@ def generate_raw_data_csv(directory, appliance_results, process_results):
                 appliance_results[ts]['used'], appliance_results[ts]['buffers'],
                 appliance_results[ts]['cached'], appliance_results[ts]['slab'],
                 appliance_results[ts]['swap_total'], appliance_results[ts]['swap_free']))
-    for process_name in process_results:
-        for process_pid in process_results[process_name]:
+    metrics = [process_samples.metrics[metric] for metric in SmemSampleStore.METRICS]
+    for process_name in process_samples.process_names():
+        for process_pid in process_samples.process_pids(process_name):
             file_name = str(directory.join(f'{process_pid}-{process_name}.csv'))
             with open(file_name, 'w') as csv_file:
                 csv_file.write('TimeStamp,RSS,PSS,USS,VSS,SWAP\n')
-                for ts in process_results[process_name][process_pid]:
-                    csv_file.write('{},{},{},{},{},{}\n'.format(ts,
-                        process_results[process_name][process_pid][ts]['rss'],
-                        process_results[process_name][process_pid][ts]['pss'],
-                        process_results[process_name][process_pid][ts]['uss'],
-                        process_results[process_name][process_pid][ts]['vss'],
-                        process_results[process_name][process_pid][ts]['swap']))
+                for row in process_samples.rows(process_name, process_pid):
+                    csv_file.write('{},{},{},{},{},{}\n'.format(
+                        datetime.fromtimestamp(process_samples.timestamps[row]),
+                        *(values[row] for values in metrics)))
     timediff = time.time() - starttime
     logger.info(f'Generated Raw Data CSVs in: {timediff}')
 
 
-def generate_summary_csv(file_name, appliance_results, process_results, provider_names,
+def generate_summary_csv(file_name, appliance_results, process_samples, provider_names,
         version_string):
     starttime = time.time()
     with open(str(file_name), 'w') as csv_file:
@@ -500,17 +634,17 @@ def generate_summary_csv(file_name, appliance_results, process_results, provider
             round(appliance_results[start]['swap_free'], 2),
             round(appliance_results[end]['swap_free'], 2)))
 
-        summary_csv_measurement_dump(csv_file, process_results, 'rss')
-        summary_csv_measurement_dump(csv_file, process_results, 'pss')
-        summary_csv_measurement_dump(csv_file, process_results, 'uss')
-        summary_csv_measurement_dump(csv_file, process_results, 'vss')
-        summary_csv_measurement_dump(csv_file, process_results, 'swap')
+        summary_csv_measurement_dump(csv_file, process_samples, 'rss')
+        summary_csv_measurement_dump(csv_file, process_samples, 'pss')
+        summary_csv_measurement_dump(csv_file, process_samples, 'uss')
+        summary_csv_measurement_dump(csv_file, process_samples, 'vss')
+        summary_csv_measurement_dump(csv_file, process_samples, 'swap')
 
     timediff = time.time() - starttime
     logger.info(f'Generated Summary CSV in: {timediff}')
 
 
-def generate_summary_html(directory, version_string, appliance_results, process_results,
+def generate_summary_html(directory, version_string, appliance_results, process_samples,
         scenario_data, provider_names, grafana_urls):
     starttime = time.time()
     file_name = str(directory.join('index.html'))
@@ -541,8 +675,8 @@ def generate_summary_html(directory, version_string, appliance_results, process_
         end = list(appliance_results.keys())[-1]
         timediff = end - start
         total_proc_count = 0
-        for proc_name in process_results:
-            total_proc_count += len(list(process_results[proc_name].keys()))
+        for proc_name in process_samples.process_names():
+            total_proc_count += len(process_samples.process_pids(proc_name))
         growth = appliance_results[end]['used'] - appliance_results[start]['used']
         max_used_memory = 0
         for ts in appliance_results:
@@ -591,7 +725,7 @@ def generate_summary_html(directory, version_string, appliance_results, process_
         html_file.write('</tr>\n')
 
         a_pids, r_pids, t_rss, t_pss, t_uss, t_vss, t_swap = compile_per_process_results(
-            miq_workers, process_results, end)
+            miq_workers, process_samples, end)
 
         html_file.write('<tr>\n')
         html_file.write('<td>{}</td>\n'.format(a_pids + r_pids))
@@ -620,7 +754,7 @@ def generate_summary_html(directory, version_string, appliance_results, process_
         html_file.write('</tr>\n')
 
         a_pids, r_pids, t_rss, t_pss, t_uss, t_vss, t_swap = compile_per_process_results(
-            ruby_processes, process_results, end)
+            ruby_processes, process_samples, end)
         t_a_pids = a_pids
         t_r_pids = r_pids
         tt_rss = t_rss
@@ -642,7 +776,7 @@ def generate_summary_html(directory, version_string, appliance_results, process_
 
         # memcached Summary
         a_pids, r_pids, t_rss, t_pss, t_uss, t_vss, t_swap = compile_per_process_results(
-            ['memcached'], process_results, end)
+            ['memcached'], process_samples, end)
         t_a_pids += a_pids
         t_r_pids += r_pids
         tt_rss += t_rss
@@ -664,7 +798,7 @@ def generate_summary_html(directory, version_string, appliance_results, process_
 
         # Postgres Summary
         a_pids, r_pids, t_rss, t_pss, t_uss, t_vss, t_swap = compile_per_process_results(
-            ['postgres'], process_results, end)
+            ['postgres'], process_samples, end)
         t_a_pids += a_pids
         t_r_pids += r_pids
         tt_rss += t_rss
@@ -686,7 +820,7 @@ def generate_summary_html(directory, version_string, appliance_results, process_
 
         # httpd Summary
         a_pids, r_pids, t_rss, t_pss, t_uss, t_vss, t_swap = compile_per_process_results(['httpd'],
-            process_results, end)
+            process_samples, end)
         t_a_pids += a_pids
         t_r_pids += r_pids
         tt_rss += t_rss
@@ -708,7 +842,7 @@ def generate_summary_html(directory, version_string, appliance_results, process_
 
         # collectd Summary
         a_pids, r_pids, t_rss, t_pss, t_uss, t_vss, t_swap = compile_per_process_results(
-            ['collectd'], process_results, end)
+            ['collectd'], process_samples, end)
         t_a_pids += a_pids
         t_r_pids += r_pids
         tt_rss += t_rss
@@ -775,13 +909,14 @@ def generate_summary_html(directory, version_string, appliance_results, process_
         html_file.write('</tr>\n')
         # By Worker Type Memory Used
         for ordered_name in process_order:
-            if ordered_name in process_results:
-                for pid in process_results[ordered_name]:
-                    start = list(process_results[ordered_name][pid].keys())[0]
-                    end = list(process_results[ordered_name][pid].keys())[-1]
+            if ordered_name in process_samples:
+                pids = process_samples.process_pids(ordered_name)
+                for pid in pids:
+                    start = datetime.fromtimestamp(process_samples.first(ordered_name, pid))
+                    end = datetime.fromtimestamp(process_samples.last(ordered_name, pid))
                     timediff = end - start
                     html_file.write('<tr>\n')
-                    if len(process_results[ordered_name]) > 1:
+                    if len(pids) > 1:
                         html_file.write('<td><a href=\'#{}\'>{}</a></td>\n'.format(ordered_name,
                             ordered_name))
                         html_file.write('<td><a href=\'graphs/{}-{}.png\'>{}</a></td>\n'.format(
@@ -793,19 +928,16 @@ def generate_summary_html(directory, version_string, appliance_results, process_
                     html_file.write('<td>{}</td>\n'.format(start.replace(microsecond=0)))
                     html_file.write('<td>{}</td>\n'.format(end.replace(microsecond=0)))
                     html_file.write('<td>{}</td>\n'.format(str(timediff).partition('.')[0]))
-                    rss_change = process_results[ordered_name][pid][end]['rss'] - \
-                        process_results[ordered_name][pid][start]['rss']
-                    html_file.write('<td>{}</td>\n'.format(
-                        round(process_results[ordered_name][pid][start]['rss'], 2)))
-                    html_file.write('<td>{}</td>\n'.format(
-                        round(process_results[ordered_name][pid][end]['rss'], 2)))
-                    html_file.write('<td>{}</td>\n'.format(round(rss_change, 2)))
-                    pss_change = process_results[ordered_name][pid][end]['pss'] - \
-                        process_results[ordered_name][pid][start]['pss']
-                    html_file.write('<td>{}</td>\n'.format(
-                        round(process_results[ordered_name][pid][start]['pss'], 2)))
-                    html_file.write('<td>{}</td>\n'.format(
-                        round(process_results[ordered_name][pid][end]['pss'], 2)))
+                    start_rss = process_samples.first(ordered_name, pid, 'rss')
+                    end_rss = process_samples.last(ordered_name, pid, 'rss')
+                    html_file.write('<td>{}</td>\n'.format(round(start_rss, 2)))
+                    html_file.write('<td>{}</td>\n'.format(round(end_rss, 2)))
+                    html_file.write('<td>{}</td>\n'.format(round(end_rss - start_rss, 2)))
+                    start_pss = process_samples.first(ordered_name, pid, 'pss')
+                    end_pss = process_samples.last(ordered_name, pid, 'pss')
+                    pss_change = end_pss - start_pss
+                    html_file.write('<td>{}</td>\n'.format(round(start_pss, 2)))
+                    html_file.write('<td>{}</td>\n'.format(round(end_pss, 2)))
                     html_file.write('<td>{}</td>\n'.format(round(pss_change, 2)))
                     html_file.write('<td><a href=\'rawdata/{}-{}.csv\'>csv</a></td>\n'.format(
                         pid, ordered_name))
@@ -817,16 +949,17 @@ def generate_summary_html(directory, version_string, appliance_results, process_
 
         # Worker Graphs
         for ordered_name in process_order:
-            if ordered_name in process_results:
+            if ordered_name in process_samples:
                 html_file.write('<tr><td>\n')
                 html_file.write('<div id=\'{}\'>Process name: {}</div><br>\n'.format(
                     ordered_name, ordered_name))
-                if len(process_results[ordered_name]) > 1:
+                pids = process_samples.process_pids(ordered_name)
+                if len(pids) > 1:
                     file_name = f'{ordered_name}-all.png'
                     html_file.write('<img id=\'{}\' src=\'graphs/{}\'><br>\n'.format(file_name,
                         file_name))
                 else:
-                    for pid in sorted(process_results[ordered_name]):
+                    for pid in sorted(pids):
                         file_name = f'{ordered_name}-{pid}.png'
                         html_file.write('<img id=\'{}\' src=\'graphs/{}\'><br>\n'.format(
                             file_name, file_name))
@@ -1013,6 +1146,15 @@ def graph_appliance_measurements(graphs_path, ver, appliance_results, use_slab,
                            for ts in appliance_results.keys())
     swap_free_list = list(appliance_results[ts]['swap_free']
                           for ts in appliance_results.keys())
+    swap_used_list = [t - f for f, t in zip(swap_free_list, swap_total_list)]
+    # Stack plots are drawn from the bucket means of the downsampled measurements, the
+    # annotations keep the first and last measured values
+    sampled_dates = downsample(dates, total_memory_list)[0]
+    (sampled_free, sampled_used, sampled_buffers, sampled_cache, sampled_slab,
+        sampled_swap_used, sampled_swap_free) = (
+        downsample(dates, values)[3] for values in (free_memory_list, used_memory_list,
+            buffers_memory_list, cache_memory_list, slab_memory_list, swap_used_list,
+            swap_free_list))
 
     # Stack Plot Memory Usage
     file_name = graphs_path.join(f'{ver}-appliance_memory.png')
@@ -1023,10 +1165,10 @@ def graph_appliance_measurements(graphs_path, ver, appliance_results, use_slab,
     plt.xlabel('Date / Time')
     plt.ylabel('Memory (MiB)')
     if use_slab:
-        y = [used_memory_list, slab_memory_list, cache_memory_list, free_memory_list]
+        y = [sampled_used, sampled_slab, sampled_cache, sampled_free]
     else:
-        y = [used_memory_list, buffers_memory_list, cache_memory_list, free_memory_list]
-    plt.stackplot(dates, *y, baseline='zero')
+        y = [sampled_used, sampled_buffers, sampled_cache, sampled_free]
+    plt.stackplot(sampled_dates, *y, baseline='zero')
     ax.annotate(str(round(total_memory_list[0], 2)), xy=(dates[0], total_memory_list[0]),
                 xytext=(4, 4), textcoords='offset points')
     ax.annotate(str(round(total_memory_list[-1], 2)), xy=(dates[-1], total_memory_list[-1]),
@@ -1084,9 +1226,8 @@ def graph_appliance_measurements(graphs_path, ver, appliance_results, use_slab,
     plt.xlabel('Date / Time')
     plt.ylabel('Swap (MiB)')
 
-    swap_used_list = [t - f for f, t in zip(swap_free_list, swap_total_list)]
-    y = [swap_used_list, swap_free_list]
-    plt.stackplot(dates, *y, baseline='zero')
+    y = [sampled_swap_used, sampled_swap_free]
+    plt.stackplot(sampled_dates, *y, baseline='zero')
     ax.annotate(str(round(swap_total_list[0], 2)), xy=(dates[0], swap_total_list[0]),
         xytext=(4, 4), textcoords='offset points')
     ax.annotate(str(round(swap_total_list[-1], 2)), xy=(dates[-1], swap_total_list[-1]),
@@ -1112,207 +1253,128 @@ def graph_appliance_measurements(graphs_path, ver, appliance_results, use_slab,
     logger.info(f'Plotted Appliance Memory in: {timediff}')
 
 
-def graph_all_miq_workers(graph_file_path, process_results, provider_names):
+def graph_series(process_samples, process_name, pid, metric):
+    """Downsampled (dates, minimums, maximums, means) of one pid's metric, ready to plot,
+    followed by its first and last measured (date, value) to annotate"""
+    timestamps, mins, maxs, means = downsample(
+        process_samples.series_timestamps(process_name, pid),
+        process_samples.series(process_name, pid, metric))
+    ends = [
+        (datetime.fromtimestamp(process_samples.first(process_name, pid)),
+            process_samples.first(process_name, pid, metric)),
+        (datetime.fromtimestamp(process_samples.last(process_name, pid)),
+            process_samples.last(process_name, pid, metric))]
+    return [datetime.fromtimestamp(ts) for ts in timestamps], mins, maxs, means, ends
+
+
+def render_graphs(graph_jobs):
+    """Renders graph jobs built by the graph_* functions across a pool of processes"""
+    starttime = time.time()
+    if graph_jobs:
+        with ProcessPoolExecutor(max_workers=GRAPH_PROCESSES) as executor:
+            for _ in executor.map(render_memory_graph, graph_jobs, chunksize=4):
+                pass
+    timediff = time.time() - starttime
+    logger.info(f'Rendered {len(graph_jobs)} Process Memory graphs in: {timediff}')
+
+
+def render_memory_graph(graph_job):
+    """Plots one graph job, each line is drawn as its mean with a min/max band around it and
+    annotated with its first and last measured values"""
     import matplotlib as mpl
     mpl.use('Agg')
     import matplotlib.dates as mdates
     import matplotlib.pyplot as plt
 
-    starttime = time.time()
-    file_name = graph_file_path.join('all-processes.png')
-
     fig, ax = plt.subplots()
-    plt.title(f'Provider(s): {provider_names}\nAll Workers/Monitored Processes')
+    plt.title(graph_job['title'])
     plt.xlabel('Date / Time')
     plt.ylabel('Memory (MiB)')
-    for process_name in process_results:
-        if 'Worker' in process_name or 'Handler' in process_name or 'Catcher' in process_name:
-            for process_pid in process_results[process_name]:
-                dates = list(process_results[process_name][process_pid].keys())
-
-                rss_samples = list(process_results[process_name][process_pid][ts]['rss']
-                        for ts in process_results[process_name][process_pid].keys())
-                vss_samples = list(process_results[process_name][process_pid][ts]['vss']
-                        for ts in process_results[process_name][process_pid].keys())
-                plt.plot(dates, rss_samples, linewidth=1, label='{} {} RSS'.format(process_pid,
-                    process_name))
-                plt.plot(dates, vss_samples, linewidth=1, label='{} {} VSS'.format(
-                    process_pid, process_name))
+    for label, dates, mins, maxs, means, ends in graph_job['lines']:
+        line, = plt.plot(dates, means, linewidth=1, label=label)
+        if mins != maxs:
+            ax.fill_between(dates, mins, maxs, color=line.get_color(), alpha=0.2, linewidth=0)
+        if graph_job['annotate']:
+            (first_date, first), (last_date, last) = ends
+            ax.annotate(str(round(first, 2)), xy=(first_date, first), xytext=(4, 4),
+                textcoords='offset points')
+            ax.annotate(str(round(last, 2)), xy=(last_date, last), xytext=(4, -4),
+                textcoords='offset points')
 
     datefmt = mdates.DateFormatter('%m-%d %H-%M')
     ax.xaxis.set_major_formatter(datefmt)
     ax.grid(True)
     plt.legend(loc='upper center', bbox_to_anchor=(1.2, 0.1), fancybox=True)
     fig.autofmt_xdate()
-    plt.savefig(str(file_name), bbox_inches='tight')
+    plt.savefig(graph_job['file_name'], bbox_inches='tight')
     plt.close()
 
-    timediff = time.time() - starttime
-    logger.info(f'Plotted All Type/Process Memory in: {timediff}')
-
 
-def graph_individual_process_measurements(graph_file_path, process_results, provider_names):
-    import matplotlib as mpl
-    mpl.use('Agg')
-    import matplotlib.dates as mdates
-    import matplotlib.pyplot as plt
-
-    starttime = time.time()
-    for process_name in process_results:
-        for process_pid in process_results[process_name]:
-
-            file_name = graph_file_path.join(f'{process_name}-{process_pid}.png')
-
-            dates = list(process_results[process_name][process_pid].keys())
-            rss_samples = list(process_results[process_name][process_pid][ts]['rss']
-                    for ts in process_results[process_name][process_pid].keys())
-            pss_samples = list(process_results[process_name][process_pid][ts]['pss']
-                    for ts in process_results[process_name][process_pid].keys())
-            uss_samples = list(process_results[process_name][process_pid][ts]['uss']
-                    for ts in process_results[process_name][process_pid].keys())
-            vss_samples = list(process_results[process_name][process_pid][ts]['vss']
-                    for ts in process_results[process_name][process_pid].keys())
-            swap_samples = list(process_results[process_name][process_pid][ts]['swap']
-                    for ts in process_results[process_name][process_pid].keys())
-
-            fig, ax = plt.subplots()
-            plt.title('Provider(s)/Size: {}\nProcess/Worker: {}\nPID: {}'.format(provider_names,
-                process_name, process_pid))
-            plt.xlabel('Date / Time')
-            plt.ylabel('Memory (MiB)')
-            plt.plot(dates, rss_samples, linewidth=1, label='RSS')
-            plt.plot(dates, pss_samples, linewidth=1, label='PSS')
-            plt.plot(dates, uss_samples, linewidth=1, label='USS')
-            plt.plot(dates, vss_samples, linewidth=1, label='VSS')
-            plt.plot(dates, swap_samples, linewidth=1, label='Swap')
-
-            if rss_samples:
-                ax.annotate(str(round(rss_samples[0], 2)), xy=(dates[0], rss_samples[0]),
-                    xytext=(4, 4), textcoords='offset points')
-                ax.annotate(str(round(rss_samples[-1], 2)), xy=(dates[-1], rss_samples[-1]),
-                    xytext=(4, -4), textcoords='offset points')
-            if pss_samples:
-                ax.annotate(str(round(pss_samples[0], 2)), xy=(dates[0], pss_samples[0]),
-                    xytext=(4, 4), textcoords='offset points')
-                ax.annotate(str(round(pss_samples[-1], 2)), xy=(dates[-1], pss_samples[-1]),
-                    xytext=(4, -4), textcoords='offset points')
-            if uss_samples:
-                ax.annotate(str(round(uss_samples[0], 2)), xy=(dates[0], uss_samples[0]),
-                    xytext=(4, 4), textcoords='offset points')
-                ax.annotate(str(round(uss_samples[-1], 2)), xy=(dates[-1], uss_samples[-1]),
-                    xytext=(4, -4), textcoords='offset points')
-            if vss_samples:
-                ax.annotate(str(round(vss_samples[0], 2)), xy=(dates[0], vss_samples[0]),
-                    xytext=(4, 4), textcoords='offset points')
-                ax.annotate(str(round(vss_samples[-1], 2)), xy=(dates[-1], vss_samples[-1]),
-                    xytext=(4, -4), textcoords='offset points')
-            if swap_samples:
-                ax.annotate(str(round(swap_samples[0], 2)), xy=(dates[0], swap_samples[0]),
-                    xytext=(4, 4), textcoords='offset points')
-                ax.annotate(str(round(swap_samples[-1], 2)), xy=(dates[-1], swap_samples[-1]),
-                    xytext=(4, -4), textcoords='offset points')
-
-            datefmt = mdates.DateFormatter('%m-%d %H-%M')
-            ax.xaxis.set_major_formatter(datefmt)
-            ax.grid(True)
-            plt.legend(loc='upper center', bbox_to_anchor=(1.2, 0.1), fancybox=True)
-            fig.autofmt_xdate()
-            plt.savefig(str(file_name), bbox_inches='tight')
-            plt.close()
-
-    timediff = time.time() - starttime
-    logger.info(f'Plotted Individual Process Memory in: {timediff}')
-
-
-def graph_same_miq_workers(graph_file_path, process_results, provider_names):
-    import matplotlib as mpl
-    mpl.use('Agg')
-    import matplotlib.dates as mdates
-    import matplotlib.pyplot as plt
-
-    starttime = time.time()
-    for process_name in process_results:
-        if len(process_results[process_name]) > 1:
+def graph_all_miq_workers(graph_file_path, process_samples, provider_names):
+    lines = []
+    for process_name in process_samples.process_names():
+        if 'Worker' in process_name or 'Handler' in process_name or 'Catcher' in process_name:
+            for process_pid in process_samples.process_pids(process_name):
+                lines.append((f'{process_pid} {process_name} RSS',
+                    *graph_series(process_samples, process_name, process_pid, 'rss')))
+                lines.append((f'{process_pid} {process_name} VSS',
+                    *graph_series(process_samples, process_name, process_pid, 'vss')))
+    return [{
+        'file_name': str(graph_file_path.join('all-processes.png')),
+        'title': f'Provider(s): {provider_names}\nAll Workers/Monitored Processes',
+        'lines': lines,
+        'annotate': False}]
+
+
+def graph_individual_process_measurements(graph_file_path, process_samples, provider_names):
+    graph_jobs = []
+    for process_name in process_samples.process_names():
+        for process_pid in process_samples.process_pids(process_name):
+            graph_jobs.append({
+                'file_name': str(graph_file_path.join(f'{process_name}-{process_pid}.png')),
+                'title': 'Provider(s)/Size: {}\nProcess/Worker: {}\nPID: {}'.format(
+                    provider_names, process_name, process_pid),
+                'lines': [
+                    (label, *graph_series(process_samples, process_name, process_pid, metric))
+                    for metric, label in zip(SmemSampleStore.METRICS,
+                                             ('RSS', 'PSS', 'USS', 'VSS', 'Swap'))],
+                'annotate': True})
+    return graph_jobs
+
+
+def graph_same_miq_workers(graph_file_path, process_samples, provider_names):
+    graph_jobs = []
+    for process_name in process_samples.process_names():
+        process_pids = process_samples.process_pids(process_name)
+        if len(process_pids) > 1:
             logger.debug('Plotting {} {} processes on single graph.'.format(
-                len(process_results[process_name]), process_name))
-            file_name = graph_file_path.join(f'{process_name}-all.png')
-
-            fig, ax = plt.subplots()
+                len(process_pids), process_name))
             pids = 'PIDs: '
-            for i, pid in enumerate(process_results[process_name], 1):
+            for i, pid in enumerate(process_pids, 1):
                 pids = '{}{}'.format(pids, '{},{}'.format(pid, [' ', '\n'][i % 6 == 0]))
             pids = pids[0:-2]
-            plt.title('Provider: {}\nProcess/Worker: {}\n{}'.format(provider_names,
-                process_name, pids))
-            plt.xlabel('Date / Time')
-            plt.ylabel('Memory (MiB)')
-
-            for process_pid in process_results[process_name]:
-                dates = list(process_results[process_name][process_pid].keys())
-
-                rss_samples = list(process_results[process_name][process_pid][ts]['rss']
-                        for ts in process_results[process_name][process_pid].keys())
-                pss_samples = list(process_results[process_name][process_pid][ts]['pss']
-                        for ts in process_results[process_name][process_pid].keys())
-                uss_samples = list(process_results[process_name][process_pid][ts]['uss']
-                        for ts in process_results[process_name][process_pid].keys())
-                vss_samples = list(process_results[process_name][process_pid][ts]['vss']
-                        for ts in process_results[process_name][process_pid].keys())
-                swap_samples = list(process_results[process_name][process_pid][ts]['swap']
-                        for ts in process_results[process_name][process_pid].keys())
-                plt.plot(dates, rss_samples, linewidth=1, label=f'{process_pid} RSS')
-                plt.plot(dates, pss_samples, linewidth=1, label=f'{process_pid} PSS')
-                plt.plot(dates, uss_samples, linewidth=1, label=f'{process_pid} USS')
-                plt.plot(dates, vss_samples, linewidth=1, label=f'{process_pid} VSS')
-                plt.plot(dates, swap_samples, linewidth=1, label=f'{process_pid} SWAP')
-                if rss_samples:
-                    ax.annotate(str(round(rss_samples[0], 2)), xy=(dates[0], rss_samples[0]),
-                        xytext=(4, 4), textcoords='offset points')
-                    ax.annotate(str(round(rss_samples[-1], 2)), xy=(dates[-1],
-                        rss_samples[-1]), xytext=(4, -4), textcoords='offset points')
-                if pss_samples:
-                    ax.annotate(str(round(pss_samples[0], 2)), xy=(dates[0],
-                        pss_samples[0]), xytext=(4, 4), textcoords='offset points')
-                    ax.annotate(str(round(pss_samples[-1], 2)), xy=(dates[-1],
-                        pss_samples[-1]), xytext=(4, -4), textcoords='offset points')
-                if uss_samples:
-                    ax.annotate(str(round(uss_samples[0], 2)), xy=(dates[0],
-                        uss_samples[0]), xytext=(4, 4), textcoords='offset points')
-                    ax.annotate(str(round(uss_samples[-1], 2)), xy=(dates[-1],
-                        uss_samples[-1]), xytext=(4, -4), textcoords='offset points')
-                if vss_samples:
-                    ax.annotate(str(round(vss_samples[0], 2)), xy=(dates[0],
-                        vss_samples[0]), xytext=(4, 4), textcoords='offset points')
-                    ax.annotate(str(round(vss_samples[-1], 2)), xy=(dates[-1],
-                        vss_samples[-1]), xytext=(4, -4), textcoords='offset points')
-                if swap_samples:
-                    ax.annotate(str(round(swap_samples[0], 2)), xy=(dates[0],
-                        swap_samples[0]), xytext=(4, 4), textcoords='offset points')
-                    ax.annotate(str(round(swap_samples[-1], 2)), xy=(dates[-1],
-                        swap_samples[-1]), xytext=(4, -4), textcoords='offset points')
-
-            datefmt = mdates.DateFormatter('%m-%d %H-%M')
-            ax.xaxis.set_major_formatter(datefmt)
-            ax.grid(True)
-            plt.legend(loc='upper center', bbox_to_anchor=(1.2, 0.1), fancybox=True)
-            fig.autofmt_xdate()
-            plt.savefig(str(file_name), bbox_inches='tight')
-            plt.close()
-
-    timediff = time.time() - starttime
-    logger.info(f'Plotted Same Type/Process Memory in: {timediff}')
-
-
-def summary_csv_measurement_dump(csv_file, process_results, measurement):
+            lines = []
+            for process_pid in process_pids:
+                for metric in SmemSampleStore.METRICS:
+                    lines.append((f'{process_pid} {metric.upper()}',
+                        *graph_series(process_samples, process_name, process_pid, metric)))
+            graph_jobs.append({
+                'file_name': str(graph_file_path.join(f'{process_name}-all.png')),
+                'title': 'Provider: {}\nProcess/Worker: {}\n{}'.format(provider_names,
+                    process_name, pids),
+                'lines': lines,
+                'annotate': True})
+    return graph_jobs
+
+
+def summary_csv_measurement_dump(csv_file, process_samples, measurement):
     csv_file.write('---------------------------------------------\n')
     csv_file.write(f'Per Process {measurement.upper()} Memory Usage\n')
     csv_file.write('---------------------------------------------\n')
     csv_file.write('Process/Worker Type,PID,Start of test,End of test\n')
     for ordered_name in process_order:
-        if ordered_name in process_results:
-            for process_pid in sorted(process_results[ordered_name]):
-                start = list(process_results[ordered_name][process_pid].keys())[0]
-                end = list(process_results[ordered_name][process_pid].keys())[-1]
+        if ordered_name in process_samples:
+            for process_pid in sorted(process_samples.process_pids(ordered_name)):
                 csv_file.write('{},{},{},{}\n'.format(ordered_name, process_pid,
-                    round(process_results[ordered_name][process_pid][start][measurement], 2),
-                    round(process_results[ordered_name][process_pid][end][measurement], 2)))
+                    round(process_samples.first(ordered_name, process_pid, measurement), 2),
+                    round(process_samples.last(ordered_name, process_pid, measurement), 2)))
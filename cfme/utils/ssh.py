@@ -117,6 +117,40 @@ class SSHResult:
         return self.rc != 0
 
 
+@attr.s(frozen=True)
+class SSHScriptResult:
+    """Results of the steps of a :py:meth:`SSHClient.run_script` call.
+
+    Iterating over it or indexing it gives the :py:class:`SSHResult` of every step that ran, steps
+    after a failed one are not run when stopping on error. It evaluates to a truthy value when all
+    of the steps ran and succeeded.
+    """
+    steps = attr.ib()
+    results = attr.ib()
+    rc = attr.ib()
+    output = attr.ib(repr=False)
+
+    def __bool__(self):
+        return self.success
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __getitem__(self, index):
+        return self.results[index]
+
+    def __len__(self):
+        return len(self.results)
+
+    @property
+    def success(self):
+        return len(self.results) == len(self.steps) and all(self.results)
+
+    @property
+    def failed_steps(self):
+        return [result for result in self.results if result.failed]
+
+
 _ssh_key_file = project_path.join('.generated_ssh_key')
 _ssh_pubkey_file = project_path.join('.generated_ssh_key.pub')
 
@@ -498,6 +532,38 @@ class SSHClient(paramiko.SSHClient):
         # Return whatever we have in the output
         return SSHResult(rc=1, output=''.join(output), command=command)
 
+    def run_script(self, steps, timeout=RUNCMD_TIMEOUT, stop_on_error=False, **kwargs):
+        """Run several commands over SSH in one session and one round-trip.
+
+        The steps are run one after another in subshells, each with its stderr merged into its
+        stdout. Their exit codes and outputs are told apart by marker lines.
+
+        Args:
+            steps: The commands. Each supports taking dicts as version picking.
+            timeout: Timeout after which the execution of the whole script fails.
+            stop_on_error: Do not run the steps after a failed one.
+            kwargs: Passed to :py:meth:`run_command`, e.g. ``ensure_host``.
+        Returns:
+            A :py:class:`SSHScriptResult` instance.
+        """
+        steps = [VersionPicker(step).pick(self.vmdb_version) if isinstance(step, dict) else step
+                 for step in steps]
+        marker = f'__step_{fauxfactory.gen_alpha(12)}__'
+        script = []
+        for index, step in enumerate(steps):
+            script.append(f'( {step}\n) 2>&1; rc=$?; printf "\\n{marker} {index} %d\\n" $rc')
+            if stop_on_error:
+                script.append('[ $rc -eq 0 ] || exit $rc')
+        result = self.run_command('\n'.join(script), timeout=timeout, **kwargs)
+
+        results = []
+        start = 0
+        for match in re.finditer(rf'\r?\n{marker} (\d+) (\d+)\r?\n', result.output):
+            results.append(SSHResult(command=steps[int(match.group(1))], rc=int(match.group(2)),
+                                     output=result.output[start:match.start()]))
+            start = match.end()
+        return SSHScriptResult(steps=steps, results=results, rc=result.rc, output=result.output)
+
     def cpu_spike(self, seconds=60, cpus=2, **kwargs):
         """Creates a CPU spike of specific length and processes.
 
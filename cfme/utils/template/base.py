@@ -1,13 +1,7 @@
-import hashlib
-import os
-import re
 from contextlib import closing
-from os import path
 from threading import Lock
-from urllib import request
 from urllib.error import URLError
 from urllib.request import urlopen
-from zipfile import ZipFile
 
 from cached_property import cached_property
 from fauxfactory import gen_alphanumeric
@@ -28,6 +22,8 @@ from cfme.utils.net import wait_pingable
 from cfme.utils.path import project_path
 from cfme.utils.providers import get_mgmt
 from cfme.utils.ssh import SSHClient
+from cfme.utils.template.image_cache import image_cache
+from cfme.utils.template.image_cache import ImageCacheError
 from cfme.utils.wait import TimedOutError
 from cfme.utils.wait import wait_for
 
@@ -117,7 +113,7 @@ class ProviderTemplateUpload:
                          "Please specify stream with --stream", self.stream)
             raise TemplateUploadException("Cannot get stream URL.")
 
-    @property
+    @cached_property
     def raw_image_url(self):
         """ Returns URL to exact image file.
 
@@ -280,94 +276,39 @@ class ProviderTemplateUpload:
 
     @log_wrap("checksum verification")
     def checksum_verification(self):
-        # Download checksum from url
-        checksum = None
-        try:
-            response = request.urlopen(f'{self.image_url}/SHA256SUM')
-            checksums = response.read().decode('utf-8')
-            for line in checksums.split("\n"):
-                if self.image_name in line:
-                    checksum = line.strip().split()[0]
-        except URLError:
-            logger.warn('Failed download of checksum using urllib')
-        if not checksum:
+        """Checks the local image against the checksum of the stream, see :py:class:`ImageCache`
+
+        The checksum was computed while downloading, so the image is not read again.
+        """
+        expected = image_cache.expected_checksum(self.raw_image_url)
+        if not expected:
             logger.warn('Failed to get checksum of image from url')
-        else:
-            # Get checksum of downloaded file
-            sha256 = hashlib.sha256()
-            image_sha256 = None
-            try:
-                with open(self.image_name, 'rb') as f:
-                    for block in iter(lambda: f.read(65536), b''):
-                        sha256.update(block)
-                image_sha256 = sha256.hexdigest()
-            except Exception:
-                logger.warn('Failed to get checksum of image')
-            if image_sha256 and not checksum == image_sha256:
-                logger.exception('Local image checksum does not match checksum from url')
-                return False
-            else:
-                logger.info('Local image checksum matches checksum from url')
-                return True
+            return True
+        local_path = image_cache.local_path(self.raw_image_url)
+        if image_cache.cached_digest(local_path) != expected:
+            logger.error('Local image checksum does not match checksum from url')
+            return False
+        logger.info('Local image checksum matches checksum from url')
+        return True
 
     @log_wrap("download image locally")
     def download_image(self):
-        ARCHIVE_TYPES = ['zip']
-        suffix = re.compile(
-            r'^.*?[.](?P<ext>tar\.gz|tar\.bz2|\w+)$').match(self.image_name).group('ext')
-        # Check if file exists already:
-        if path.isfile(self.image_name):
-            if self.checksum_verification():
-                logger.info('Local image found, skipping download: %s', self.local_file_path)
-                if suffix not in ARCHIVE_TYPES:
-                    return True
-            else:
-                os.remove(self.local_file_path)
+        """Gets the image from the shared :py:data:`image_cache`, downloading it only once for
+        all the uploaders.
 
-        if not path.isfile(self.image_name):
-            # Download file to cli-tool-client
-            try:
-                request.urlretrieve(self.raw_image_url, self.local_file_path)
-            except URLError:
-                logger.exception('Failed download of image using urllib')
-                return False
-
-        self.checksum_verification()
-
-        # Unzips image  when suffix is zip or tar.gz and then changes image name to extracted one.
-        # For EC2 and SCVMM images is zip used and for GCE is tar.gz used.
-
-        archive_path = self.image_name
-        if suffix not in ARCHIVE_TYPES:
-            return True
-        else:
-            if suffix == 'zip':
-                try:
-                    archive = ZipFile(archive_path)
-                    zipinfo = archive.infolist()
-                    self._unzipped_file = zipinfo[0].filename
-                except Exception:
-                    logger.exception("Getting information of {} archive failed.".format(
-                        self.image_name))
-                    return False
-
-                if path.isfile(self.image_name):
-                    try:
-                        os.remove(self.image_name)
-                    except Exception:
-                        logger.exception("Deleting previously unpacked file {} failed.".format(
-                            self.image_name))
-                        return False
-                logger.info(f"Image archived - unpacking as : {self._unzipped_file}")
-                try:
-                    archive.extractall()
-                    archive.close()
-                    # remove the archive
-                    os.remove(archive_path)
-                    return True
-                except Exception:
-                    logger.exception(f"{suffix} archive unpacked failed.")
-                    return False
+        Zip archives (EC2 and SCVMM) are unpacked and the image name changes to the extracted one.
+        """
+        try:
+            local_path = image_cache.fetch(self.raw_image_url)
+            if local_path.endswith('.zip'):
+                self._unzipped_file = image_cache.unpack(local_path)
+        except ImageCacheError:
+            logger.exception('Failed download of image')
+            return False
+        except Exception:
+            logger.exception("Unpacking of %s failed.", self.raw_image_url)
+            return False
+        return True
 
     @log_wrap('add template to glance')
     def glance_upload(self):
@@ -401,7 +342,8 @@ class ProviderTemplateUpload:
             client.images.add_location(glance_image.id, self.raw_image_url, {})
         else:
             if self.download_image():
-                client.images.upload(glance_image.id, open(self.local_file_path, 'rb'))
+                with open(self.local_file_path, 'rb') as image:
+                    client.images.upload(glance_image.id, image)
             else:
                 return False
         return True
@@ -413,12 +355,11 @@ class ProviderTemplateUpload:
                 https://gist.github.com/carbonin/a25b84efca2e6b3c3f91b673821a22c8
         """
 
-        def check_appliance_init(client_args):
+        def check_appliance_init(ssh_client):
             app_init_complete_check = ['Active: inactive (dead)', 'Loaded: loaded',
                                        'Started Initialize Appliance Database']
             try:
-                out = self.execute_ssh_command('systemctl status appliance-initialize',
-                                               client_args=client_args)
+                out = ssh_client.run_command('systemctl status appliance-initialize')
                 return all(check in out.output for check in app_init_complete_check)
             except Exception:
                 # Have seen instances where IP is resolvable but SSH connect failed.
@@ -440,31 +381,35 @@ class ProviderTemplateUpload:
             "systemctl disable postgresql.service",
             "systemctl disable appliance-initialize"
         ]
-        # Get SSH Client args
-        client_args = self.raw_vm_ssh_client_args
-        # Check to make sure appliance-initialization has run
-        wait_for(func=check_appliance_init,
-                 func_args=[client_args],
-                 fail_condition=False,
-                 delay=5,
-                 timeout=300,
-                 message='Waiting for appliance-initialization to complete')
-
-        for service in upstream_services:
-            service_result = self.execute_ssh_command(f'{service}', client_args=client_args)
-            assert service_result
+        steps = list(upstream_services)
         for cleanup in upstream_cleanup:
-            file_result = self.execute_ssh_command(f'rm -rf {cleanup}', client_args=client_args)
-            assert file_result
+            steps.append(f'rm -rf {cleanup}')
+            steps.append(f'ls -lh {cleanup.rstrip("*")} || true')
+        steps.append('ls -lh /var/lib/pgsql/data/')
 
-            files_after_cleanup = self.execute_ssh_command(f'ls -lh {cleanup.rstrip("*")}',
-                                                           client_args=client_args)
-            logger.info(f'Files after MIQ cleanup: \n{files_after_cleanup.output}\n')
+        # One connection for waiting and the cleanup, the steps in a single round-trip.
+        # The client connects lazily, so a failed connection is retried by the next check.
+        ssh_client = SSHClient(**self.raw_vm_ssh_client_args)
+        try:
+            # Check to make sure appliance-initialization has run
+            wait_for(func=check_appliance_init,
+                     func_args=[ssh_client],
+                     fail_condition=False,
+                     delay=5,
+                     timeout=300,
+                     message='Waiting for appliance-initialization to complete')
+            result = ssh_client.run_script(steps, stop_on_error=True)
+        finally:
+            ssh_client.close()
 
-        check_pgsql = self.execute_ssh_command('ls -lh /var/lib/pgsql/data/',
-                                               client_args=client_args)
+        for step_result in result:
+            if step_result.command.startswith('ls '):
+                logger.info(f'Files after MIQ cleanup: \n{step_result.output}\n')
+        if not result:
+            raise TemplateUploadException(
+                f'Cleanup step failed: {result.failed_steps or result.output}')
 
-        if 'total 0' in check_pgsql.output:
+        if 'total 0' in result[-1].output:
             logger.info('Finished cleaning out the default setup of a ManageIQ appliance')
             return True
         else:
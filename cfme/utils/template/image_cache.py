@@ -0,0 +1,193 @@
+"""Local cache of the stream images uploaded as templates
+
+All uploaders of one template upload run share an :py:class:`ImageCache`, so an image is
+downloaded once no matter how many providers it is uploaded to. Servers accepting ranges are
+downloaded in parallel chunks that are hashed in order as they arrive, so the checksum costs no
+extra pass over the file. The digest is stored next to the image and a later run reuses the
+image when the digest still matches the stream's ``SHA256SUM``.
+"""
+import hashlib
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from zipfile import ZipFile
+
+import requests
+
+from cfme.utils.log import logger
+from cfme.utils.path import project_path
+
+CHUNK_SIZE = 16 * 2**20
+MAX_WORKERS = 4
+
+
+class ImageCacheError(Exception):
+    """Raised when an image can not be downloaded or fails its checksum"""
+    pass
+
+
+def parse_checksums(text):
+    """Returns a dictionary of file name to digest from a ``SHA256SUM`` file"""
+    checksums = {}
+    for line in text.splitlines():
+        parts = line.strip().split()
+        if len(parts) == 2:
+            digest, file_name = parts
+            checksums[file_name.lstrip('*')] = digest
+    return checksums
+
+
+class ImageCache:
+    """Downloads images once into ``directory`` and keeps them there
+
+    Args:
+        directory: where the images are stored, the project directory by default
+        chunk_size: size of the ranges downloaded in parallel
+        max_workers: number of ranges downloaded at the same time
+    """
+
+    def __init__(self, directory=None, chunk_size=CHUNK_SIZE, max_workers=MAX_WORKERS):
+        self.directory = directory or project_path.strpath
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.session = requests.Session()
+        self._locks = defaultdict(Lock)
+        self._locks_lock = Lock()
+        self._checksums = {}
+
+    def _lock(self, key):
+        with self._locks_lock:
+            return self._locks[key]
+
+    def local_path(self, url):
+        return os.path.join(self.directory, url.split('/')[-1])
+
+    def expected_checksum(self, url):
+        """Returns the digest of the image listed in the ``SHA256SUM`` of its directory"""
+        image_dir, file_name = url.rsplit('/', 1)
+        with self._lock(image_dir):
+            if image_dir not in self._checksums:
+                try:
+                    response = self.session.get(f'{image_dir}/SHA256SUM', timeout=60)
+                    response.raise_for_status()
+                    self._checksums[image_dir] = parse_checksums(response.text)
+                except requests.RequestException:
+                    logger.warning('Failed download of checksums from %s', image_dir)
+                    self._checksums[image_dir] = {}
+        return self._checksums[image_dir].get(file_name)
+
+    def fetch(self, url):
+        """Returns the local path of the image at ``url``, downloading it if it is not cached
+
+        Concurrent calls for the same image wait for a single download.
+
+        Raises:
+            :py:class:`ImageCacheError` when the download fails or the checksum does not match
+        """
+        local_path = self.local_path(url)
+        with self._lock(local_path):
+            expected = self.expected_checksum(url)
+            if expected is None:
+                logger.warning('Failed to get checksum of image %s from url', url)
+            cached = self.cached_digest(local_path)
+            if cached and (expected is None or cached == expected):
+                logger.info('Local image found, skipping download: %s', local_path)
+                return local_path
+
+            digest = self._download(url, local_path)
+            if expected is not None and digest != expected:
+                os.remove(local_path)
+                raise ImageCacheError(
+                    f'Checksum of {url} does not match: {digest} != {expected}')
+            with open(f'{local_path}.sha256', 'w') as f:
+                f.write(digest)
+            logger.info('Downloaded image %s, checksum %s', local_path, digest)
+            return local_path
+
+    def unpack(self, archive_path):
+        """Extracts the first member of a zip archive next to it, unless it already was
+
+        Returns:
+            name of the extracted file
+        """
+        with self._lock(archive_path):
+            with ZipFile(archive_path) as archive:
+                member = archive.infolist()[0].filename
+                if not os.path.isfile(os.path.join(self.directory, member)):
+                    logger.info('Image archived - unpacking as: %s', member)
+                    archive.extract(member, self.directory)
+            return member
+
+    @staticmethod
+    def cached_digest(local_path):
+        if not os.path.isfile(local_path):
+            return None
+        try:
+            with open(f'{local_path}.sha256') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _download(self, url, local_path):
+        """Downloads ``url`` to ``local_path`` and returns its sha256 digest"""
+        partial_path = f'{local_path}.part'
+        try:
+            head = self.session.head(url, allow_redirects=True, timeout=60)
+            head.raise_for_status()
+            size = int(head.headers.get('Content-Length', 0))
+            with open(partial_path, 'wb') as f:
+                if head.headers.get('Accept-Ranges') == 'bytes' and size > self.chunk_size:
+                    digest = self._download_ranges(url, size, f)
+                else:
+                    digest = self._download_stream(url, f)
+        except (requests.RequestException, OSError, ImageCacheError) as e:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise ImageCacheError(f'Failed download of image {url}: {e}')
+        os.replace(partial_path, local_path)
+        return digest
+
+    def _download_stream(self, url, f):
+        sha256 = hashlib.sha256()
+        with self.session.get(url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            for block in response.iter_content(2**20):
+                f.write(block)
+                sha256.update(block)
+        return sha256.hexdigest()
+
+    def _get_range(self, url, start, end):
+        response = self.session.get(url, headers={'Range': f'bytes={start}-{end}'}, timeout=60)
+        response.raise_for_status()
+        if response.status_code != 206 or len(response.content) != end - start + 1:
+            raise ImageCacheError(f'Server did not return range {start}-{end} of {url}')
+        return response.content
+
+    def _download_ranges(self, url, size, f):
+        """Downloads the ranges in parallel, writing and hashing them in order
+
+        At most twice ``max_workers`` ranges are held in memory while an earlier one is pending.
+        """
+        sha256 = hashlib.sha256()
+        ranges = [(start, min(start + self.chunk_size, size) - 1)
+                  for start in range(0, size, self.chunk_size)]
+        window = 2 * self.max_workers
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                for index in range(len(ranges)):
+                    for queued in range(index, min(index + window, len(ranges))):
+                        if queued not in pending:
+                            pending[queued] = executor.submit(self._get_range, url, *ranges[queued])
+                    data = pending.pop(index).result()
+                    f.write(data)
+                    sha256.update(data)
+            finally:
+                for future in pending.values():
+                    future.cancel()
+        return sha256.hexdigest()
+
+
+#: Cache shared by the uploaders of a template upload run
+image_cache = ImageCache()
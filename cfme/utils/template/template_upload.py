@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import argparse
 import sys
-from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
 
 from miq_version import TemplateName
 
@@ -71,6 +71,13 @@ def parse_cmd_line():
         dest='template_name',
         help='Set the name of the template'
     )
+    parser.add_argument(
+        '--max-uploads',
+        dest='max_uploads',
+        type=int,
+        default=4,
+        help='Number of providers uploaded to at the same time, the image is downloaded once'
+    )
     parser.add_argument(
         '--print-name-only',
         dest='print_name_only',
@@ -135,7 +142,7 @@ if __name__ == '__main__':
         logger.error('Template upload for %r is not implemented yet.', provider_type)
         sys.exit(1)
 
-    thread_queue = []
+    uploaders = []
 
     # create uploader objects for each provider
     for provider_type in provider_types:
@@ -162,14 +169,13 @@ if __name__ == '__main__':
                 logger.info("%s:%s Skipped due to block upload.", uploader.log_name, provider_key)
                 continue
 
-            thread = Thread(target=uploader.main)
-            thread.daemon = True
-            thread_queue.append(thread)
-            thread.start()
+            uploaders.append(uploader)
 
-    if not thread_queue:
+    if not uploaders:
         logger.error('No providers or types matched, check arguments')
         sys.exit(1)
 
-    for thread in thread_queue:
-        thread.join()
+    # uploaders of the same image wait for a single download in the image cache
+    with ThreadPoolExecutor(max_workers=cmd_args.max_uploads) as executor:
+        for uploader in uploaders:
+            executor.submit(uploader.main)
@@ -0,0 +1,47 @@
+"""sqlite stand-in of the appliance database, for the tests of the queries made to it"""
+import attr
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import scoped_session
+from sqlalchemy.orm import sessionmaker
+
+
+class FakeDb:
+    """The database client of the appliance, with the tables declared on ``base``
+
+    The tests change the database from other threads, like the appliance would while the
+    framework waits, so every thread gets a session of its own and the pooled sqlite connections
+    may be used by any thread.
+    """
+
+    def __init__(self, path, base):
+        self.engine = create_engine(
+            f'sqlite:///{path}', connect_args={'check_same_thread': False})
+        base.metadata.create_all(self.engine)
+        self.session = scoped_session(sessionmaker(bind=self.engine, autocommit=True))
+        self.tables = {table.__tablename__: table for table in base.__subclasses__()}
+
+    def __getitem__(self, table_name):
+        return self.tables[table_name]
+
+    def appliance(self, **kwargs):
+        return FakeAppliance(self, **kwargs)
+
+
+@attr.s
+class FakeAppliance:
+    client = attr.ib()
+    evm_id = attr.ib(default=1)
+    is_storage_enabled = attr.ib(default=False)
+
+    @property
+    def db(self):
+        return self
+
+
+@pytest.fixture
+def vmdb(tmpdir):
+    """Returns a function creating the stand-in database with the tables declared on a base"""
+    def _vmdb(base):
+        return FakeDb(tmpdir.join('vmdb.sqlite').strpath, base)
+    return _vmdb
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from cfme.utils.appliance.configure import CANCELLED
+from cfme.utils.appliance.configure import ConfigurePlan
+from cfme.utils.appliance.configure import ConfigurePlanError
+from cfme.utils.appliance.configure import DISABLED
+from cfme.utils.appliance.configure import FAILED
+from cfme.utils.appliance.configure import RAN
+from cfme.utils.appliance.configure import SKIPPED
+
+
+def test_plan_runs_independent_steps_concurrently():
+    plan = ConfigurePlan('test')
+    # Both steps wait for each other, so they only finish when running at the same time
+    barrier = threading.Barrier(2, timeout=5)
+    order = []
+
+    @plan.step()
+    def ssh():
+        order.append('ssh')
+
+    @plan.step(requires=['ssh'])
+    def audit():
+        barrier.wait()
+
+    @plan.step(requires=['ssh'])
+    def db():
+        barrier.wait()
+        order.append('db')
+
+    @plan.step(requires=['db'])
+    def evm():
+        order.append('evm')
+
+    results = plan.run()
+    assert order == ['ssh', 'db', 'evm']
+    assert {result.status for result in results.values()} == {RAN}
+
+
+def test_plan_skips_and_triggers():
+    plan = ConfigurePlan('test', max_workers=1)
+    ran = []
+
+    @plan.step(done=lambda: True)
+    def cert():
+        ran.append('cert')
+
+    @plan.step(enabled=lambda: False)
+    def ntp():
+        ran.append('ntp')
+
+    @plan.step(requires=['cert', 'ntp'], triggered_by=['cert', 'ntp'])
+    def restart():
+        ran.append('restart')
+
+    results = plan.run()
+    assert ran == []
+    assert [results[name].status for name in ['cert', 'ntp', 'restart']] == [
+        SKIPPED, DISABLED, DISABLED]
+
+    plan.steps['cert'].done = lambda: False
+    plan.run()
+    assert ran == ['cert', 'restart']
+
+
+def test_plan_failure_cancels_dependents():
+    plan = ConfigurePlan('test')
+
+    @plan.step()
+    def db():
+        raise ValueError('db failed')
+
+    @plan.step(requires=['db'])
+    def evm():
+        pass
+
+    with pytest.raises(ValueError):
+        plan.run()
+    assert plan.results['db'].status == FAILED
+    assert plan.results['evm'].status == CANCELLED
+
+
+def test_plan_validation():
+    plan = ConfigurePlan('test')
+    plan.step(name='a', requires=['b'])(lambda: None)
+    plan.step(name='b', requires=['a'])(lambda: None)
+    with pytest.raises(ConfigurePlanError):
+        plan.run()
+    with pytest.raises(ConfigurePlanError):
+        plan.step(name='a')(lambda: None)
@@ -0,0 +1,41 @@
+import base64
+import os
+
+import pytest
+
+from artifactor.blobs import BLOB_THRESHOLD
+from artifactor.blobs import BlobStore
+from cfme.fixtures.artifactor_plugin import filedump_blob_args
+
+
+@pytest.fixture
+def blobs(tmpdir):
+    return BlobStore(tmpdir.join('blobs').strpath)
+
+
+def test_blob_store_dedupes_and_links(blobs, tmpdir):
+    contents = os.urandom(100)
+    digest = blobs.put(contents)
+    assert blobs.put(contents) == digest
+    assert os.listdir(os.path.dirname(blobs.path(digest))) == [digest]
+
+    artifact = tmpdir.join('screenshot.png')
+    artifact.write('old')
+    blobs.link(digest, artifact.strpath)
+    assert artifact.read_binary() == contents
+    blobs.clear()
+    assert artifact.read_binary() == contents
+
+
+def test_filedump_blob_args(blobs):
+    small = {'description': 'Short traceback', 'contents': 'trace'}
+    assert filedump_blob_args(blobs, small) is small
+
+    screenshot = os.urandom(BLOB_THRESHOLD)
+    args = filedump_blob_args(blobs, {
+        'description': 'Screenshot', 'contents': base64.b64encode(screenshot),
+        'contents_base64': True, 'file_type': 'screenshot'})
+    assert args['contents'] is None
+    assert not args['contents_base64']
+    with open(blobs.path(args['blob']), 'rb') as f:
+        assert f.read() == screenshot
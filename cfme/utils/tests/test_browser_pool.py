@@ -0,0 +1,87 @@
+import time
+
+from selenium import webdriver
+
+from cfme.utils.browser import BrowserFactory
+from cfme.utils.browser import BrowserManager
+from cfme.utils.browser import BrowserPool
+from cfme.utils.wait import wait_for
+
+
+class FakeDriver:
+    def __init__(self, url_key):
+        self.url_key = url_key
+        self.alive = True
+
+    @property
+    def current_url(self):
+        if not self.alive:
+            raise RuntimeError('browser is dead')
+        return self.url_key
+
+    def quit(self):
+        self.alive = False
+
+
+class FakeFactory:
+    def __init__(self):
+        self.created = []
+
+    def create(self, url_key):
+        browser = FakeDriver(url_key)
+        self.created.append(browser)
+        return browser
+
+    def close(self, browser):
+        if browser:
+            browser.quit()
+
+    def clone(self):
+        return self
+
+
+def pool_filled(pool, url_key):
+    wait_for(lambda: pool._ready[url_key], num_sec=5, delay=0.05)
+
+
+def test_manager_swaps_in_warm_browser():
+    factory = FakeFactory()
+    warmed = []
+    pool = BrowserPool(factory, size=1, warmup=warmed.append)
+    manager = BrowserManager(factory, pool=pool)
+
+    cold = manager.start('https://appliance')
+    pool_filled(pool, 'https://appliance')
+    warm = manager.start('https://appliance')
+    assert warm is not cold
+    assert not cold.alive
+    assert warmed[0] is warm
+    # refilled for the next recycle
+    pool_filled(pool, 'https://appliance')
+    pool.clear()
+    assert len(factory.created) == 3
+    assert not factory.created[-1].alive
+
+
+def test_stale_browsers_are_discarded():
+    factory = FakeFactory()
+    pool = BrowserPool(factory, size=1, max_idle=60)
+    pool.fill('https://appliance')
+    pool_filled(pool, 'https://appliance')
+    factory.created[0].alive = False
+    assert pool.take('https://appliance') is None
+
+    pool_filled(pool, 'https://appliance')
+    ready_factory, browser, started = pool._ready['https://appliance'][0]
+    pool._ready['https://appliance'][0] = (ready_factory, browser, time.time() - 120)
+    assert pool.take('https://appliance') is None
+    assert not browser.alive
+    pool.clear()
+
+
+def test_factory_clone_copies_browser_kwargs():
+    factory = BrowserFactory(webdriver.Chrome, {'options': {'args': ['--headless']}})
+    clone = factory.clone()
+    assert clone is not factory
+    clone.browser_kwargs['options']['args'].append('--incognito')
+    assert factory.browser_kwargs['options']['args'] == ['--headless']
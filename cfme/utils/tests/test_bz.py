@@ -0,0 +1,89 @@
+import threading
+from xmlrpc.server import SimpleXMLRPCRequestHandler
+from xmlrpc.server import SimpleXMLRPCServer
+
+import pytest
+
+from cfme.utils.bz import BugCache
+from cfme.utils.bz import Bugzilla
+
+
+def fake_bug(bug_id, blocks=(), copy_of=None, dupe_of=None):
+    if copy_of is not None:
+        text = f"+++ This bug was initially created as a clone of Bug #{copy_of} +++"
+    else:
+        text = "Description"
+    return {
+        'id': bug_id, 'summary': f'Bug {bug_id}', 'blocks': list(blocks), 'flags': [],
+        'status': 'CLOSED' if dupe_of else 'NEW', 'resolution': 'DUPLICATE' if dupe_of else '',
+        'dupe_of': dupe_of or 0, 'comments': [{'text': text}]}
+
+
+# 1 has copies 2 and 3 (3 is also a duplicate of 4), 1 blocks the tracker 5 as well
+BUGS = {
+    1: fake_bug(1, blocks=[2, 3, 5]),
+    2: fake_bug(2, copy_of=1),
+    3: fake_bug(3, copy_of=1, dupe_of=4),
+    4: fake_bug(4, blocks=[6]),
+    5: fake_bug(5),
+    6: fake_bug(6, copy_of=4),
+}
+
+
+class BugzillaRequestHandler(SimpleXMLRPCRequestHandler):
+    rpc_paths = ('/xmlrpc.cgi',)
+
+
+@pytest.fixture
+def fake_bugzilla():
+    """Fake Bugzilla XML-RPC server counting the Bug.get requests."""
+    server = SimpleXMLRPCServer(
+        ('127.0.0.1', 0), requestHandler=BugzillaRequestHandler, logRequests=False,
+        allow_none=True)
+    server.requests = []
+
+    def bug_get(params):
+        server.requests.append(sorted(params['ids']))
+        return {'bugs': [BUGS[bug_id] for bug_id in params['ids'] if bug_id in BUGS]}
+
+    server.register_function(lambda *args: {'version': '5.0'}, 'Bugzilla.version')
+    server.register_function(lambda *args: {'extensions': {}}, 'Bugzilla.extensions')
+    server.register_function(bug_get, 'Bug.get')
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def new_bugzilla(server, tmpdir):
+    url = 'http://127.0.0.1:{}/xmlrpc.cgi'.format(server.server_address[1])
+    return Bugzilla(url=url, cookiefile=None, tokenfile=None,
+                    disk_cache=BugCache.for_url(url, cache_dir=tmpdir.strpath))
+
+
+def test_prefetch_batches_variants(fake_bugzilla, tmpdir):
+    bz = new_bugzilla(fake_bugzilla, tmpdir)
+    bz.prefetch([1])
+    # 1, then its blocks, then the duplicate target 4, then its blocks
+    assert fake_bugzilla.requests == [[1], [2, 3, 5], [4], [6]]
+    variants = {bug.id for bug in bz.get_bug_variants(1)}
+    assert variants == {1, 2, 3, 4, 6}
+    assert len(fake_bugzilla.requests) == 4
+
+
+def test_disk_cache_shared(fake_bugzilla, tmpdir):
+    new_bugzilla(fake_bugzilla, tmpdir).prefetch([1])
+    requests = len(fake_bugzilla.requests)
+    # Like a slave, a new instance loads the bugs from the disk cache
+    bz = new_bugzilla(fake_bugzilla, tmpdir)
+    bz.prefetch([1])
+    assert {bug.id for bug in bz.get_bug_variants(1)} == {1, 2, 3, 4, 6}
+    assert len(fake_bugzilla.requests) == requests
+
+
+def test_disk_cache_expires(tmpdir):
+    cache = BugCache(tmpdir.strpath, ttl=0)
+    cache.put(1, {'id': 1})
+    assert cache.get(1) is None
+    assert BugCache(tmpdir.strpath, ttl=60).get(1) == {'id': 1}
@@ -0,0 +1,74 @@
+import os
+import stat
+
+import pytest
+import yaycl
+
+from cfme.test_framework import config_snapshot
+from cfme.test_framework.config_snapshot import ConfigSnapshot
+from cfme.test_framework.config_snapshot import SnapshotConfig
+
+
+@pytest.fixture
+def config_dir(tmpdir):
+    config_dir = tmpdir.mkdir('conf')
+    config_dir.join('cfme_data.yaml').write('basic_info:\n  app_version: "5.11"\n')
+    config_dir.join('cfme_data.local.yaml').write('basic_info:\n  local: true\n')
+    return config_dir
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    loaded = []
+    config_file = yaycl.config_file
+
+    def counting_config_file(file_path, **options):
+        loaded.append(os.path.basename(file_path))
+        return config_file(file_path, **options)
+
+    monkeypatch.setattr(yaycl, 'config_file', counting_config_file)
+    return loaded
+
+
+def new_config(config_dir, tmpdir):
+    snapshot = ConfigSnapshot(config_dir.strpath, tmpdir.join('snapshots').strpath)
+    return SnapshotConfig(config_dir.strpath, snapshot)
+
+
+def test_snapshot_reused(config_dir, tmpdir, loads):
+    conf = new_config(config_dir, tmpdir)
+    assert conf.cfme_data.basic_info.app_version == '5.11'
+    assert conf.cfme_data.basic_info.local
+    assert loads == ['cfme_data.yaml', 'cfme_data.local.yaml']
+
+    snapshot_path = new_config(config_dir, tmpdir)._snapshot.path
+    assert stat.S_IMODE(os.stat(snapshot_path).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(os.path.dirname(snapshot_path)).st_mode) == 0o700
+
+    conf = new_config(config_dir, tmpdir)
+    conf.runtime['cfme_data']['basic_info']['app_version'] = '5.10'
+    assert conf.cfme_data.basic_info.app_version == '5.10'
+    assert conf.cfme_data.basic_info.local
+    # Both the files came from the snapshot
+    assert loads == ['cfme_data.yaml', 'cfme_data.local.yaml']
+
+
+def test_snapshot_invalidated(config_dir, tmpdir, loads):
+    assert new_config(config_dir, tmpdir).cfme_data.basic_info.app_version == '5.11'
+    config_dir.join('cfme_data.yaml').write('basic_info:\n  app_version: "5.12"\n')
+    assert new_config(config_dir, tmpdir).cfme_data.basic_info.app_version == '5.12'
+    assert loads.count('cfme_data.yaml') == 2
+
+
+def test_snapshot_not_read_if_shared(config_dir, tmpdir, loads):
+    new_config(config_dir, tmpdir).cfme_data
+    snapshot_path = new_config(config_dir, tmpdir)._snapshot.path
+    os.chmod(snapshot_path, 0o644)
+    new_config(config_dir, tmpdir).cfme_data
+    assert loads.count('cfme_data.yaml') == 2
+
+
+def test_snapshot_disabled(config_dir, monkeypatch):
+    monkeypatch.setenv(config_snapshot.SNAPSHOT_DIR_ENV, 'off')
+    conf = config_snapshot.create_config(config_dir.strpath)
+    assert not isinstance(conf, SnapshotConfig)
@@ -0,0 +1,91 @@
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from cfme.utils.template.image_cache import ImageCache
+from cfme.utils.template.image_cache import ImageCacheError
+
+IMAGE = os.urandom(1000)
+
+
+@pytest.fixture
+def image_server():
+    """HTTP server of an image directory with a ``SHA256SUM``, answering ranges"""
+    class Handler(BaseHTTPRequestHandler):
+        def _body(self):
+            if self.path.endswith('/SHA256SUM'):
+                return server.checksums.encode()
+            return IMAGE
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(self._body())))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.end_headers()
+
+        def do_GET(self):
+            server.requests.append((self.path, self.headers.get('Range')))
+            body = self._body()
+            if self.headers.get('Range'):
+                start, end = map(int, self.headers['Range'][len('bytes='):].split('-'))
+                body = body[start:end + 1]
+                self.send_response(206)
+            else:
+                self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.requests = []
+    server.checksums = f'{hashlib.sha256(IMAGE).hexdigest()}  cfme-rhevm.qcow2\n'
+    server.url = 'http://127.0.0.1:{}/builds/stable/cfme-rhevm.qcow2'.format(
+        server.server_address[1])
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(tmpdir):
+    return ImageCache(directory=tmpdir.strpath, chunk_size=64, max_workers=3)
+
+
+def image_requests(server):
+    return [r for r in server.requests if r[0].endswith('.qcow2')]
+
+
+def test_ranged_download(cache, image_server):
+    local_path = cache.fetch(image_server.url)
+    with open(local_path, 'rb') as f:
+        assert f.read() == IMAGE
+    assert len(image_requests(image_server)) == 16
+    assert cache.cached_digest(local_path) == hashlib.sha256(IMAGE).hexdigest()
+
+
+def test_concurrent_fetch_downloads_once(cache, image_server):
+    fetchers = [threading.Thread(target=cache.fetch, args=(image_server.url,)) for _ in range(6)]
+    for fetcher in fetchers:
+        fetcher.start()
+    for fetcher in fetchers:
+        fetcher.join()
+    assert len(image_requests(image_server)) == 16
+    # another run reuses the verified image
+    assert ImageCache(directory=cache.directory).fetch(image_server.url)
+    assert len(image_requests(image_server)) == 16
+
+
+def test_checksum_mismatch(cache, image_server):
+    image_server.checksums = f'{"0" * 64}  cfme-rhevm.qcow2\n'
+    with pytest.raises(ImageCacheError):
+        cache.fetch(image_server.url)
+    assert os.listdir(cache.directory) == []
@@ -37,3 +37,31 @@ def test_context_hack(monkeypatch):
     with pytest.raises(ValueError):
         with ip_a:
             raise ValueError("test")
+
+
+def test_ipappliance_managed_providers_listing():
+    ip_a = IPAppliance(hostname='1.2.3.4')
+    requests = []
+
+    class FakeApi:
+        class collections:
+            class providers:
+                _href = 'https://1.2.3.4/api/providers'
+
+        def get(self, href, **params):
+            requests.append(params['attributes'])
+            if params['attributes'] == 'name,type':
+                return {'resources': [
+                    {'name': 'vsphere', 'type': 'ManageIQ::Providers::Vmware::InfraManager'},
+                    {'name': 'Embedded Ansible', 'type': 'ManageIQ::Providers::EmbeddedAnsible'}]}
+            return {'count': 2, 'resources': [{'id': '2', 'updated_on': updated_on}]}
+
+    ip_a.__dict__['rest_api'] = FakeApi()
+    updated_on = '2020-01-01T00:00:00Z'
+    assert ip_a.managed_provider_names == ['vsphere']
+    assert ip_a.managed_provider_names == ['vsphere']
+    # The listing is only fetched again when a provider was changed
+    assert requests.count('name,type') == 1
+    updated_on = '2020-01-02T00:00:00Z'
+    assert ip_a.managed_provider_names == ['vsphere']
+    assert requests.count('name,type') == 2
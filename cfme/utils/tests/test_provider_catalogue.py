@@ -0,0 +1,85 @@
+import attr
+import pytest
+
+from cfme.utils import providers
+from cfme.utils.providers import ProviderCatalogue
+from cfme.utils.providers import ProviderFilter
+
+
+@attr.s
+class FakeProvider:
+    key = attr.ib()
+    data = attr.ib()
+    type = attr.ib(default='virtualcenter')
+    category = attr.ib(default='infra')
+
+
+@pytest.fixture
+def catalogue(monkeypatch):
+    data = {
+        f'provider{i}': {'version': str(i % 3), 'tags': ['disabled'] if i % 5 == 0 else []}
+        for i in range(20)}
+    built = []
+
+    def get_crud(key, appliance=None):
+        built.append(key)
+        return FakeProvider(key, data[key])
+
+    monkeypatch.setattr(providers, 'get_crud', get_crud)
+    monkeypatch.setattr(providers, 'global_filters', {
+        'enabled_only': ProviderFilter(required_tags=['disabled'], inverted=True)})
+    catalogue = ProviderCatalogue(data)
+    catalogue.built = built
+    return catalogue
+
+
+def test_catalogue_filters(catalogue):
+    enabled = [prov.key for prov in catalogue.list_providers()]
+    assert len(enabled) == 16
+    assert 'provider0' not in enabled
+    assert [prov.key for prov in catalogue.list_providers(
+        [ProviderFilter(keys=['provider1', 'provider5'])])] == ['provider1']
+    assert catalogue.index['virtualcenter', 'infra'][1] == ('provider1', '1')
+    # Every listing gets crud objects of its own
+    assert catalogue.list_providers()[0] is not catalogue.list_providers()[0]
+    assert catalogue.list_providers()[0] is not catalogue.providers['provider1']
+
+
+def test_catalogue_collection_benchmark(catalogue, monkeypatch):
+    """Simulate the collection of many test functions using equal (not identical) filters."""
+    calls = []
+    filter_call = ProviderFilter.__call__
+
+    def counting_call(self, provider):
+        calls.append(provider.key)
+        return filter_call(self, provider)
+
+    monkeypatch.setattr(ProviderFilter, '__call__', counting_call)
+    for _ in range(5000):
+        result = catalogue.keys([ProviderFilter(required_tags=['disabled'])])
+    assert len(result) == 0
+    # Every crud was built once and every filter evaluated once per provider
+    assert len(catalogue.built) == 20
+    assert len(calls) == 2 * 20
+
+
+def test_catalogue_ems_names(catalogue):
+    catalogue.data['provider3']['name'] = 'RHV (3.6)'
+    catalogue.data['provider4']['name'] = 'Openstack'
+    assert catalogue.key_for_ems_name('RHV (3.6)') == 'provider3'
+    assert catalogue.key_for_ems_name('Openstack Network Manager') == 'provider4'
+    assert catalogue.key_for_ems_name('Openstack Block Storage Manager') is None
+    assert catalogue.key_for_ems_name('Unknown') is None
+    # Resolved from the yaml data alone
+    assert catalogue.built == []
+
+
+def test_catalogue_signature_keeps_containers(catalogue):
+    catalogue.data['provider1']['a'] = {'b': 'value'}
+    catalogue.data['provider2']['a'] = 'b'
+    # A tuple is a (field, value) pair, a list is a path of nested fields
+    pair = ProviderFilter(required_fields=[('a', 'b')])
+    path = ProviderFilter(required_fields=[['a', 'b']])
+    assert pair.signature != path.signature
+    assert [prov.key for prov in catalogue.list_providers([pair])] == ['provider2']
+    assert [prov.key for prov in catalogue.list_providers([path])] == ['provider1']
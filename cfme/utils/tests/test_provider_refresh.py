@@ -0,0 +1,107 @@
+from time import sleep
+
+import attr
+from sqlalchemy import Column
+from sqlalchemy import Integer
+from sqlalchemy import String
+from sqlalchemy.ext.declarative import declarative_base
+
+from cfme.common.provider_refresh import RefreshCoordinator
+
+Base = declarative_base()
+
+
+class MiqQueue(Base):
+    __tablename__ = 'miq_queue'
+    id = Column(Integer, primary_key=True)
+    class_name = Column(String)
+    method_name = Column(String)
+
+
+class FakeVmsAction:
+    def __init__(self, provider):
+        self.provider = provider
+
+    def refresh(self, *vms):
+        self.provider.targeted.append([vm['id'] for vm in vms])
+
+
+class FakeProvider:
+    name = 'fake-provider'
+
+    def __init__(self):
+        self.full = 0
+        self.targeted = []
+        self.refresh_date = 'yesterday'
+
+    @property
+    def appliance(self):
+        # appliance.rest_api.collections.vms.action
+        return self
+
+    @property
+    def rest_api(self):
+        return self
+
+    @property
+    def collections(self):
+        return self
+
+    @property
+    def vms(self):
+        return self
+
+    @property
+    def action(self):
+        return FakeVmsAction(self)
+
+    def last_refresh_date(self):
+        return self.refresh_date
+
+    def refresh_provider_relationships(self):
+        self.full += 1
+
+
+def test_requests_within_window_are_merged():
+    provider = FakeProvider()
+    coordinator = RefreshCoordinator(provider, window=0.2)
+    for vm_ids in ([1], [2, 3], [1]):
+        coordinator.refresh_vms(vm_ids)
+    sleep(0.5)
+    assert provider.targeted == [[1, 2, 3]]
+    assert provider.full == 0
+
+    # a full refresh covers the VMs asked for in the same window
+    coordinator.refresh_vms([4])
+    coordinator.refresh()
+    sleep(0.5)
+    assert provider.targeted == [[1, 2, 3]]
+    assert provider.full == 1
+    assert (coordinator.requests, coordinator.sent) == (5, 2)
+
+
+def test_full_refresh_in_flight_is_shared():
+    provider = FakeProvider()
+    coordinator = RefreshCoordinator(provider, window=0)
+    coordinator.refresh()
+    coordinator.refresh()
+    assert provider.full == 1
+    provider.refresh_date = 'today'
+    coordinator.refresh()
+    assert provider.full == 2
+
+
+@attr.s
+class QueueProvider:
+    appliance = attr.ib()
+
+
+def test_queued_refreshes_counts_ems_refresh_messages(vmdb):
+    db = vmdb(Base)
+    db.session.add_all([
+        MiqQueue(class_name='EmsRefresh', method_name='refresh'),
+        MiqQueue(class_name='EmsRefresh', method_name='refresh'),
+        MiqQueue(class_name='EmsRefresh', method_name='queue_refresh'),
+        MiqQueue(class_name='MiqServer', method_name='refresh')])
+    coordinator = RefreshCoordinator(QueueProvider(db.appliance()))
+    assert coordinator.queued_refreshes() == 2
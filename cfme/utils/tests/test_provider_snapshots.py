@@ -0,0 +1,117 @@
+import attr
+import pytest
+from sqlalchemy import Column
+from sqlalchemy import Integer
+from sqlalchemy.ext.declarative import declarative_base
+
+from cfme.utils.providers import ProviderSnapshots
+
+Base = declarative_base()
+
+
+class Vm(Base):
+    __tablename__ = 'vms'
+    id = Column(Integer, primary_key=True)
+    ems_id = Column(Integer)
+
+
+@attr.s
+class FakeResult:
+    success = attr.ib(default=True)
+
+
+@attr.s
+class FakeDB:
+    client = attr.ib()
+    commands = attr.ib(factory=list)
+    restore_fails = attr.ib(default=False)
+
+    @property
+    def ssh_client(self):
+        return self
+
+    def run_command(self, command):
+        self.commands.append(command)
+        return FakeResult()
+
+    def dump(self, path):
+        self.commands.append(f'dump {path}')
+
+    def restore_dump(self, path):
+        self.commands.append(f'restore {path}')
+        if self.restore_fails:
+            raise RuntimeError('pg_restore failed')
+
+
+@attr.s
+class FakeAppliance:
+    """Appliance whose REST API records the VMs refreshed"""
+    db = attr.ib()
+    version = attr.ib(default='5.11.0.1')
+    refreshed = attr.ib(factory=list)
+
+    @property
+    def rest_api(self):
+        # rest_api.collections.vms.action
+        return self
+
+    collections = vms = action = rest_api
+
+    def refresh(self, *vms):
+        self.refreshed.append([vm['id'] for vm in vms])
+
+
+@attr.s
+class FakeProvider:
+    key = attr.ib(default='vsphere67')
+    id = attr.ib(default=1)
+    data = attr.ib(factory=lambda: {'name': 'vSphere 6.7', 'hostname': 'vsphere.example.com'})
+    stats_match = attr.ib(default=True)
+    exists = attr.ib(default=True)
+    mgmt = attr.ib(default=None)
+    STATS_TO_MATCH = ['num_vm']
+
+    def _do_stats_match(self, client, stats_to_match):
+        return self.stats_match
+
+
+@pytest.fixture
+def snapshots(vmdb):
+    client = vmdb(Base)
+    with client.session.begin():
+        client.session.add_all([Vm(id=1, ems_id=1), Vm(id=2, ems_id=1), Vm(id=3, ems_id=2)])
+    return ProviderSnapshots(FakeAppliance(FakeDB(client)))
+
+
+def test_snapshot_path(snapshots):
+    provider = FakeProvider()
+    path = snapshots.path(provider)
+    assert path.startswith(f'{ProviderSnapshots.SNAPSHOT_DIR}/vsphere67-5.11.0.1-')
+    assert snapshots.path(FakeProvider()) == path
+    provider.data['hostname'] = 'other.example.com'
+    assert snapshots.path(provider) != path
+
+
+def test_snapshot_restore(snapshots):
+    provider = FakeProvider()
+    assert snapshots.restore(provider)
+    assert snapshots.appliance.db.commands == [f'restore {snapshots.path(provider)}']
+    # Only the restored VMs of the provider are refreshed, in one request
+    assert snapshots.appliance.refreshed == [[1, 2]]
+
+
+def test_snapshot_capture_prunes(snapshots):
+    provider = FakeProvider()
+    snapshots.capture(provider)
+    dump, prune = snapshots.appliance.db.commands
+    assert dump == f'dump {snapshots.path(provider)}'
+    assert f"-name 'vsphere67-*.dump' ! -path '{snapshots.path(provider)}' -delete" in prune
+    assert f'tail -n +{ProviderSnapshots.MAX_SNAPSHOTS + 1}' in prune
+
+
+@pytest.mark.parametrize('broken', ['stats', 'missing', 'restore'])
+def test_snapshot_restore_dropped(snapshots, broken):
+    provider = FakeProvider(stats_match=broken != 'stats', exists=broken != 'missing')
+    snapshots.appliance.db.restore_fails = broken == 'restore'
+    assert not snapshots.restore(provider)
+    assert snapshots.appliance.db.commands[-1] == f'rm -f {snapshots.path(provider)}'
@@ -0,0 +1,119 @@
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import attr
+import pytest
+
+from cfme.utils.appliance import IPAppliance
+from cfme.utils.appliance import readiness
+from cfme.utils.appliance.readiness import backoff_delays
+from cfme.utils.appliance.readiness import ReadinessProber
+
+
+@attr.s
+class FakeAppliance:
+    port = attr.ib()
+    hostname = attr.ib(default='127.0.0.1')
+
+    @property
+    def ui_port(self):
+        return self.port
+
+    @property
+    def url(self):
+        return f'http://{self.hostname}:{self.port}/'
+
+    def url_path(self, path):
+        return self.url.rstrip('/') + path
+
+
+@pytest.fixture
+def fake_ui():
+    """HTTP server answering 503 to the first requests, then as a ready appliance"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            server.requests.append(self.path)
+            if len(server.requests) <= server.unready_requests:
+                self.send_response(503)
+                self.end_headers()
+                return
+            body = b'{"server_info": {"server_href": "/api/servers/1"}}'
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.requests = []
+    server.unready_requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def prober(fake_ui, monkeypatch, tmpdir):
+    monkeypatch.setattr(readiness, 'log_path', tmpdir)
+    monkeypatch.setattr(readiness.conf, 'credentials', {
+        'default': {'username': 'admin', 'password': 'smartvm'}})
+    return ReadinessProber(FakeAppliance(fake_ui.server_address[1]), tight_delay=0.01)
+
+
+def test_backoff_delays():
+    delays = backoff_delays(initial=0.5, maximum=4)
+    assert [next(delays) for _ in range(6)] == [0.5, 1, 2, 4, 4, 4]
+
+
+def test_wait_exponential_then_tight(prober, monkeypatch):
+    open_after = 3
+    tcp_checks = []
+    delays = []
+    monkeypatch.setattr(prober, '_tcp', lambda port: tcp_checks.append(port) or (
+        len(tcp_checks) > open_after))
+    monkeypatch.setattr(readiness, 'sleep', delays.append)
+    timing = prober.wait(['ui', 'api'], timeout=60)
+    # Backing off while the port is closed, ui and api in the same cycle once it is open
+    assert delays == [0.5, 1, 2]
+    assert timing.probes == 4
+    assert prober.timings == [timing]
+
+
+def test_wait_times_out(prober, monkeypatch):
+    monkeypatch.setattr(prober, '_tcp', lambda port: False)
+    monkeypatch.setattr(readiness, 'sleep', lambda delay: None)
+    with pytest.raises(readiness.TimedOutError):
+        prober.wait(['ui'], timeout=5)
+
+
+def test_concurrent_waiters_share_probes(prober, fake_ui, tmpdir):
+    fake_ui.unready_requests = 4
+    waiters = [
+        threading.Thread(target=prober.wait, args=(['ui', 'api'],), kwargs={'timeout': 30})
+        for _ in range(8)]
+    for waiter in waiters:
+        waiter.start()
+    for waiter in waiters:
+        waiter.join()
+    assert len(prober.timings) == 8
+    # Far fewer requests than 8 waiters probing on their own
+    assert len(fake_ui.requests) < 4 + 2 * 8
+    assert len(tmpdir.join('readiness.jsonl').readlines()) == 8
+
+
+def test_is_web_ui_running_probes_under_lock(prober, monkeypatch):
+    locked = []
+
+    def probe(targets):
+        locked.append(prober._lock.locked())
+        return readiness.ProbeResult(True, finished=readiness.monotonic())
+
+    monkeypatch.setattr(prober, 'probe', probe)
+    prober.appliance.readiness = prober
+    assert IPAppliance.is_web_ui_running(prober.appliance)
+    assert locked == [True] * 3
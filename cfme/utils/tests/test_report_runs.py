@@ -0,0 +1,70 @@
+"""Report run tracking against a local sqlite stand-in of the appliance database"""
+import threading
+from datetime import datetime
+from time import sleep
+
+import pytest
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import Integer
+from sqlalchemy import String
+from sqlalchemy.ext.declarative import declarative_base
+
+from cfme.exceptions import ReportRunError
+from cfme.intelligence.reports.runs import latest_result_id
+from cfme.intelligence.reports.runs import ReportRun
+
+Base = declarative_base()
+
+
+class MiqReportResult(Base):
+    __tablename__ = 'miq_report_results'
+    id = Column(Integer, primary_key=True)
+    miq_report_id = Column(Integer)
+    miq_task_id = Column(Integer)
+    created_on = Column(DateTime)
+    last_run_on = Column(DateTime)
+
+
+class MiqTask(Base):
+    __tablename__ = 'miq_tasks'
+    id = Column(Integer, primary_key=True)
+    state = Column(String)
+    status = Column(String)
+    message = Column(String)
+
+
+@pytest.fixture
+def db(vmdb):
+    db = vmdb(Base)
+    with db.session.begin():
+        db.session.add(MiqTask(id=7, state='Queued', status='Ok'))
+        db.session.add(MiqReportResult(
+            id=3, miq_report_id=1, miq_task_id=7, created_on=datetime(2020, 4, 14, 10, 30, 21)))
+    return db
+
+
+def finish_task(db, status, message, after):
+    sleep(after)
+    with db.session.begin():
+        db.session.query(MiqTask).filter(MiqTask.id == 7).update(
+            {'state': 'Finished', 'status': status, 'message': message})
+        db.session.query(MiqReportResult).filter(MiqReportResult.id == 3).update(
+            {'last_run_on': datetime(2020, 4, 14, 10, 31, 2)})
+
+
+def test_report_run_wait(db):
+    appliance = db.appliance()
+    assert latest_result_id(appliance, 1) == 3
+    assert latest_result_id(appliance, 2) == 0
+    generator = threading.Thread(target=finish_task, args=(db, 'Ok', 'Report generated', 0.3))
+    generator.start()
+    times = ReportRun(appliance, 3, delay=0.1).wait(timeout=10)
+    generator.join()
+    assert times == ('04/14/20 10:30:21 UTC', '04/14/20 10:31:02 UTC')
+
+
+def test_report_run_error(db):
+    finish_task(db, 'Error', 'Report generation failed', 0)
+    with pytest.raises(ReportRunError):
+        ReportRun(db.appliance(), 3, delay=0.1).wait(timeout=10)
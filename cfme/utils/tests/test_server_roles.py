@@ -0,0 +1,79 @@
+"""Server role tracking against a local sqlite stand-in of the appliance database"""
+import threading
+from time import monotonic
+from time import sleep
+
+import pytest
+from sqlalchemy import Boolean
+from sqlalchemy import Column
+from sqlalchemy import ForeignKey
+from sqlalchemy import Integer
+from sqlalchemy import String
+from sqlalchemy.ext.declarative import declarative_base
+
+from cfme.utils.appliance.server_roles import ServerRoleTracker
+from cfme.utils.wait import TimedOutError
+
+Base = declarative_base()
+
+
+class ServerRole(Base):
+    __tablename__ = 'server_roles'
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+class AssignedServerRole(Base):
+    __tablename__ = 'assigned_server_roles'
+    id = Column(Integer, primary_key=True)
+    miq_server_id = Column(Integer)
+    server_role_id = Column(Integer, ForeignKey('server_roles.id'))
+    active = Column(Boolean)
+
+
+@pytest.fixture
+def db(vmdb):
+    db = vmdb(Base)
+    with db.session.begin():
+        for role_id, name in enumerate(
+                ['automate', 'database_owner', 'storage_inventory', 'ems_inventory'], 1):
+            db.session.add(ServerRole(id=role_id, name=name))
+        db.session.add(AssignedServerRole(miq_server_id=1, server_role_id=1, active=True))
+        db.session.add(AssignedServerRole(miq_server_id=2, server_role_id=4, active=True))
+    return db
+
+
+def test_server_roles(db):
+    tracker = ServerRoleTracker(db.appliance())
+    assert tracker.roles() == {'automate': True, 'ems_inventory': False}
+    tracker = ServerRoleTracker(db.appliance(is_storage_enabled=True))
+    assert tracker.roles() == {
+        'automate': True, 'ems_inventory': False, 'storage_inventory': False}
+
+
+def test_server_role_change_latency(db):
+    tracker = ServerRoleTracker(db.appliance(), delay=0.1)
+    applied = []
+
+    def apply_role():
+        sleep(0.5)
+        # taken before the commit, so the waiter can't see the role before the timestamp exists
+        applied.append(monotonic())
+        with db.session.begin():
+            db.session.add(AssignedServerRole(miq_server_id=1, server_role_id=4, active=True))
+
+    server = threading.Thread(target=apply_role)
+    server.start()
+    roles = tracker.wait_for_roles({'automate': True, 'ems_inventory': True}, timeout=10)
+    noticed = monotonic()
+    server.join()
+    latency = noticed - applied[0]
+    assert roles['ems_inventory']
+    # Noticed within the poll delay, not the old 15 seconds
+    assert latency < 1
+
+
+def test_server_role_wait_times_out(db):
+    tracker = ServerRoleTracker(db.appliance(), delay=0.1)
+    with pytest.raises(TimedOutError):
+        tracker.wait(lambda roles: roles['ems_inventory'], timeout=0.5)
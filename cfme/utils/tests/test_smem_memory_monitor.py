@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from cfme.utils.smem_memory_monitor import downsample
+from cfme.utils.smem_memory_monitor import graph_series
+from cfme.utils.smem_memory_monitor import SmemSampleStore
+
+
+def memory(value):
+    return dict.fromkeys(SmemSampleStore.METRICS, value)
+
+
+def test_sample_store_flush_and_load(tmpdir):
+    store = SmemSampleStore(tmpdir)
+    for i in range(10):
+        store.add_sample(1000.0 + i, '100', 'MiqGenericWorker', memory(i))
+        if i % 2:
+            store.add_sample(1000.0 + i, 200, 'httpd', memory(i * 2))
+        if i == 4:
+            store.flush()
+    store.flush()
+
+    loaded = SmemSampleStore.load(tmpdir)
+    assert len(loaded) == len(store) == 15
+    assert loaded.process_names() == ['MiqGenericWorker', 'httpd']
+    assert loaded.process_pids('MiqGenericWorker') == [100]
+    assert loaded.series('httpd', 200, 'rss') == [2.0, 6.0, 10.0, 14.0, 18.0]
+    assert loaded.first('MiqGenericWorker', 100) == 1000.0
+    assert loaded.last('MiqGenericWorker', 100, 'swap') == 9.0
+
+
+def test_downsample():
+    timestamps = list(range(100))
+    values = [float(value % 10) for value in range(100)]
+    assert downsample(timestamps, values, max_points=100) == (
+        timestamps, values, values, values)
+    bucket_ts, mins, maxs, means = downsample(timestamps, values, max_points=10)
+    assert bucket_ts == list(range(0, 100, 10))
+    assert mins == [0.0] * 10
+    assert maxs == [9.0] * 10
+    assert means == [4.5] * 10
+
+
+def test_graph_series_annotates_measured_ends():
+    store = SmemSampleStore()
+    for i in range(1200):
+        store.add_sample(1000.0 + i, 100, 'MiqGenericWorker', memory(float(i)))
+    dates, mins, maxs, means, ends = graph_series(store, 'MiqGenericWorker', 100, 'rss')
+    # Two samples per bucket, the plotted ends are bucket means
+    assert (means[0], means[-1]) == (0.5, 1198.5)
+    assert ends == [(datetime.fromtimestamp(1000.0), 0.0), (datetime.fromtimestamp(2199.0), 1199.0)]
@@ -31,3 +31,16 @@ def test_scp_client_can_put_a_file(appliance, tmpdir):
     assert "content" in tmpfile.read()
     # Clean up the server
     appliance.ssh_client.run_command(f"rm -f /tmp/{tmpfile.basename}")
+
+
+def test_ssh_client_run_script(appliance):
+    # All the steps run in one session, with their own exit codes and outputs
+    result = appliance.ssh_client.run_script(['echo first', 'echo second >&2; false', 'echo third'])
+    assert not result.success
+    assert [step.rc for step in result] == [0, 1, 0]
+    assert [step.output.strip() for step in result] == ['first', 'second', 'third']
+    assert result.failed_steps == [result[1]]
+
+    result = appliance.ssh_client.run_script(['false', 'echo never'], stop_on_error=True)
+    assert len(result) == 1
+    assert result.rc == 1
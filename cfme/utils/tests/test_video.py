@@ -0,0 +1,32 @@
+from cfme.utils.video import save_segments
+from cfme.utils.video import segments
+from cfme.utils.video import SegmentRecorder
+
+
+def write_segments(directory, starts):
+    for start in starts:
+        directory.join(f'segment-{start}.ts').write_binary(str(start).encode())
+
+
+def test_save_segments_of_time_range(tmpdir):
+    segment_dir = tmpdir.join('segments')
+    write_segments(segment_dir.ensure(dir=True), [100, 110, 120, 130])
+    segment_dir.join('other.ts').write('')
+    assert [start for start, _ in segments(segment_dir.strpath)] == [100, 110, 120, 130]
+
+    video = tmpdir.join('test.ts')
+    assert save_segments(segment_dir.strpath, 112.5, 125.0, video.strpath)
+    assert video.read_binary() == b'110120'
+    # the segment being recorded covers the end of the range
+    assert save_segments(segment_dir.strpath, 131.0, 135.0, video.strpath)
+    assert video.read_binary() == b'130'
+    assert not save_segments(segment_dir.strpath, 10.0, 20.0, video.strpath)
+
+
+def test_prune_keeps_recent_segments(tmpdir):
+    recorder = SegmentRecorder(tmpdir.strpath, display=':99', keep_seconds=60)
+    write_segments(tmpdir, [1, 2, 3])
+    recorder.prune()
+    # the newest one is being recorded
+    assert [start for start, _ in segments(tmpdir.strpath)] == [3]
+    assert recorder.pruned_bytes == 2
@@ -0,0 +1,79 @@
+"""VM state watching against a local sqlite stand-in of the appliance database"""
+import threading
+from time import monotonic
+from time import sleep
+
+import pytest
+from sqlalchemy import Column
+from sqlalchemy import Integer
+from sqlalchemy import String
+from sqlalchemy.ext.declarative import declarative_base
+
+from cfme.utils.appliance.vm_state import vm_state
+from cfme.utils.appliance.vm_state import VMStateWatcher
+from cfme.utils.wait import TimedOutError
+
+Base = declarative_base()
+
+
+class Vm(Base):
+    __tablename__ = 'vms'
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    ems_id = Column(Integer)
+    ems_ref = Column(String)
+    power_state = Column(String)
+    storage_id = Column(Integer)
+
+
+@pytest.fixture
+def db(vmdb):
+    db = vmdb(Base)
+    with db.session.begin():
+        db.session.add(Vm(id=1, name='test-vm', ems_id=1, ems_ref='vm-1', power_state='off',
+                          storage_id=1))
+        db.session.add(Vm(id=2, name='test-vm', ems_id=None, ems_ref='vm-0', power_state='off',
+                          storage_id=None))
+    return db
+
+
+def set_power_state(db, power_state, after):
+    sleep(after)
+    with db.session.begin():
+        db.session.query(Vm).filter(Vm.id == 1).update({'power_state': power_state})
+
+
+def test_vm_states(db):
+    rows = VMStateWatcher(db.appliance()).rows('test-vm')
+    assert [vm_state(row) for row in rows] == ['off', 'archived']
+
+
+def test_vm_state_change_latency(db):
+    watcher = VMStateWatcher(db.appliance(), delay=0.1)
+    changed = []
+
+    def power_on():
+        sleep(0.5)
+        # taken before the commit, so the waiter can't see the state before the timestamp exists
+        changed.append(monotonic())
+        set_power_state(db, 'on', after=0)
+
+    provider = threading.Thread(target=power_on)
+    provider.start()
+    rows = watcher.wait('test-vm', lambda rows: vm_state(rows[0]) == 'on', timeout=10)
+    noticed = monotonic()
+    provider.join()
+    latency = noticed - changed[0]
+    assert rows[0].power_state == 'on'
+    # Noticed within the poll delay, not the old 30 seconds
+    assert latency < 1
+
+
+def test_refresh_backs_off(db):
+    watcher = VMStateWatcher(db.appliance(), delay=0.1, backoff=0.3)
+    refreshes = []
+    with pytest.raises(TimedOutError):
+        watcher.wait('test-vm', lambda rows: False, timeout=1.2,
+                     refresh=lambda rows: refreshes.append(monotonic()))
+    # at 0.3s and 0.9s, the backoff doubled in between
+    assert len(refreshes) == 2
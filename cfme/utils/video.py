@@ -9,10 +9,20 @@ Configuration for this module + fixture:
           dir: video
           display: ":99"
           quality: 10
+          segment_seconds: 10
+          keep_minutes: 30
 
+:py:class:`Recorder` records one video with ``recordmydesktop``. :py:class:`SegmentRecorder`
+records a display for a whole run with ``ffmpeg`` into segments of ``segment_seconds``, keeping
+the last ``keep_minutes`` of them, and :py:func:`save_segments` joins the segments covering a
+time range into one video.
 """
 import os
+import re
+import shutil
 import subprocess
+import threading
+import time
 from signal import SIGINT
 
 from cfme.utils.conf import env
@@ -94,3 +104,155 @@ class Recorder:
     def __del__(self):
         """If the reference is lost and the object is destroyed ..."""
         self.stop()
+
+
+SEGMENT_NAME = re.compile(r'^segment-(\d+)\.ts$')
+
+
+def segments(directory):
+    """Returns the ``(start, path)`` of the segments in the directory, oldest first"""
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    found = []
+    for name in names:
+        match = SEGMENT_NAME.match(name)
+        if match:
+            found.append((int(match.group(1)), os.path.join(directory, name)))
+    return sorted(found)
+
+
+def save_segments(directory, start, end, filename):
+    """Joins the segments recorded between ``start`` and ``end`` into ``filename``
+
+    The segments are MPEG-TS with continuous timestamps, so they join by plain concatenation,
+    including the one still being recorded.
+
+    Returns:
+        ``True`` if there was any segment of the time range
+    """
+    found = segments(directory)
+    covering = [
+        path for (seg_start, path), (next_start, _) in zip(found, found[1:] + [(end + 1, None)])
+        if seg_start <= end and next_start >= start]
+    if not covering:
+        return False
+    with open(filename, 'wb') as video:
+        for path in covering:
+            try:
+                with open(path, 'rb') as segment:
+                    shutil.copyfileobj(segment, video)
+            except OSError:
+                # pruned meanwhile
+                pass
+    return True
+
+
+def process_cpu_seconds(pid):
+    """Returns user and system CPU time spent by a running process"""
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+class SegmentRecorder:
+    """Records a display continuously into a ring of segments
+
+    One recorder runs per display for the whole run, so a test costs no recorder start nor stop
+    and the videos of the tests that passed are never encoded on their own. Segments older than
+    ``keep_seconds`` are removed while recording.
+
+    Args:
+        directory: where the segments are written, removed when the recorder stops
+        display: X display to record
+        segment_seconds: length of a segment
+        keep_seconds: how long a segment is kept
+        framerate: frames recorded per second
+        crf: x264 constant rate factor, higher is smaller and worse
+    """
+
+    def __init__(self, directory, display=None, segment_seconds=10, keep_seconds=30 * 60,
+                 framerate=5, crf=32):
+        self.directory = directory
+        self.display = display or vid_options["display"]
+        self.segment_seconds = segment_seconds
+        self.keep_seconds = keep_seconds
+        self.framerate = framerate
+        self.crf = crf
+        self.proc = None
+        self.cpu_seconds = 0.0
+        self.pruned_bytes = 0
+        self._stopped = threading.Event()
+
+    @property
+    def cmd_line(self):
+        return ['ffmpeg', '-nostdin', '-loglevel', 'error',
+                '-f', 'x11grab', '-framerate', str(self.framerate), '-i', str(self.display),
+                '-c:v', 'libx264', '-preset', 'ultrafast', '-crf', str(self.crf),
+                '-pix_fmt', 'yuv420p',
+                '-force_key_frames', f'expr:gte(t,n_forced*{self.segment_seconds})',
+                '-f', 'segment', '-segment_time', str(self.segment_seconds),
+                '-segment_format', 'mpegts', '-strftime', '1',
+                os.path.join(self.directory, 'segment-%s.ts')]
+
+    def start(self):
+        """Starts recording, returns ``False`` if ``ffmpeg`` could not be started"""
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            self.proc = subprocess.Popen(
+                self.cmd_line, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError:
+            return False
+        pruner = threading.Thread(target=self._prune_loop)
+        pruner.daemon = True
+        pruner.start()
+        return True
+
+    @property
+    def running(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def prune(self):
+        """Removes the segments older than ``keep_seconds``, but the one being recorded"""
+        limit = time.time() - self.keep_seconds
+        for start, path in segments(self.directory)[:-1]:
+            if start >= limit:
+                break
+            try:
+                self.pruned_bytes += os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _prune_loop(self):
+        while not self._stopped.wait(self.segment_seconds):
+            self.prune()
+
+    def stop(self):
+        """Stops recording and removes the segments
+
+        Returns:
+            ``(cpu_seconds, segment_bytes)`` spent by the recording
+        """
+        self._stopped.set()
+        if self.running:
+            try:
+                self.cpu_seconds = process_cpu_seconds(self.proc.pid)
+            except (OSError, IndexError, ValueError):
+                pass
+            self.proc.send_signal(SIGINT)
+            try:
+                self.proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        segment_bytes = self.pruned_bytes
+        for _, path in segments(self.directory):
+            try:
+                segment_bytes += os.path.getsize(path)
+            except OSError:
+                pass
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.proc = None
+        return self.cpu_seconds, segment_bytes
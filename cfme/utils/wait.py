@@ -1,4 +1,6 @@
 from functools import partial
+from time import monotonic
+from time import sleep
 
 from wait_for import RefreshTimer  # noqa: F401
 from wait_for import TimedOutError  # noqa: F401
@@ -9,3 +11,34 @@ from cfme.utils.log import logger
 
 wait_for = partial(wait_for_mod, logger=logger)
 wait_for_decorator = partial(wait_for_decorator_mod, logger=logger)
+
+
+def wait_for_change(read, condition, timeout, delay, message, idle=None):
+    """Polls ``read()`` until ``condition(value)`` holds, evaluating it only when the value changed
+
+    Args:
+        read: returns the current value, called every ``delay`` seconds
+        condition: called with the value, whenever it differs from the previous one
+        timeout: seconds to wait for at most
+        delay: seconds between two reads
+        message: what is waited for, for the log and the timeout error
+        idle: called with the value and the seconds waited so far after every read the condition
+            did not hold for
+    Returns:
+        the value that fulfilled the condition
+    """
+    start = monotonic()
+    last_value = object()
+    while True:
+        value = read()
+        if value != last_value:
+            last_value = value
+            if condition(value):
+                logger.info('%s after %.1fs', message, monotonic() - start)
+                return value
+        elapsed = monotonic() - start
+        if elapsed + delay > timeout:
+            raise TimedOutError(f'Could not wait for {message} in {timeout} seconds')
+        if idle is not None:
+            idle(value, elapsed)
+        sleep(delay)
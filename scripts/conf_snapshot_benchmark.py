@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Measure the startup time with and without the configuration snapshot.
+
+Each run is a fresh interpreter, like a pytest slave or a script. By default it times importing
+``cfme.utils.conf`` and loading the given configuration files. With ``--collect``, it times
+``pytest --collect-only`` of the given test paths instead, which is the import to first test time.
+
+Usage:
+
+   scripts/conf_snapshot_benchmark.py
+   scripts/conf_snapshot_benchmark.py --runs 3 --collect cfme/tests/test_appliance.py
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from cfme.test_framework.config_snapshot import SNAPSHOT_DIR_ENV
+
+LOAD_CONF = (
+    'from cfme.utils import conf\n'
+    'for name in {names!r}:\n'
+    '    getattr(conf, name)\n')
+
+
+def parse_cmd_line():
+    parser = argparse.ArgumentParser(argument_default=None)
+    parser.add_argument('--runs', type=int, default=5, help='runs per variant')
+    parser.add_argument('--conf', nargs='+', default=['cfme_data', 'credentials', 'supportability'],
+                        help='configuration files to load')
+    parser.add_argument('--collect', nargs='*', default=None,
+                        help='time pytest --collect-only of these paths instead')
+    return parser.parse_args()
+
+
+def timed_run(command, snapshot_dir):
+    env = dict(os.environ)
+    env[SNAPSHOT_DIR_ENV] = snapshot_dir
+    start = time.time()
+    subprocess.run(command, env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.time() - start
+
+
+def main():
+    args = parse_cmd_line()
+    if args.collect is not None:
+        command = [sys.executable, '-m', 'pytest', '--collect-only', '-q'] + args.collect
+    else:
+        command = [sys.executable, '-c', LOAD_CONF.format(names=args.conf)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_dir = os.path.join(tmp_dir, 'snapshots')
+        # The first run writes the snapshot
+        timed_run(command, snapshot_dir)
+        for variant, variant_dir in [('without snapshot', 'off'), ('with snapshot', snapshot_dir)]:
+            times = sorted(timed_run(command, variant_dir) for _ in range(args.runs))
+            print('{:<18} min {:.2f}s  median {:.2f}s'.format(
+                variant, times[0], times[len(times) // 2]))
+
+
+if __name__ == '__main__':
+    main()
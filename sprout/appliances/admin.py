@@ -187,6 +187,9 @@ class ProviderAdmin(Admin):
         "appliance_load"
     ]
 
+    def get_queryset(self, request):
+        return super(ProviderAdmin, self).get_queryset(request).with_load()
+
     def remaining_provisioning_slots(self, instance):
         return str(instance.remaining_provisioning_slots)
 
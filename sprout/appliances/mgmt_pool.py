@@ -0,0 +1,228 @@
+"""Per worker process pool of provider mgmt (wrapanapi) clients.
+
+Creating a mgmt client means a new login/session on the provider, which dominates the run time
+of the short tasks. Each worker process therefore keeps the clients it created, keyed by the
+provider id and a hash of the provider data and credentials, so changed credentials always get a
+new client. A client that was idle for too long is dropped, one that was not used for a while is
+health checked before it is handed out again.
+
+The clients are per process, the number of tasks using a provider at a time is limited across all
+the worker processes by :py:class:`ProviderSlots`, kept in the shared cache.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.core.cache import cache
+
+from cfme.utils.providers import get_mgmt_credentials
+from cfme.utils.wait import wait_for
+from sprout import settings
+from sprout.log import create_logger
+
+PoolStats = namedtuple(
+    'PoolStats', ['hits', 'misses', 'expired', 'failed_checks', 'hit_rate', 'time_saved'])
+
+
+class PooledClient(object):
+    def __init__(self, mgmt, creation_time):
+        self.mgmt = mgmt
+        self.creation_time = creation_time
+        self.last_used = self.last_checked = time.time()
+
+
+def check_mgmt_health(mgmt):
+    """Default health check, asks the provider for its basic information.
+
+    Not every mgmt system can tell it, their clients are taken as healthy instead of being created
+    again on every check.
+    """
+    try:
+        info = mgmt.info
+    except (AttributeError, NotImplementedError):
+        return
+    if callable(info):
+        try:
+            info()
+        except NotImplementedError:
+            pass
+
+
+def disconnect_mgmt(mgmt):
+    try:
+        mgmt.disconnect()
+    except Exception:
+        pass
+
+
+class ProviderSlots(object):
+    """Limits how many blocks use a provider at a time, across all the worker processes.
+
+    A slot is a cache key added atomically, like the locks of
+    :py:func:`sprout.critical_section`. Slots expire so the ones held by a killed worker become free
+    again.
+
+    Args:
+        concurrency: How many slots each provider has.
+        expiry: Seconds after which a slot is free again even if it was not released.
+        delay: Seconds between the attempts to take a slot.
+    """
+    def __init__(self, concurrency, expiry, delay=0.5):
+        self.concurrency = concurrency
+        self.expiry = expiry
+        self.delay = delay
+
+    def _take(self, provider_id):
+        for slot in range(self.concurrency):
+            key = "mgmt-slot-{}-{}".format(provider_id, slot)
+            if cache.add(key, 'true', self.expiry):
+                return key
+        return False
+
+    @contextmanager
+    def hold(self, provider_id, timeout=None):
+        """Context manager holding one of the slots of the provider, waits for a free one."""
+        key = wait_for(
+            self._take, [provider_id], delay=self.delay,
+            num_sec=self.expiry if timeout is None else timeout).out
+        try:
+            yield
+        finally:
+            cache.delete(key)
+
+
+class MgmtClientPool(object):
+    """Keeps mgmt clients of a worker process around to be reused by subsequent tasks.
+
+    Args:
+        idle_expiry: Seconds after which an unused client is dropped.
+        health_check_interval: Seconds since the last use or check after which a client is health
+            checked before it is handed out.
+        health_check: Callable that raises if the passed mgmt client is not usable anymore.
+        provider_slots: :py:class:`ProviderSlots` limiting the :py:meth:`borrow` blocks using one
+            provider at a time, ``None`` for no limit.
+    """
+    def __init__(self, idle_expiry, health_check_interval, health_check=check_mgmt_health,
+                 provider_slots=None):
+        self.idle_expiry = idle_expiry
+        self.health_check_interval = health_check_interval
+        self.health_check = health_check
+        self.provider_slots = provider_slots
+        self._clients = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.failed_checks = 0
+        self.total_creation_time = 0.0
+
+    @property
+    def logger(self):
+        return create_logger(self)
+
+    @staticmethod
+    def client_key(provider_id, provider_data):
+        try:
+            credentials = get_mgmt_credentials(provider_data)
+        except KeyError:
+            credentials = None
+        digest = hashlib.sha256(
+            json.dumps([provider_data, credentials], sort_keys=True, default=str).encode('utf-8'))
+        return provider_id, digest.hexdigest()
+
+    def _usable_client(self, key):
+        """Returns the pooled client for the key if it can still be used, drops it otherwise."""
+        client = self._clients.get(key)
+        if client is None:
+            return None
+        now = time.time()
+        if now - client.last_used > self.idle_expiry:
+            self.expired += 1
+            self.logger.info("Dropping mgmt client of %s idle for %.0fs", key[0],
+                             now - client.last_used)
+        elif now - client.last_checked > self.health_check_interval:
+            try:
+                self.health_check(client.mgmt)
+            except Exception as e:
+                self.failed_checks += 1
+                self.logger.warning("Dropping mgmt client of %s, health check failed: %s",
+                                    key[0], e)
+            else:
+                client.last_checked = now
+                return client
+        else:
+            return client
+        del self._clients[key]
+        disconnect_mgmt(client.mgmt)
+        return None
+
+    def get(self, provider_id, provider_data, factory):
+        """Returns the pooled mgmt client for the provider, ``factory()`` creates a missing one."""
+        key = self.client_key(provider_id, provider_data)
+        with self._lock:
+            client = self._usable_client(key)
+            if client is not None:
+                self.hits += 1
+                client.last_used = time.time()
+                return client.mgmt
+            self.misses += 1
+        # Log in outside of the lock so other providers are not held up
+        start = time.time()
+        mgmt = factory()
+        creation_time = time.time() - start
+        with self._lock:
+            self.total_creation_time += creation_time
+            self._clients[key] = PooledClient(mgmt, creation_time)
+        self.logger.info(
+            "Created mgmt client of %s in %.2fs (%s)", provider_id, creation_time, self.stats)
+        return mgmt
+
+    @contextmanager
+    def borrow(self, provider_id, provider_data, factory):
+        """Context manager yielding the pooled client while holding one of the provider's slots.
+
+        If the block raises, the client is health checked before it is handed out again.
+        """
+        if self.provider_slots is None:
+            slot = nullcontext()
+        else:
+            slot = self.provider_slots.hold(provider_id)
+        with slot:
+            mgmt = self.get(provider_id, provider_data, factory)
+            try:
+                yield mgmt
+            except Exception:
+                with self._lock:
+                    client = self._clients.get(self.client_key(provider_id, provider_data))
+                    if client is not None and client.mgmt is mgmt:
+                        client.last_checked = 0
+                raise
+
+    def clear(self):
+        with self._lock:
+            for client in self._clients.values():
+                disconnect_mgmt(client.mgmt)
+            self._clients.clear()
+
+    @property
+    def stats(self):
+        requests = self.hits + self.misses
+        average_creation_time = self.total_creation_time / self.misses if self.misses else 0.0
+        return PoolStats(
+            hits=self.hits, misses=self.misses, expired=self.expired,
+            failed_checks=self.failed_checks,
+            hit_rate=float(self.hits) / requests if requests else 0.0,
+            time_saved=self.hits * average_creation_time)
+
+
+mgmt_pool = MgmtClientPool(
+    idle_expiry=timedelta(**settings.MGMT_CLIENT_IDLE_EXPIRY).total_seconds(),
+    health_check_interval=timedelta(**settings.MGMT_CLIENT_HEALTH_CHECK_INTERVAL).total_seconds(),
+    provider_slots=ProviderSlots(
+        concurrency=settings.MGMT_CLIENT_PROVIDER_CONCURRENCY,
+        expiry=timedelta(**settings.MGMT_CLIENT_SLOT_EXPIRY).total_seconds()))
@@ -14,7 +14,7 @@ from datetime import timedelta, date
 from django.contrib.auth.models import User, Group as DjangoGroup
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models, transaction
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.db.models.signals import pre_save
 from django.dispatch import receiver
 from django.utils import timezone
@@ -24,6 +24,7 @@ from cached_property import threaded_cached_property
 
 from sprout import critical_section, redis
 from sprout.log import create_logger
+from appliances.mgmt_pool import mgmt_pool
 
 from cfme.utils.appliance import Appliance as CFMEAppliance, IPAppliance
 from cfme.utils.bz import Bugzilla
@@ -128,7 +129,28 @@ class DelayedProvisionTask(MetadataMixin):
             self.provider_to_avoid.id if self.provider_to_avoid is not None else "---")
 
 
+class ProviderQuerySet(models.QuerySet):
+    def with_load(self):
+        """Annotates the counts that the load and slot properties of :py:class:`Provider` use.
+
+        One query then returns the load of all selected providers, the properties fall back to
+        their own queries only on providers that were not fetched this way.
+        """
+        return self.annotate(
+            annotated_num_currently_provisioning=Count(
+                'provider_templates__appliance', distinct=True,
+                filter=Q(
+                    provider_templates__appliance__ready=False,
+                    provider_templates__appliance__marked_for_deletion=False,
+                    provider_templates__appliance__ip_address=None)),
+            annotated_num_currently_managing=Count('provider_templates__appliance', distinct=True),
+            annotated_num_templates_preparing=Count(
+                'provider_templates', distinct=True, filter=Q(provider_templates__ready=False)))
+
+
 class Provider(MetadataMixin):
+    objects = ProviderQuerySet.as_manager()
+
     id = models.CharField(max_length=32, primary_key=True, help_text="Provider's key in YAML.")
     working = models.BooleanField(default=False, help_text="Whether provider is available.")
     num_simultaneous_provisioning = models.IntegerField(default=5,
@@ -188,23 +210,55 @@ class Provider(MetadataMixin):
     def existing_templates(self):
         return self.provider_templates.filter(exists=True)
 
-    @property
-    def api(self):
+    def _create_api(self):
         provider_data = self.metadata.get('provider_data')
         if provider_data:
-            return get_mgmt(provider_data)
+            return get_mgmt(provider_data, cached=False)
         else:
-            return get_mgmt(self.id)
+            return get_mgmt(self.id, cached=False)
+
+    @property
+    def api(self):
+        return mgmt_pool.get(self.id, self.provider_data, self._create_api)
+
+    @property
+    @contextmanager
+    def borrowed_api(self):
+        """Pooled mgmt client held with one of the provider's concurrency slots."""
+        with mgmt_pool.borrow(self.id, self.provider_data, self._create_api) as api:
+            yield api
+
+    @classmethod
+    def attach_load(cls, templates):
+        """Swaps providers of the templates for ones fetched by a single ``with_load()`` query.
+
+        Returns:
+            list of the templates
+        """
+        templates = list(templates)
+        providers = cls.objects.with_load().in_bulk({t.provider_id for t in templates})
+        for template in templates:
+            template.provider = providers[template.provider_id]
+        return templates
+
+    def _annotated_count(self, annotation, queryset):
+        value = getattr(self, annotation, None)
+        if value is None:
+            return queryset.count()
+        return value
 
     @property
     def num_currently_provisioning(self):
-        return len(
+        return self._annotated_count(
+            'annotated_num_currently_provisioning',
             Appliance.objects.filter(
                 ready=False, marked_for_deletion=False, template__provider=self, ip_address=None))
 
     @property
     def num_templates_preparing(self):
-        return len(Template.objects.filter(provider=self, ready=False))
+        return self._annotated_count(
+            'annotated_num_templates_preparing',
+            Template.objects.filter(provider=self, ready=False))
 
     @property
     def remaining_configuring_slots(self):
@@ -224,7 +278,8 @@ class Provider(MetadataMixin):
 
     @property
     def num_currently_managing(self):
-        return len(Appliance.objects.filter(template__provider=self))
+        return self._annotated_count(
+            'annotated_num_currently_managing', Appliance.objects.filter(template__provider=self))
 
     @property
     def currently_managed_appliances(self):
@@ -507,18 +562,21 @@ class GroupShepherd(MetadataMixin):
             template__template_group=self.template_group,
             template__provider__user_groups=self.user_group)
 
-    def get_fulfillment_percentage(self, preconfigured):
+    def get_fulfillment_percentage(self, preconfigured, appliances_in_shepherd=None):
         """Return percentage of fulfillment of the group shepherd.
 
         Values between 0-100, can be over 100 if there are more than required.
 
         Args:
             preconfigured: Whether to check the pure ones or configured ones.
+            appliances_in_shepherd: Already known count of the appliances in the shepherd, they
+                are counted if not passed.
         """
-        appliances_in_shepherd = len(
-            self.appliances.filter(
-                template__preconfigured=preconfigured, appliance_pool=None,
-                marked_for_deletion=False))
+        if appliances_in_shepherd is None:
+            appliances_in_shepherd = len(
+                self.appliances.filter(
+                    template__preconfigured=preconfigured, appliance_pool=None,
+                    marked_for_deletion=False))
         wanted_pool_size = (
             self.template_pool_size if preconfigured else self.unconfigured_template_pool_size)
         if wanted_pool_size == 0:
@@ -1406,10 +1464,11 @@ class AppliancePool(MetadataMixin):
 
     @property
     def possible_templates(self):
-        q = Template.objects.filter(ready=True, exists=True, usable=True,
-                    **self.filter_params).select_related('provider').distinct().order_by()
+        q = Provider.attach_load(
+            Template.objects.filter(ready=True, exists=True, usable=True,
+                                    **self.filter_params).distinct().order_by())
         if self.provider_type is None:
-            return list(q)
+            return q
         else:
             return [t for t in q if t.provider.provider_type == self.provider_type]
 
@@ -0,0 +1,175 @@
+"""Deficit computation of the appliance shepherd.
+
+The appliances kept by all :py:class:`appliances.models.GroupShepherd` are counted with one grouped
+query over template groups, user groups, versions and dates. The templates to provision from and
+the appliances to kill are then loaded with one query each for all the shepherds that need them,
+so the number of queries does not grow with the number of templates or shepherds.
+"""
+from collections import defaultdict
+
+from django.db.models import Count, F, Q
+from miq_version import Version
+
+from appliances.models import Appliance, GroupShepherd, Provider, Template
+
+
+class ShepherdPlan(object):
+    """What one group shepherd keeps and what it considers obsolete.
+
+    For downstream groups (versioned templates), the latest date of the latest version is kept and
+    all the other versions and dates are obsolete. For upstream groups only the latest date is kept.
+    """
+    def __init__(self, shepherd, preconfigured, version, date, num_in_shepherd):
+        self.shepherd = shepherd
+        self.version = version
+        self.date = date
+        # Unassigned appliances of the kept and of the obsolete templates
+        self.num_kept = 0
+        self.num_obsolete = 0
+        self.pool_size = (
+            shepherd.template_pool_size if preconfigured
+            else shepherd.unconfigured_template_pool_size)
+        self.fulfillment = shepherd.get_fulfillment_percentage(preconfigured, num_in_shepherd)
+
+    @property
+    def key(self):
+        return self.shepherd.template_group_id, self.shepherd.user_group_id
+
+    @property
+    def deficit(self):
+        return self.pool_size - self.num_kept
+
+    def is_kept(self, version, date):
+        if self.version is not None and version != self.version:
+            return False
+        return date == self.date
+
+    def is_obsolete(self, version, date):
+        if self.version is not None:
+            return version is not None and not self.is_kept(version, date)
+        return date != self.date
+
+
+def _shepherd_filter(plans, prefix=''):
+    return {
+        prefix + 'template_group__in': {plan.shepherd.template_group_id for plan in plans},
+        prefix + 'provider__user_groups__in': {plan.shepherd.user_group_id for plan in plans},
+    }
+
+
+def plan_shepherds(preconfigured):
+    """Computes the :py:class:`ShepherdPlan` of every group shepherd.
+
+    Returns:
+        :py:class:`list` of :py:class:`ShepherdPlan` sorted by the fulfillment, the least fulfilled
+        first. Shepherds whose group has no usable templates yet are left out.
+    """
+    shepherds = list(GroupShepherd.objects.all())
+    if not shepherds:
+        return []
+    stats = defaultdict(list)
+    rows = Template.objects\
+        .filter(
+            preconfigured=preconfigured,
+            template_group__in={gs.template_group_id for gs in shepherds},
+            provider__user_groups__in={gs.user_group_id for gs in shepherds})\
+        .values('template_group', 'provider__user_groups', 'version', 'date', 'ready', 'usable')\
+        .annotate(unassigned=Count(
+            'appliance', distinct=True,
+            filter=Q(appliance__appliance_pool=None, appliance__marked_for_deletion=False)))\
+        .order_by()
+    for row in rows:
+        stats[row['template_group'], row['provider__user_groups']].append(row)
+
+    plans = []
+    for gs in shepherds:
+        group_rows = stats[gs.template_group_id, gs.user_group_id]
+        usable_rows = [row for row in group_rows if row['ready'] and row['usable']]
+        if not usable_rows:
+            continue  # Ignore this group, no templates detected yet
+        versions = {row['version'] for row in usable_rows if row['version'] is not None}
+        if versions:
+            # Downstream - by version (downstream releases), latest date of the latest version
+            version = max(versions, key=Version)
+            date = max(row['date'] for row in usable_rows if row['version'] == version)
+        else:
+            # Upstream - by date (upstream nightlies)
+            version = None
+            date = max(row['date'] for row in usable_rows)
+        plan = ShepherdPlan(
+            gs, preconfigured, version, date, sum(row['unassigned'] for row in group_rows))
+        plan.num_kept = sum(
+            row['unassigned'] for row in usable_rows if plan.is_kept(row['version'], row['date']))
+        plan.num_obsolete = sum(
+            row['unassigned'] for row in usable_rows
+            if plan.is_obsolete(row['version'], row['date']))
+        plans.append(plan)
+    plans.sort(key=lambda plan: plan.fulfillment)
+    return plans
+
+
+def _by_shepherd_key(objects, get_template):
+    """Groups objects annotated with ``user_group`` like :py:attr:`ShepherdPlan.key`."""
+    by_key = defaultdict(list)
+    for o in objects:
+        by_key[get_template(o).template_group_id, o.user_group].append(o)
+    return by_key
+
+
+def provisioning_templates(plans, preconfigured):
+    """Loads the kept and existing templates of the plans that lack appliances.
+
+    The providers of the templates come with their load attached.
+
+    Returns:
+        :py:class:`dict` of shepherd id to the list of templates
+    """
+    plans = [plan for plan in plans if plan.deficit > 0]
+    if not plans:
+        return {}
+    templates = Provider.attach_load(
+        Template.objects
+        .filter(
+            ready=True, usable=True, exists=True, preconfigured=preconfigured,
+            date__in={plan.date for plan in plans}, **_shepherd_filter(plans))
+        .annotate(user_group=F('provider__user_groups'))
+        .order_by('id'))
+    by_key = _by_shepherd_key(templates, lambda t: t)
+    return {
+        plan.shepherd.id: [t for t in by_key[plan.key] if plan.is_kept(t.version, t.date)]
+        for plan in plans}
+
+
+def shepherd_appliances(plans, preconfigured):
+    """Loads the unassigned appliances of the plans that have surplus or obsolete appliances.
+
+    Returns:
+        :py:class:`dict` of shepherd id to a tuple of the kept appliances, eldest first, and the
+        obsolete appliances
+    """
+    plans = [plan for plan in plans if plan.deficit < 0 or plan.num_obsolete > 0]
+    if not plans:
+        return {}
+    appliances = list(
+        Appliance.objects
+        .filter(
+            appliance_pool=None, marked_for_deletion=False, template__ready=True,
+            template__usable=True, template__preconfigured=preconfigured,
+            **_shepherd_filter(plans, prefix='template__'))
+        .annotate(user_group=F('template__provider__user_groups'))
+        .select_related('template', 'template__provider')
+        .prefetch_related('template__provider__user_groups')
+        .order_by('status_changed', 'id'))
+    by_key = _by_shepherd_key(appliances, lambda a: a.template)
+    return {
+        plan.shepherd.id: (
+            [a for a in by_key[plan.key] if plan.is_kept(a.template.version, a.template.date)],
+            [a for a in by_key[plan.key]
+             if plan.is_obsolete(a.template.version, a.template.date)])
+        for plan in plans}
+
+
+def reserve_provisioning_slot(provider):
+    """Accounts a new appliance in the attached load so the next pick sees the provider busier."""
+    provider.annotated_num_currently_provisioning = provider.num_currently_provisioning + 1
+    provider.annotated_num_currently_managing = provider.num_currently_managing + 1
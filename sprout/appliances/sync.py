@@ -0,0 +1,110 @@
+"""Synchronization of the appliances in the database with the VMs present on their provider.
+
+The provider is asked for its VMs once, the result is matched against all appliances of the
+provider in memory and only the appliances that changed are written back, in a single
+``bulk_update`` inside one transaction. ``bulk_update`` does not go through
+:py:meth:`MetadataMixin.save`, so ``modified_on`` is bumped here explicitly.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from appliances.models import Appliance
+
+ProviderVm = namedtuple('ProviderVm', ['name', 'uuid', 'state'])
+ApplianceChange = namedtuple(
+    'ApplianceChange', ['appliance_id', 'appliance_name', 'field', 'old', 'new'])
+
+REFRESHED_STATUS = 'Appliance Refreshed'
+SYNCED_FIELDS = (
+    'name', 'uuid', 'power_state', 'power_state_changed', 'swap', 'ssh_failed', 'status',
+    'status_changed')
+# Only these make it to the change log, the rest are derived from them
+LOGGED_FIELDS = ('name', 'uuid', 'power_state')
+
+
+def list_provider_vms(mgmt, openshift=False, logger=None):
+    """Retrieves all VMs of a provider with a single ``list_vms`` call.
+
+    Args:
+        mgmt: The provider's mgmt system
+        openshift: Whether ``mgmt`` is an Openshift system, which lists only project names
+        logger: Logger to report VMs that could not be read
+    Returns:
+        :py:class:`list` of :py:class:`ProviderVm`
+    """
+    vms = []
+    for vm in mgmt.list_vms():
+        try:
+            if openshift:
+                if not mgmt.is_appliance(vm):
+                    # there are some service projects in openshift which we need to skip here
+                    continue
+                vms.append(ProviderVm(
+                    name=vm, uuid=mgmt.get_appliance_uuid(vm), state=mgmt.vm_status(vm)))
+            else:
+                vms.append(ProviderVm(name=vm.name, uuid=vm.uuid, state=vm.state))
+        except Exception as e:
+            if logger is not None:
+                logger.error("Couldn't refresh vm {} because of {}".format(vm, e))
+    return vms
+
+
+def diff_appliances(appliances, vms):
+    """Matches the appliances with the VMs by UUID, then by name, and updates them in memory.
+
+    Appliances that do not match any VM become orphaned.
+
+    Returns:
+        A tuple of the list of changed appliances and the list of :py:class:`ApplianceChange`
+    """
+    uuid_vms = {vm.uuid: vm for vm in vms if vm.uuid}
+    name_vms = {vm.name: vm for vm in vms}
+    now = timezone.now()
+    changed_appliances = []
+    change_log = []
+    for appliance in appliances:
+        old_values = {field: getattr(appliance, field) for field in SYNCED_FIELDS}
+        if appliance.uuid is not None and appliance.uuid in uuid_vms:
+            vm = uuid_vms[appliance.uuid]
+            # Using the UUID and change the name if it changed
+            appliance.name = vm.name
+        elif appliance.name in name_vms:
+            vm = name_vms[appliance.name]
+            # Using the name, and then retrieve uuid
+            appliance.uuid = vm.uuid
+        else:
+            vm = None
+        if vm is not None:
+            appliance.set_power_state(
+                Appliance.POWER_STATES_MAPPING.get(vm.state, Appliance.Power.UNKNOWN))
+        else:
+            appliance.set_power_state(Appliance.Power.ORPHANED)
+        if appliance.status != REFRESHED_STATUS:
+            appliance.status = REFRESHED_STATUS
+            appliance.status_changed = now
+        if any(getattr(appliance, field) != old_values[field] for field in SYNCED_FIELDS):
+            appliance.modified_on = now
+            changed_appliances.append(appliance)
+            change_log.extend(
+                ApplianceChange(appliance.id, appliance.name, field, old_values[field],
+                                getattr(appliance, field))
+                for field in LOGGED_FIELDS
+                if getattr(appliance, field) != old_values[field])
+    return changed_appliances, change_log
+
+
+def sync_provider_appliances(provider, vms):
+    """Applies the state of ``vms`` to all appliances of the provider in one transaction.
+
+    Returns:
+        :py:class:`list` of :py:class:`ApplianceChange`
+    """
+    with transaction.atomic():
+        appliances = list(Appliance.objects.filter(template__provider=provider))
+        changed_appliances, change_log = diff_appliances(appliances, vms)
+        if changed_appliances:
+            Appliance.objects.bulk_update(
+                changed_appliances, SYNCED_FIELDS + ('modified_on', ))
+    return change_log
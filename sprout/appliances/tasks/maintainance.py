@@ -1,6 +1,5 @@
 import re
 import socket
-from collections import namedtuple
 from datetime import timedelta
 
 import command
@@ -16,6 +15,7 @@ from wrapanapi import Openshift
 from . import parsedate, singleton_task, provider_error_logger
 from appliances.models import (Provider, Group, Template, Appliance, AppliancePool,
                                MismatchVersionMailer, User)
+from appliances.sync import list_provider_vms, sync_provider_appliances
 from cfme.utils.path import project_path
 from sprout import settings, redis
 from sprout.irc_bot import send_message
@@ -473,11 +473,12 @@ def check_templates_in_provider(self, provider_id):
     provider = Provider.objects.get(id=provider_id, disabled=False)
     # Get templates and update metadata
     try:
-        # TODO: change after openshift wrapanapi refactor
-        if isinstance(provider.api, Openshift):
-            templates = list(map(str, provider.api.list_template()))
-        else:
-            templates = [tmpl.name for tmpl in provider.api.list_templates()]
+        with provider.borrowed_api as api:
+            # TODO: change after openshift wrapanapi refactor
+            if isinstance(api, Openshift):
+                templates = list(map(str, api.list_template()))
+            else:
+                templates = [tmpl.name for tmpl in api.list_templates()]
     except Exception as err:
         self.logger.warning("Provider %s will be marked as not working because of %s",
                             provider_id, err)
@@ -515,63 +516,30 @@ def refresh_appliances_provider(self, provider_id):
     """
     self.logger.info("Refreshing appliances in {}".format(provider_id))
     provider = Provider.objects.get(id=provider_id, working=True, disabled=False)
-    if not hasattr(provider.api, "list_vms"):
-        # Ignore this provider
-        return
-    vms = provider.api.list_vms()
-    dict_vms = {}
-    uuid_vms = {}
-    FakeVm = namedtuple('FakeVm', ['ip', 'name', 'uuid', 'state'])
-
-    for vm in vms:
-        try:
-            if provider.provider_type == 'openshift':
-                if not provider.api.is_appliance(vm):
-                    # there are some service projects in openshift which we need to skip here
-                    continue
-
-                vm_data = dict(ip=provider.api.get_appliance_url(vm),
-                               name=vm,
-                               uuid=provider.api.get_appliance_uuid(vm),
-                               state=provider.api.vm_status(vm))
-                vm = FakeVm(**vm_data)
-
-            dict_vms[vm.name] = vm
-            if vm.uuid:
-                uuid_vms[vm.uuid] = vm
-        except Exception as e:
-            self.logger.error("Couldn't refresh vm {} because of {}".format(vm.name, e.message))
-            continue
-
-    for appliance in Appliance.objects.filter(template__provider=provider):
-        if appliance.uuid is not None and appliance.uuid in uuid_vms:
-            vm = uuid_vms[appliance.uuid]
-            # Using the UUID and change the name if it changed
-            appliance.name = vm.name
-            appliance.set_power_state(Appliance.POWER_STATES_MAPPING.get(
-                vm.state, Appliance.Power.UNKNOWN))
-        elif appliance.name in dict_vms:
-            vm = dict_vms[appliance.name]
-            # Using the name, and then retrieve uuid
-            appliance.uuid = vm.uuid
-            appliance.set_power_state(Appliance.POWER_STATES_MAPPING.get(
-                vm.state, Appliance.Power.UNKNOWN))
-            self.logger.info("Retrieved UUID for appliance {}/{}: {}".format(
-                appliance.id, appliance.name, appliance.uuid))
-        else:
-            # Orphaned :(
-            appliance.set_power_state(Appliance.Power.ORPHANED)
-        with transaction.atomic():
-            appliance.save()
-        appliance.set_status('Appliance Refreshed')
+    with provider.borrowed_api as mgmt:
+        if not hasattr(mgmt, "list_vms"):
+            # Ignore this provider
+            return
+        vms = list_provider_vms(
+            mgmt, openshift=provider.provider_type == 'openshift', logger=self.logger)
+    change_log = sync_provider_appliances(provider, vms)
+    for change in change_log:
+        self.logger.info("Appliance {}/{} {} changed: {!r} -> {!r}".format(*change))
+    self.logger.info(
+        "Refreshed appliances in {}, {} changes".format(provider_id, len(change_log)))
 
 
 @singleton_task()
 def refresh_appliances(self):
     """Dispatches the appliance refresh process among the providers"""
     self.logger.info("Initiating regular appliance provider refresh")
-    for provider in Provider.objects.filter(working=True, disabled=False):
-        refresh_appliances_provider.delay(provider.id)
+    # One query for the providers that have anything to sync, each provider is then synced in
+    # bulk by its own task so a slow provider does not hold up the others
+    provider_ids = Provider.objects.filter(
+        working=True, disabled=False, provider_templates__appliance__isnull=False
+    ).distinct().values_list('id', flat=True)
+    for provider_id in provider_ids:
+        refresh_appliances_provider.delay(provider_id)
 
 
 @singleton_task()
@@ -608,46 +576,47 @@ def kill_lost_appliances_per_provider(self, provider_id):
     provider = Provider.objects.get(id=provider_id)
     self.logger.info("obtaining list of vms on provider {}".format(provider.id))
     try:
-        vms = provider.api.list_vms()
-        if provider.provider_type == 'openshift':
-            vm_names = vms
-        else:
-            vm_names = []
-            for vm in vms:
-                try:
-                    vm_names.append(vm.name)
-                except Exception as e:
-                    self.logger.exception("Couldn't get one prov's vm: {p} "
-                                          "because of exception {e}".format(p=provider_id,
-                                                                            e=e))
-                    continue
-        # skipping appliances present in sprout db. those will be handled by another task
-        vm_names = [name for name in vm_names
-                    if not Appliance.objects.filter(name=name, template__provider=provider)]
-        # checking vm time
-        for rule in rules:
-            expiration_time = timezone.now() - timedelta(**rule['lifetime'])
-            for name in vm_names:
-                if not re.match(rule['name'], name):
-                    continue
-
-                if provider.provider_type != 'openshift':
+        with provider.borrowed_api as api:
+            vms = api.list_vms()
+            if provider.provider_type == 'openshift':
+                vm_names = vms
+            else:
+                vm_names = []
+                for vm in vms:
                     try:
-                        vm_creation_time = provider.api.get_vm(name).creation_time
+                        vm_names.append(vm.name)
                     except Exception as e:
-                        self.logger.exception("Couldn't get vm {vm} timestamp (prov: {p}) "
-                                              "because of exception {e}".format(vm=name,
-                                                                                p=provider_id,
+                        self.logger.exception("Couldn't get one prov's vm: {p} "
+                                              "because of exception {e}".format(p=provider_id,
                                                                                 e=e))
                         continue
-                else:
-                    vm_creation_time = provider.api.vm_creation_time(name)
+            # skipping appliances present in sprout db. those will be handled by another task
+            vm_names = [name for name in vm_names
+                        if not Appliance.objects.filter(name=name, template__provider=provider)]
+            # checking vm time
+            for rule in rules:
+                expiration_time = timezone.now() - timedelta(**rule['lifetime'])
+                for name in vm_names:
+                    if not re.match(rule['name'], name):
+                        continue
 
-                if vm_creation_time > expiration_time:
-                    continue
+                    if provider.provider_type != 'openshift':
+                        try:
+                            vm_creation_time = api.get_vm(name).creation_time
+                        except Exception as e:
+                            self.logger.exception("Couldn't get vm {vm} timestamp (prov: {p}) "
+                                                  "because of exception {e}".format(vm=name,
+                                                                                    p=provider_id,
+                                                                                    e=e))
+                            continue
+                    else:
+                        vm_creation_time = api.vm_creation_time(name)
+
+                    if vm_creation_time > expiration_time:
+                        continue
 
-                # looks like vm matches all rule and can be killed
-                kill_lost_appliance.delay(provider.id, name)
+                    # looks like vm matches all rule and can be killed
+                    kill_lost_appliance.delay(provider.id, name)
     except Exception as e:
         self.logger.exception("exception occurred during obtaining list of vms "
                               "on provider {}".format(provider_id))
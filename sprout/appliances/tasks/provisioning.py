@@ -8,7 +8,7 @@ from urllib.request import urlopen
 import diaper
 import fauxfactory
 import yaml
-from celery import chain
+from celery import chain, group
 from celery.exceptions import MaxRetriesExceededError
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
@@ -27,7 +27,9 @@ from .service_ops import appliance_power_on, appliance_yum_update, kill_applianc
 from .template import (prepare_template_deploy, prepare_template_seal, prepare_template_poweroff,
                        prepare_template_finish, prepare_template_delete_on_error)
 from appliances.models import (Provider, Group, Template, Appliance, AppliancePool,
-                               DelayedProvisionTask, GroupShepherd)
+                               DelayedProvisionTask)
+from appliances.shepherd import (plan_shepherds, provisioning_templates, shepherd_appliances,
+                                 reserve_provisioning_slot)
 from sprout import redis
 
 
@@ -104,8 +106,11 @@ def clone_template_to_appliance__clone_template(self, appliance_id, lease_time_m
         raise RuntimeError('Provider {} is not working for appliance {}'
                            .format(appliance.provider, appliance.name))
     try:
-        appliance.provider.cleanup()
-        if not appliance.provider_api.does_vm_exist(appliance.name):
+        # the slot is held for the API calls only, not for the whole deploy
+        with appliance.provider.borrowed_api as provider_api:
+            appliance.provider.cleanup()
+            vm_exists = provider_api.does_vm_exist(appliance.name)
+        if not vm_exists:
             appliance.set_status("Beginning template clone.")
             provider_data = appliance.template.provider.provider_data
             kwargs = dict(provider_data["sprout"])
@@ -576,8 +581,8 @@ def configure_docker_template(self, template_id, pull_url):
 
 @singleton_task()
 def read_docker_images_from_url(self):
-    for group in Group.objects.exclude(Q(templates_url=None) | Q(templates_url='')):
-        read_docker_images_from_url_group.delay(group.id)
+    for template_group in Group.objects.exclude(Q(templates_url=None) | Q(templates_url='')):
+        read_docker_images_from_url_group.delay(template_group.id)
 
 
 @singleton_task()
@@ -645,7 +650,7 @@ def process_docker_images_from_url_group(self, group_id, version, docker_version
         if age.days > group.template_obsolete_days:
             self.logger.info('Ignoring old template {} (age {} days)'.format(pull_url, age))
             return
-    for provider in Provider.objects.filter(working=True, disabled=False):
+    for provider in Provider.objects.filter(working=True, disabled=False).with_load():
         if not provider.container_base_template:
             # 11:30 PM, TODO put this check in a query
             continue
@@ -667,100 +672,57 @@ def generic_shepherd(self, preconfigured):
     """This task takes care of having the required templates spinned into required number of
     appliances. For each template group, it keeps the last template's appliances spinned up in
     required quantity. If new template comes out of the door, it automatically kills the older
-    running template's appliances and spins up new ones. Sorts the groups by the fulfillment."""
-    for gs in sorted(
-            GroupShepherd.objects.all(), key=lambda g: g.get_fulfillment_percentage(preconfigured)):
-        prov_filter = {'provider__user_groups': gs.user_group}
-        group_versions = Template.get_versions(
-            template_group=gs.template_group, ready=True, usable=True, preconfigured=preconfigured,
-            **prov_filter)
-        group_dates = Template.get_dates(
-            template_group=gs.template_group, ready=True, usable=True, preconfigured=preconfigured,
-            **prov_filter)
-        if group_versions:
-            # Downstream - by version (downstream releases)
-            version = group_versions[0]
-            # Find the latest date (one version can have new build)
-            dates = Template.get_dates(
-                template_group=gs.template_group, ready=True, usable=True,
-                version=group_versions[0], preconfigured=preconfigured, **prov_filter)
-            if not dates:
-                # No template yet?
-                continue
-            date = dates[0]
-            filter_keep = {"version": version, "date": date}
-            filters_kill = []
-            for kill_date in dates[1:]:
-                filters_kill.append({"version": version, "date": kill_date})
-            for kill_version in group_versions[1:]:
-                filters_kill.append({"version": kill_version})
-        elif group_dates:
-            # Upstream - by date (upstream nightlies)
-            filter_keep = {"date": group_dates[0]}
-            filters_kill = [{"date": v} for v in group_dates[1:]]
-        else:
-            continue  # Ignore this group, no templates detected yet
-
-        filter_keep.update(prov_filter)
-        for filt in filters_kill:
-            filt.update(prov_filter)
-        # Keeping current appliances
-        # Retrieve list of all templates for given group
-        # I know joins might be a bit better solution but I'll leave that for later.
-        possible_templates = list(
-            Template.objects.filter(
-                usable=True, ready=True, template_group=gs.template_group,
-                preconfigured=preconfigured, **filter_keep).all())
+    running template's appliances and spins up new ones. Sorts the groups by the fulfillment.
+
+    The deficits of all groups are computed at once (see :py:mod:`appliances.shepherd`) and the
+    clones are started together as one celery group."""
+    plans = plan_shepherds(preconfigured)
+    templates = provisioning_templates(plans, preconfigured)
+    appliances = shepherd_appliances(plans, preconfigured)
+    new_appliance_ids = []
+    for plan in plans:
+        gs = plan.shepherd
+        kept_appliances, obsolete_appliances = appliances.get(gs.id, ([], []))
         # If it can be deployed, it must exist
-        possible_templates_for_provision = [tpl for tpl in possible_templates if tpl.exists]
-        appliances = []
-        for template in possible_templates:
-            appliances.extend(
-                Appliance.objects.filter(
-                    template=template, appliance_pool=None, marked_for_deletion=False))
-        # If we then want to delete some templates, better kill the eldest. status_changed
-        # says which one was provisioned when, because nothing else then touches that field.
-        appliances.sort(key=lambda appliance: appliance.status_changed)
-        pool_size = gs.template_pool_size if preconfigured else gs.unconfigured_template_pool_size
-        if len(appliances) < pool_size and possible_templates_for_provision:
+        possible_templates_for_provision = templates.get(gs.id, [])
+        if plan.deficit > 0 and possible_templates_for_provision:
             # There must be some templates in order to run the provisioning
             # Provision ONE appliance at time for each group, that way it is possible to maintain
             # reasonable balancing
-            with transaction.atomic():
-                # Now look for templates that are on non-busy providers
-                tpl_free = [t for t
-                            in possible_templates_for_provision
-                            if not t.provider.disabled and t.provider.free]
-                if tpl_free:
-                    chosen_template = sorted(tpl_free, key=lambda t: t.provider.appliance_load)[0]
-                    new_appliance_name = gen_appliance_name(chosen_template.id)
+            # Now look for templates that are on non-busy providers
+            tpl_free = [t for t
+                        in possible_templates_for_provision
+                        if not t.provider.disabled and t.provider.free]
+            if tpl_free:
+                chosen_template = sorted(tpl_free, key=lambda t: t.provider.appliance_load)[0]
+                with transaction.atomic():
                     appliance = Appliance(
                         template=chosen_template,
-                        name=new_appliance_name
+                        name=gen_appliance_name(chosen_template.id)
                     )
                     appliance.save()
-                    self.logger.info("Adding an appliance to shepherd: %s/%s",
-                                     appliance.id, appliance.name)
-                    clone_template_to_appliance.delay(appliance.id, None)
-        elif len(appliances) > pool_size:
-            # Too many appliances, kill the surplus
+                reserve_provisioning_slot(chosen_template.provider)
+                self.logger.info("Adding an appliance to shepherd: %s/%s",
+                                 appliance.id, appliance.name)
+                new_appliance_ids.append(appliance.id)
+        elif plan.deficit < 0:
+            # Too many appliances, kill the surplus, the eldest first
             # Only kill those that are visible only for one group. This is necessary so the groups
             # don't "fight"
-            for appliance in appliances[:len(appliances) - pool_size]:
+            for appliance in kept_appliances[:len(kept_appliances) - plan.pool_size]:
                 if appliance.is_visible_only_in_group(gs.user_group):
                     self.logger.info("Killing an extra appliance {}/{} in shepherd".format(
                         appliance.id, appliance.name))
                     Appliance.kill(appliance)
 
         # Killing old appliances
-        for filter_kill in filters_kill:
-            for template in Template.objects.filter(
-                    ready=True, usable=True, template_group=gs.template_group,
-                    preconfigured=preconfigured, **filter_kill):
-
-                for a in Appliance.objects.filter(
-                        template=template, appliance_pool=None, marked_for_deletion=False):
-                    self.logger.info(
-                        "Killing appliance {}/{} in shepherd because it is obsolete now".format(
-                            a.id, a.name))
-                    Appliance.kill(a)
+        for a in obsolete_appliances:
+            self.logger.info(
+                "Killing appliance {}/{} in shepherd because it is obsolete now".format(
+                    a.id, a.name))
+            Appliance.kill(a)
+
+    if new_appliance_ids:
+        group(
+            clone_template_to_appliance.si(appliance_id, None)
+            for appliance_id in new_appliance_ids).apply_async()
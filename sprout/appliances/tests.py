@@ -1,3 +1,250 @@
-# from django.test import TestCase
+from collections import namedtuple
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import Group as DjangoGroup
+from django.db import connection
+from django.test import override_settings, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from appliances.mgmt_pool import check_mgmt_health, MgmtClientPool, ProviderSlots
+from appliances.models import Appliance, Group, GroupShepherd, Provider, Template
+from appliances.shepherd import plan_shepherds, provisioning_templates, shepherd_appliances
+from appliances.sync import diff_appliances, list_provider_vms, REFRESHED_STATUS
+from cfme.utils.wait import TimedOutError
+
+FakeVm = namedtuple('FakeVm', ['name', 'uuid', 'state'])
+
+
+class FakeMgmtSystem(object):
+    """In-memory stand-in for a wrapanapi system that counts the calls made to it."""
+    def __init__(self, vms):
+        self.vms = vms
+        self.calls = 0
+
+    def list_vms(self):
+        self.calls += 1
+        return list(self.vms)
+
+
+class ProviderSyncTestCase(SimpleTestCase):
+    def setUp(self):
+        self.mgmt = FakeMgmtSystem([
+            FakeVm('renamed-appliance', 'uuid-1', 'poweredOn'),
+            FakeVm('appliance-2', 'uuid-2', 'poweredOff'),
+            FakeVm('appliance-3', 'uuid-3', 'poweredOn'),
+        ])
+
+    def test_list_provider_vms_uses_single_call(self):
+        vms = list_provider_vms(self.mgmt)
+        self.assertEqual(self.mgmt.calls, 1)
+        self.assertEqual([vm.name for vm in vms],
+                         ['renamed-appliance', 'appliance-2', 'appliance-3'])
+
+    def test_diff_appliances(self):
+        by_uuid = Appliance(name='appliance-1', uuid='uuid-1', power_state=Appliance.Power.ON,
+                            status=REFRESHED_STATUS)
+        by_name = Appliance(name='appliance-2', power_state=Appliance.Power.ON, swap=100,
+                            status=REFRESHED_STATUS)
+        unchanged = Appliance(name='appliance-3', uuid='uuid-3', power_state=Appliance.Power.ON,
+                              status=REFRESHED_STATUS)
+        orphaned = Appliance(name='appliance-4', power_state=Appliance.Power.ON,
+                             status=REFRESHED_STATUS)
+        stale = timezone.now() - timedelta(days=1)
+        by_uuid.modified_on = unchanged.modified_on = stale
+        changed, change_log = diff_appliances(
+            [by_uuid, by_name, unchanged, orphaned], list_provider_vms(self.mgmt))
+
+        self.assertEqual(changed, [by_uuid, by_name, orphaned])
+        self.assertEqual(by_uuid.name, 'renamed-appliance')
+        self.assertEqual(by_name.uuid, 'uuid-2')
+        self.assertEqual(by_name.power_state, Appliance.Power.OFF)
+        self.assertEqual(by_name.swap, 0)
+        self.assertEqual(orphaned.power_state, Appliance.Power.ORPHANED)
+        self.assertGreater(by_uuid.modified_on, stale)
+        self.assertEqual(unchanged.modified_on, stale)
+        self.assertEqual(
+            [(change.field, change.old, change.new) for change in change_log],
+            [('name', 'appliance-1', 'renamed-appliance'),
+             ('uuid', None, 'uuid-2'),
+             ('power_state', Appliance.Power.ON, Appliance.Power.OFF),
+             ('power_state', Appliance.Power.ON, Appliance.Power.ORPHANED)])
+
+    def test_diff_appliances_sets_refreshed_status(self):
+        appliance = Appliance(name='appliance-3', uuid='uuid-3', power_state=Appliance.Power.ON)
+        changed, change_log = diff_appliances([appliance], list_provider_vms(self.mgmt))
+        self.assertEqual(changed, [appliance])
+        self.assertEqual(change_log, [])
+        self.assertEqual(appliance.status, REFRESHED_STATUS)
+
+
+class MgmtClientPoolTestCase(SimpleTestCase):
+    provider_data = {'name': 'fake', 'type': 'virtualcenter', 'credentials': {'username': 'u'}}
+
+    def setUp(self):
+        self.created = []
+        self.healthy = True
+
+    def factory(self):
+        mgmt = FakeMgmtSystem([])
+        self.created.append(mgmt)
+        return mgmt
+
+    def health_check(self, mgmt):
+        if not self.healthy:
+            raise IOError('Session expired')
+
+    def test_client_reuse(self):
+        pool = MgmtClientPool(60, 30, health_check=self.health_check)
+        first = pool.get('fake', self.provider_data, self.factory)
+        with pool.borrow('fake', self.provider_data, self.factory) as second:
+            self.assertIs(first, second)
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual((pool.stats.hits, pool.stats.misses), (1, 1))
+        self.assertEqual(pool.stats.hit_rate, 0.5)
+
+    def test_credentials_change_creates_new_client(self):
+        pool = MgmtClientPool(60, 30, health_check=self.health_check)
+        pool.get('fake', self.provider_data, self.factory)
+        changed_data = dict(self.provider_data, credentials={'username': 'other'})
+        pool.get('fake', changed_data, self.factory)
+        self.assertEqual(len(self.created), 2)
+
+    def test_idle_client_expires(self):
+        pool = MgmtClientPool(0, 30, health_check=self.health_check)
+        pool.get('fake', self.provider_data, self.factory)
+        pool.get('fake', self.provider_data, self.factory)
+        self.assertEqual(len(self.created), 2)
+        self.assertEqual(pool.stats.expired, 1)
+
+    def test_unhealthy_client_replaced(self):
+        pool = MgmtClientPool(60, 30, health_check=self.health_check)
+        with self.assertRaises(ValueError):
+            with pool.borrow('fake', self.provider_data, self.factory):
+                raise ValueError('Provider failure')
+        self.healthy = False
+        pool.get('fake', self.provider_data, self.factory)
+        self.assertEqual(len(self.created), 2)
+        self.assertEqual(pool.stats.failed_checks, 1)
+
+    def test_client_without_info_is_healthy(self):
+        pool = MgmtClientPool(60, 0, health_check=check_mgmt_health)
+        pool.get('fake', self.provider_data, self.factory)
+        pool.get('fake', self.provider_data, self.factory)
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(pool.stats.failed_checks, 0)
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'provider-slots'}})
+class ProviderSlotsTestCase(SimpleTestCase):
+    def test_slots_limit_concurrency(self):
+        # the slots of other processes are in the shared cache like the ones of this one
+        slots = ProviderSlots(concurrency=1, expiry=60, delay=0.05)
+        with slots.hold('provider-1'):
+            with self.assertRaises(TimedOutError):
+                with ProviderSlots(concurrency=1, expiry=60).hold('provider-1', timeout=0.2):
+                    pass
+            with slots.hold('provider-2'):
+                pass
+        with slots.hold('provider-1', timeout=0.2):
+            pass
+
+
+class ShepherdPlanTestCase(TestCase):
+    def setUp(self):
+        self.user_group = DjangoGroup.objects.create(name='shepherd-users')
+        self.template_group = Group.objects.create(id='downstream-510z')
+        self.provider = Provider.objects.create(id='provider-1', working=True)
+        self.provider.user_groups.add(self.user_group)
+        self.shepherd = GroupShepherd.objects.create(
+            template_group=self.template_group, user_group=self.user_group,
+            template_pool_size=2)
+        self.latest = self.create_template('5.10.0.2', date(2019, 1, 2))
+        self.obsolete = self.create_template('5.10.0.1', date(2019, 1, 1))
+        Appliance.objects.create(template=self.latest, name='appliance-latest')
+        Appliance.objects.create(template=self.obsolete, name='appliance-obsolete')
+
+    def create_template(self, version, template_date):
+        return Template.objects.create(
+            provider=self.provider, template_group=self.template_group, version=version,
+            date=template_date, name='tpl-{}'.format(version), original_name=version,
+            ready=True, usable=True)
+
+    def run_shepherd_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            plans = plan_shepherds(True)
+            templates = provisioning_templates(plans, True)
+            appliances = shepherd_appliances(plans, True)
+        return len(queries), plans, templates, appliances
+
+    def test_plan(self):
+        _, plans, templates, appliances = self.run_shepherd_queries()
+        plan, = plans
+        self.assertEqual((plan.version, plan.date), ('5.10.0.2', date(2019, 1, 2)))
+        self.assertEqual((plan.num_kept, plan.num_obsolete, plan.deficit), (1, 1, 1))
+        self.assertEqual(templates, {self.shepherd.id: [self.latest]})
+        kept, obsolete = appliances[self.shepherd.id]
+        self.assertEqual([a.name for a in kept], ['appliance-latest'])
+        self.assertEqual([a.name for a in obsolete], ['appliance-obsolete'])
+
+    def test_query_count_does_not_grow_with_templates(self):
+        num_queries = self.run_shepherd_queries()[0]
+        Template.objects.bulk_create(
+            Template(
+                provider=self.provider, template_group=self.template_group,
+                version='5.9.{}.0'.format(i), date=date(2018, 1, 1) + timedelta(days=i % 365),
+                name='tpl-old-{}'.format(i), original_name='old-{}'.format(i),
+                ready=True, usable=True)
+            for i in range(3000))
+        self.assertEqual(self.run_shepherd_queries()[0], num_queries)
+
+
+class ProviderLoadTestCase(TestCase):
+    LOAD = (
+        'num_currently_provisioning', 'num_currently_managing', 'num_templates_preparing',
+        'remaining_provisioning_slots', 'remaining_appliance_slots', 'remaining_configuring_slots')
+
+    def setUp(self):
+        self.template_group = Group.objects.create(id='downstream-510z')
+        busy = Provider.objects.create(id='provider-busy', appliance_limit=4)
+        preparing = Provider.objects.create(id='provider-preparing')
+        Provider.objects.bulk_create(
+            Provider(id='provider-idle-{}'.format(i)) for i in range(10))
+        ready = self.create_template(busy, 'tpl-ready', ready=True)
+        self.create_template(busy, 'tpl-preparing', ready=False)
+        self.create_template(preparing, 'tpl-preparing-2', ready=False)
+        Appliance.objects.create(template=ready, name='appliance-provisioning')
+        Appliance.objects.create(
+            template=ready, name='appliance-running', ready=True, ip_address='10.0.0.1')
+        Appliance.objects.create(
+            template=ready, name='appliance-deleted', marked_for_deletion=True)
+
+    def create_template(self, provider, name, ready):
+        return Template.objects.create(
+            provider=provider, template_group=self.template_group, version='5.10.0.2',
+            date=date(2019, 1, 2), name=name, original_name=name, ready=ready, usable=True)
+
+    def load(self, provider):
+        return {name: getattr(provider, name) for name in self.LOAD}
+
+    def test_annotated_load_matches_properties(self):
+        # Providers not fetched with with_load() fall back to count queries
+        expected = {provider.id: self.load(provider) for provider in Provider.objects.all()}
+        self.assertEqual(expected['provider-busy']['num_currently_provisioning'], 1)
+        self.assertEqual(expected['provider-busy']['num_currently_managing'], 3)
+        self.assertEqual(expected['provider-busy']['remaining_appliance_slots'], 1)
+        self.assertEqual(expected['provider-preparing']['remaining_configuring_slots'], 0)
+        with self.assertNumQueries(1):
+            annotated = {
+                provider.id: self.load(provider) for provider in Provider.objects.with_load()}
+        self.assertEqual(annotated, expected)
+
+    def test_attach_load(self):
+        templates = list(Template.objects.all())
+        with self.assertNumQueries(1):
+            templates = Provider.attach_load(templates)
+            loads = [self.load(template.provider) for template in templates]
+        self.assertEqual(
+            loads,
+            [self.load(Provider.objects.get(id=template.provider_id)) for template in templates])
@@ -182,6 +182,23 @@ ORPHANED_APPLIANCE_GRACE_TIME = dict(
     minutes=45,
 )
 
+# Provider mgmt clients kept by each worker process (see appliances.mgmt_pool)
+MGMT_CLIENT_IDLE_EXPIRY = dict(
+    minutes=10,
+)
+
+MGMT_CLIENT_HEALTH_CHECK_INTERVAL = dict(
+    minutes=2,
+)
+
+# Tasks using a provider at a time, across all the worker processes
+MGMT_CLIENT_PROVIDER_CONCURRENCY = int(os.environ.get("MGMT_CLIENT_PROVIDER_CONCURRENCY", 2))
+
+# A provider slot held longer than this is freed, e.g. one of a killed worker
+MGMT_CLIENT_SLOT_EXPIRY = dict(
+    minutes=30,
+)
+
 CELERY_QUEUES = (
     Queue('high', Exchange('high'), routing_key='high'),
     Queue('normal', Exchange('normal'), routing_key='normal'),
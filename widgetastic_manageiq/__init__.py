@@ -524,7 +524,78 @@ class TableRow(VanillaTableRow):
     Column = TableColumn
 
 
-class Table(VanillaTable):
+class BulkReadTableMixin:
+    """Reads whole table pages in one script call instead of a WebDriver call for every cell.
+
+    Rows with a cell spanning several columns (e.g. "Totals: ddd") or with hidden cells are left
+    out, like reading the rows cell by cell and skipping those not displayed did.
+    """
+
+    # Expects: arguments[0] = table element, arguments[1] = HEADERS, arguments[2] = ROWS xpaths
+    READ_PAGE = jsmin(
+        """\
+        function isVisible(el) {
+            return !!(el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+        }
+        function text(el) {
+            return el.innerText.replace(/\\u00a0/g, " ").trim();
+        }
+        function nodes(xpath, context) {
+            var snapshot = document.evaluate(
+                xpath, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            var result = [];
+            for (var i = 0; i < snapshot.snapshotLength; i++)
+                result.push(snapshot.snapshotItem(i));
+            return result;
+        }
+
+        var headers = nodes(arguments[1], arguments[0]).map(function(th) {
+            return text(th) || null;
+        });
+        var rows = [], skipped = 0;
+        nodes(arguments[2], arguments[0]).forEach(function(tr) {
+            var cells = nodes("./td", tr);
+            if (cells.length < headers.length || !cells.every(isVisible)) {
+                skipped++;
+                return;
+            }
+            rows.push(headers.map(function(header, i) { return text(cells[i]); }));
+        });
+        return {headers: headers, rows: rows, skipped: skipped};
+        """
+    )
+
+    def read_page(self):
+        """Reads the headers and the rows of the displayed page.
+
+        Returns:
+            A tuple of the headers tuple, a list of row tuples and the number of rows left out.
+        """
+        result = self.browser.execute_script(
+            self.READ_PAGE, self.browser.element(self), self.HEADERS, self.ROWS
+        )
+        if result["skipped"]:
+            self.logger.debug("left out %d rows with spanning or hidden cells", result["skipped"])
+        return tuple(result["headers"]), [tuple(row) for row in result["rows"]], result["skipped"]
+
+    def read_pages(self, paginator):
+        """Reads the rows of all the pages of ``paginator``, one script call per page.
+
+        Returns:
+            A tuple of the headers tuple and a list of row tuples.
+        """
+        headers = None
+        body = []
+        for _ in paginator.pages():
+            headers, rows, _ = self.read_page()
+            body.extend(rows)
+        if headers is None:
+            # No paginator, everything is on the displayed page
+            headers, body, _ = self.read_page()
+        return headers, body
+
+
+class Table(BulkReadTableMixin, VanillaTable):
     CHECKBOX_ALL = "|".join(
         [
             './thead/tr/th[1]/input[contains(@class, "checkall")]',
@@ -651,17 +722,51 @@ class SummaryTable(VanillaTable):
     BASELOC = ".//table[./thead/tr/th[normalize-space(.)={}]]"
     Image = namedtuple("Image", ["alt", "title", "src"])
 
+    # Expects: arguments[0] = table element, arguments[1] = ROWS xpath
+    # Returns [label, label has class, label rowspan, value] for each row
+    READ_ROWS = jsmin(
+        """\
+        function text(el) {
+            return el ? el.innerText.replace(/\\u00a0/g, " ").trim() : null;
+        }
+        var rows = document.evaluate(
+            arguments[1], arguments[0], null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        var result = [];
+        for (var i = 0; i < rows.snapshotLength; i++) {
+            var cells = Array.prototype.filter.call(rows.snapshotItem(i).children, function(el) {
+                return el.tagName == "TD";
+            });
+            if (!cells.length)
+                continue;
+            result.push([
+                text(cells[0]), !!cells[0].getAttribute("class"),
+                cells[0].getAttribute("rowspan"), text(cells[1])]);
+        }
+        return result;
+        """
+    )
+
     def __init__(self, parent, title, *args, **kwargs):
         VanillaTable.__init__(self, parent, self.BASELOC.format(quote(title)), *args, **kwargs)
 
+    def _read_rows(self):
+        """Reads the labels and values of all the rows in one script call."""
+        return self.browser.execute_script(self.READ_ROWS, self.browser.element(self), self.ROWS)
+
     @property
     def fields(self):
         """Returns a list of the field names in the table (the left column)."""
-        fields_names = []
-        for field in self:
-            if self.browser.get_attribute("class", field[0]):
-                fields_names.append(field[0].text)
-        return fields_names
+        return [label for label, has_class, _, _ in self._read_rows() if has_class]
+
+    def _text_from_rows(self, rows, field_name):
+        normalized_name = " ".join(field_name.split())
+        for label, _, rowspan, value in rows:
+            if label is not None and " ".join(label.split()) == normalized_name:
+                if rowspan:
+                    # The values are spread over the following rows, see get_field
+                    return [self.browser.text(field) for field in self.get_field(field_name)]
+                return value
+        raise NameError(f"Could not find field with name {field_name!r}")
 
     def get_field(self, field_name):
         """Returns the table row or list of elements for rowspam case
@@ -704,11 +809,7 @@ class SummaryTable(VanillaTable):
         Returns:
             :py:class:`str`
         """
-        fields = self.get_field(field_name)
-        if isinstance(fields, (list, tuple)):
-            return [self.browser.text(field) for field in fields]
-        else:
-            return self.browser.text(fields[1])
+        return self._text_from_rows(self._read_rows(), field_name)
 
     def get_img_of(self, field_name):
         """Returns the information about the image in the field with this name.
@@ -739,7 +840,9 @@ class SummaryTable(VanillaTable):
         return self.get_field(field_name)[1].click()
 
     def read(self):
-        return {field: self.get_text_of(field) for field in self.fields}
+        rows = self._read_rows()
+        fields = [label for label, has_class, _, _ in rows if has_class]
+        return {field: self._text_from_rows(rows, field) for field in fields}
 
 
 class NestedSummaryTable(SummaryTable):
@@ -3264,17 +3367,48 @@ class FileInput(BaseFileInput):
         return super().fill(value)
 
 
+def flatten_item_data(item):
+    """Flattens an item of the report data controller to the entity data, see
+    :py:attr:`JSBaseEntity.data`"""
+    data = dict(item)
+    cells = data.pop("cells")
+    cells = {str(key).replace(" ", "_").lower(): value for key, value in cells.items()}
+    data = {str(key).replace(" ", "_").lower(): value for key, value in data.items()}
+    data.update(cells)
+    return data
+
+
+def page_token(browser):
+    """Returns the token of the state of the page the browser shows, ``None`` if unknown
+
+    See :py:attr:`cfme.utils.appliance.implementations.ui.MiqBrowser.page_token`.
+    """
+    try:
+        return browser.page_token
+    except AttributeError:
+        return None
+
+
 class JSBaseEntity(View, ReportDataControllerMixin):
     """ represents Entity, no matter what state it is in.
         It is implemented using ManageIQ JS API
+
+    Args:
+        page_data: data of the entity read together with all the entities of the page, if any,
+            see :py:attr:`data`
+        page_token: :py:func:`page_token` of the page the data was read on
     """
 
     QUADRANT = './/div[@class="flobj {pos}72"]/*[self::p or self::img or self::div]'
 
-    def __init__(self, parent, entity_id, name=None, logger=None):
+    def __init__(self, parent, entity_id, name=None, logger=None, page_data=None,
+                 page_token=None):
         View.__init__(self, parent, logger=logger)
         self.entity_id = entity_id
-        self._name = name or self.name
+        # data of a page that can't be told apart from the later ones is not kept
+        self._page_data = page_data if page_token is not None else None
+        self._page_token = page_token
+        self._name = name or (page_data or {}).get("name") or self.name
 
     @property
     def is_checked(self):
@@ -3284,8 +3418,22 @@ class JSBaseEntity(View, ReportDataControllerMixin):
         else:
             return checked
 
+    def _current_page_data(self):
+        """Returns the data read with the page, ``None`` once the page may have changed since"""
+        if self._page_data is not None and page_token(self.browser) != self._page_token:
+            self._page_data = None
+        return self._page_data
+
+    def _page_changed(self):
+        page_changed = getattr(self.browser, "page_changed", None)
+        if page_changed is not None:
+            page_changed()
+
     @property
     def name(self):
+        page_data = self._current_page_data()
+        if page_data is not None:
+            return page_data.get("name")
         if self.is_displayed:
             return self.data["name"] if "name" in self.data else None
         else:
@@ -3304,12 +3452,15 @@ class JSBaseEntity(View, ReportDataControllerMixin):
             raise WidgetOperationFailed(f"Unchecking of Entity {self} unsuccessful.")
 
     def check(self):
+        self._page_changed()
         self._call_item_method("select")
 
     def uncheck(self):
+        self._page_changed()
         self._call_item_method("unselect")
 
     def click(self):
+        self._page_changed()
         self._call_item_method("click")
 
     @property
@@ -3317,13 +3468,15 @@ class JSBaseEntity(View, ReportDataControllerMixin):
         """ every entity like QuadIcon/ListEntity etc displays some data,
         which is different for each entity type.
         This is property which should hold such data.
+
+        Entities got together with all the entities of the page return the data read then for as
+        long as the page did not change, see :py:func:`page_token`. The data of the entity is read
+        again once it may have.
         """
-        data = self._invoke_cmd("get_item", self.entity_id)["item"]
-        cells = data.pop("cells")
-        cells = {str(key).replace(" ", "_").lower(): value for key, value in cells.items()}
-        data = {str(key).replace(" ", "_").lower(): value for key, value in data.items()}
-        data.update(cells)
-        return data
+        page_data = self._current_page_data()
+        if page_data is not None:
+            return dict(page_data)
+        return flatten_item_data(self._invoke_cmd("get_item", self.entity_id)["item"])
 
     def read(self):
         return self.is_checked
@@ -3364,6 +3517,7 @@ class EntitiesConditionalView(View, ReportDataControllerMixin):
                 elements.append({"name": el_name, "entity_id": el_id})
         else:
             entities = self._invoke_cmd("get_all_items")
+            page = page_token(self.browser)
             for entity in entities:
                 try:
                     name = entity["item"]["cells"]["Name"]
@@ -3371,9 +3525,25 @@ class EntitiesConditionalView(View, ReportDataControllerMixin):
                     # Floating Ip view has an issue. it doesn't have Name though it should
                     name = entity["item"]["cells"]["Instance name"]
 
-                elements.append({"name": name, "entity_id": entity["item"]["id"]})
+                elements.append(
+                    {
+                        "name": name,
+                        "entity_id": entity["item"]["id"],
+                        "data": flatten_item_data(entity["item"]),
+                        "page": page,
+                    }
+                )
         return elements
 
+    def _entity(self, element):
+        return self.parent.entity_class(
+            parent=self,
+            entity_id=element["entity_id"],
+            name=element["name"],
+            page_data=element.get("data"),
+            page_token=element.get("page"),
+        )
+
     @property
     def entity_ids(self):
         return [el["entity_id"] for el in self._current_page_elements]
@@ -3427,12 +3597,14 @@ class EntitiesConditionalView(View, ReportDataControllerMixin):
             elif "id" in keys:
                 # it turned out that there are some views which have entities with internal id
                 # which override entity id in JS code. this is workaround for such case
-                elements = self._current_page_elements
-                for el in elements:
-                    entity = self.parent.entity_class(parent=self, entity_id=el["entity_id"])
+                # the entities are matched on the data read for the whole page in one call
+                for el in self._current_page_elements:
+                    entity = self._entity(el)
+                    # read just now, no need to check whether the page changed
+                    data = el["data"] if "data" in el else entity.data
                     for key, value in keys.items():
                         try:
-                            if entity.data[key] != str(value):
+                            if data[key] != str(value):
                                 break
                         except KeyError:
                             break
@@ -3462,21 +3634,11 @@ class EntitiesConditionalView(View, ReportDataControllerMixin):
         Returns: all entities (QuadIcon/etc.) displayed by view, or sliced entities if slice.
         """
         if not surf_pages:
-            return [
-                self.parent.entity_class(parent=self, entity_id=el["entity_id"], name=el["name"])
-                for el in self._current_page_elements[slice]
-            ]
+            return [self._entity(el) for el in self._current_page_elements[slice]]
         else:
             entities = []
             for _ in self.paginator.pages():
-                entities.extend(
-                    [
-                        self.parent.entity_class(
-                            parent=self, entity_id=el["entity_id"], name=el["name"]
-                        )
-                        for el in self._current_page_elements[slice]
-                    ]
-                )
+                entities.extend([self._entity(el) for el in self._current_page_elements[slice]])
             return entities
 
     def get_entity(self, surf_pages=False, use_search=False, **keys):
@@ -3600,11 +3762,14 @@ class BaseEntitiesView(View):
                     elements.append({"name": el_name, "entity_id": el_id})
             else:
                 entities = self._invoke_cmd("get_all_items")
+                page = page_token(self.browser)
                 for entity in entities:
                     elements.append(
                         {
                             "name": entity["item"]["cells"].get("Name", None),
                             "entity_id": entity["item"]["id"],
+                            "data": flatten_item_data(entity["item"]),
+                            "page": page,
                         }
                     )
             return elements